@@ -9,13 +9,78 @@ SECRET_KEY: str = os.getenv("SECRET_KEY", "dev_secret_change_me")
 ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 DATABASE_URL: str = os.getenv("DATABASE_URL", "./chapterprep.db")
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 8))
+DB_BUSY_TIMEOUT_SECONDS: float = float(os.getenv("DB_BUSY_TIMEOUT_SECONDS", 5))
+DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 256))
+DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+SQL_SLOW_QUERY_MS: float = float(os.getenv("SQL_SLOW_QUERY_MS", 100))
+SQL_SLOW_QUERY_LOG: str = os.getenv("SQL_SLOW_QUERY_LOG", "")
+SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", 50))
+PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", 200))
+DB_MIGRATE_ON_STARTUP: bool = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
 GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+# URLs des API externes : à remplacer par celles de tools/fake_upstreams.py en local.
+GEMINI_API_BASE_URL: str = os.getenv("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+EXTRACTION_CACHE_ENABLED: bool = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_MAX_MB: float = float(os.getenv("EXTRACTION_CACHE_MAX_MB", 50))
+EXTRACTION_CACHE_TOUCH_MINUTES: float = float(os.getenv("EXTRACTION_CACHE_TOUCH_MINUTES", 10))
+EXTRACTION_CACHE_STATS_FLUSH_SECONDS: float = float(os.getenv("EXTRACTION_CACHE_STATS_FLUSH_SECONDS", 30))
+EXTRACTION_WORKERS: int = int(os.getenv("EXTRACTION_WORKERS", 4))
+JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", 120))
+JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 2))
+EXTRACTION_PACK_MAX_CHAPTERS: int = int(os.getenv("EXTRACTION_PACK_MAX_CHAPTERS", 1))
+EXTRACTION_PACK_MAX_WORDS: int = int(os.getenv("EXTRACTION_PACK_MAX_WORDS", 4000))
 RAPIDAPI_KEY: str = os.getenv("RAPIDAPI_KEY", "")
+RAPIDAPI_TRANSLATE_URL: str = os.getenv("RAPIDAPI_TRANSLATE_URL", "https://deep-translate1.p.rapidapi.com/language/translate/v2")
 RESEND_API_KEY: str = os.getenv("RESEND_API_KEY", "")
 RESEND_FROM_EMAIL: str = os.getenv("RESEND_FROM_EMAIL", "")
+RESEND_API_URL: str = os.getenv("RESEND_API_URL", "https://api.resend.com/emails")
 FRONTEND_INDEX_URL: str = os.getenv("FRONTEND_INDEX_URL", "http://localhost:5500/index.html")
 EMAIL_VERIFICATION_EXPIRE_HOURS: int = int(os.getenv("EMAIL_VERIFICATION_EXPIRE_HOURS", 24))
 BACKEND_BASE_URL: str = os.getenv("BACKEND_BASE_URL", "http://localhost:8000")
+HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", 5))
+HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", 30))
+GEMINI_TIMEOUT_SECONDS: float = float(os.getenv("GEMINI_TIMEOUT_SECONDS", 30))
+GEMINI_MAX_CONNECTIONS: int = int(os.getenv("GEMINI_MAX_CONNECTIONS", 20))
+GEMINI_REQUESTS_PER_MINUTE: int = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", 60))
+GEMINI_TOKENS_PER_MINUTE: int = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", 1000000))
+GEMINI_STREAMING_ENABLED: bool = os.getenv("GEMINI_STREAMING_ENABLED", "true").lower() == "true"
+GEMINI_STRUCTURED_OUTPUT: bool = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() == "true"
+EXTRACTION_PROMPT_MODE: str = os.getenv("EXTRACTION_PROMPT_MODE", "full")
+EXTRACTION_ENGINE: str = os.getenv("EXTRACTION_ENGINE", "gemini")
+EXTRACTION_LOCAL_FALLBACK: bool = os.getenv("EXTRACTION_LOCAL_FALLBACK", "true").lower() == "true"
+GEMINI_FALLBACK_SECONDS: float = float(os.getenv("GEMINI_FALLBACK_SECONDS", 15))
+LEXICON_ENABLED: bool = os.getenv("LEXICON_ENABLED", "true").lower() == "true"
+LEXICON_MIN_CONFIRMATIONS: int = int(os.getenv("LEXICON_MIN_CONFIRMATIONS", 0))
+KNOWN_WORDS_ENABLED: bool = os.getenv("KNOWN_WORDS_ENABLED", "true").lower() == "true"
+KNOWN_WORDS_PROMPT_MAX: int = int(os.getenv("KNOWN_WORDS_PROMPT_MAX", 100))
+KNOWN_WORDS_CACHE_USERS: int = int(os.getenv("KNOWN_WORDS_CACHE_USERS", 1000))
+GEMINI_MAX_RETRIES: int = int(os.getenv("GEMINI_MAX_RETRIES", 2))
+GEMINI_RETRY_BASE_SECONDS: float = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", 0.5))
+GEMINI_RETRY_MAX_SECONDS: float = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", 8))
+GEMINI_CIRCUIT_FAILURES: int = int(os.getenv("GEMINI_CIRCUIT_FAILURES", 5))
+GEMINI_CIRCUIT_RESET_SECONDS: float = float(os.getenv("GEMINI_CIRCUIT_RESET_SECONDS", 30))
+GEMINI_HEDGE_PERCENTILE: float = float(os.getenv("GEMINI_HEDGE_PERCENTILE", 0))
+# Routage (model_routing.py) : vide = tout sur GEMINI_MODEL.
+GEMINI_FAST_MODEL: str = os.getenv("GEMINI_FAST_MODEL", "")
+GEMINI_FAST_MAX_PROMPT_TOKENS: int = int(os.getenv("GEMINI_FAST_MAX_PROMPT_TOKENS", 1500))
+GEMINI_FAST_MAX_WORDS: int = int(os.getenv("GEMINI_FAST_MAX_WORDS", 15))
+GEMINI_FAST_LEVELS: set[str] = {level.strip() for level in os.getenv("GEMINI_FAST_LEVELS", "A1,A2,B1,B2").split(",") if level.strip()}
+GEMINI_FAST_THINKING_BUDGET: int = int(os.getenv("GEMINI_FAST_THINKING_BUDGET", 0))
+# Tarifs en USD par million de jetons (sortie : réponse + réflexion du modèle).
+GEMINI_INPUT_PRICE_PER_MTOK: float = float(os.getenv("GEMINI_INPUT_PRICE_PER_MTOK", 0.30))
+GEMINI_OUTPUT_PRICE_PER_MTOK: float = float(os.getenv("GEMINI_OUTPUT_PRICE_PER_MTOK", 2.50))
+GEMINI_FAST_INPUT_PRICE_PER_MTOK: float = float(os.getenv("GEMINI_FAST_INPUT_PRICE_PER_MTOK", 0.10))
+GEMINI_FAST_OUTPUT_PRICE_PER_MTOK: float = float(os.getenv("GEMINI_FAST_OUTPUT_PRICE_PER_MTOK", 0.40))
+ADMIN_USERNAMES: set[str] = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
+RAPIDAPI_TIMEOUT_SECONDS: float = float(os.getenv("RAPIDAPI_TIMEOUT_SECONDS", 10))
+RAPIDAPI_MAX_CONNECTIONS: int = int(os.getenv("RAPIDAPI_MAX_CONNECTIONS", 20))
+RESEND_TIMEOUT_SECONDS: float = float(os.getenv("RESEND_TIMEOUT_SECONDS", 10))
+RESEND_MAX_CONNECTIONS: int = int(os.getenv("RESEND_MAX_CONNECTIONS", 5))
 
 if os.getenv("APP_ENV") == "production" and SECRET_KEY == "dev_secret_change_me":
     raise RuntimeError(
@@ -1,98 +1,132 @@
+import asyncio
+import contextvars
+import functools
+import queue
 import sqlite3
-from config import DATABASE_URL
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 
+import migrations
+from instrumentation import InstrumentedConnection
+from config import (
+    DATABASE_URL,
+    DB_BUSY_TIMEOUT_SECONDS,
+    DB_MIGRATE_ON_STARTUP,
+    DB_POOL_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+)
 
-def get_connection() -> sqlite3.Connection:
-    """Retourne une connexion SQLite avec row_factory activé (accès par nom de colonne)."""
-    conn = sqlite3.connect(DATABASE_URL)
+T = TypeVar("T")
+
+# Connexions inactives prêtes à être réutilisées (LIFO : la plus « chaude » d'abord).
+# DB_POOL_SIZE=0 : pas de pool, une connexion par appel (mesure de référence, tools/db_bench.py).
+_pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(maxsize=max(DB_POOL_SIZE, 1))
+
+# Threads dédiés à SQLite : autant que de connexions gardées au chaud, indépendants
+# du threadpool de Starlette (les routes async n'y consomment aucun worker).
+# Créé au premier appel et recréé après close_pool() : un second lifespan dans le même
+# processus (TestClient, rechargement) retrouve un executor utilisable.
+_db_executor: ThreadPoolExecutor | None = None
+_db_executor_lock = threading.Lock()
+
+
+def _open_connection() -> sqlite3.Connection:
+    """
+    Ouvre une connexion longue durée : WAL, busy timeout, cache de requêtes préparées.
+    check_same_thread=False car une connexion passe d'un thread à l'autre via le pool
+    (jamais utilisée par deux threads en même temps).
+    """
+    conn = sqlite3.connect(
+        DATABASE_URL,
+        timeout=DB_BUSY_TIMEOUT_SECONDS,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+        factory=InstrumentedConnection,
+    )
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
     return conn
 
 
+def get_connection() -> sqlite3.Connection:
+    """
+    Emprunte une connexion au pool (row_factory activé, accès par nom de colonne).
+    En ouvre une nouvelle si aucune n'est disponible.
+    Toujours rendre la connexion avec release_connection().
+    """
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _open_connection()
+
+
+def release_connection(conn: sqlite3.Connection) -> None:
+    """Rend une connexion au pool. Au-delà de DB_POOL_SIZE connexions inactives, elle est fermée."""
+    if conn.in_transaction:
+        conn.rollback()
+    if DB_POOL_SIZE <= 0:
+        conn.close()
+        return
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+async def run_in_db_executor(fn: Callable[..., T], /, *args, **kwargs) -> T:
+    """
+    Exécute un appel bloquant (fonction de repository) dans l'executor SQLite dédié.
+    Le contexte (ContextVar de l'instrumentation SQL) suit l'appel dans le thread.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(_get_db_executor(), call)
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(max_workers=max(DB_POOL_SIZE, 1), thread_name_prefix="sqlite")
+        return _db_executor
+
+
+def close_pool() -> None:
+    """
+    Arrête l'executor SQLite et ferme toutes les connexions inactives du pool (arrêt de
+    l'application). Le prochain run_in_db_executor() recrée l'executor.
+    """
+    global _db_executor
+    with _db_executor_lock:
+        executor, _db_executor = _db_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            return
+
+
 def init_db() -> None:
-    """Crée les tables si elles n'existent pas encore."""
+    """
+    Met le schéma à jour via les migrations versionnées (quasi gratuit si la base est à jour).
+    Avec DB_MIGRATE_ON_STARTUP=false, refuse de démarrer sur une base en retard :
+    la migrer au préalable avec `python migrations.py`.
+    """
     conn = get_connection()
-    with conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                username   TEXT    NOT NULL UNIQUE,
-                email      TEXT    NOT NULL UNIQUE,
-                password   TEXT    NOT NULL,
-                email_verified INTEGER NOT NULL DEFAULT 0,
-                email_verified_at TEXT,
-                verification_token_hash TEXT,
-                verification_token_expires_at TEXT,
-                created_at TEXT    NOT NULL DEFAULT (datetime('now'))
-            )
-        """)
-        user_columns = {
-            row["name"]
-            for row in conn.execute("PRAGMA table_info(users)").fetchall()
-        }
-        if "email_verified" not in user_columns:
-            conn.execute(
-                "ALTER TABLE users ADD COLUMN email_verified INTEGER NOT NULL DEFAULT 0"
-            )
-        if "email_verified_at" not in user_columns:
-            conn.execute(
-                "ALTER TABLE users ADD COLUMN email_verified_at TEXT"
-            )
-        if "verification_token_hash" not in user_columns:
-            conn.execute(
-                "ALTER TABLE users ADD COLUMN verification_token_hash TEXT"
-            )
-        if "verification_token_expires_at" not in user_columns:
-            conn.execute(
-                "ALTER TABLE users ADD COLUMN verification_token_expires_at TEXT"
-            )
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS books (
-                id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                title      TEXT    NOT NULL,
-                author     TEXT,
-                language   TEXT    NOT NULL DEFAULT 'fr',
-                created_at TEXT    NOT NULL DEFAULT (datetime('now'))
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS chapters (
-                id               INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id          INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                book_id          INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
-                chapter_number   INTEGER NOT NULL,
-                title            TEXT,
-                text             TEXT    NOT NULL,
-                level            TEXT    NOT NULL,
-                translation_mode TEXT    NOT NULL,
-                status           TEXT    NOT NULL DEFAULT 'pending',
-                created_at       TEXT    NOT NULL DEFAULT (datetime('now'))
-            )
-        """)
-        chapter_columns = {
-            row["name"]
-            for row in conn.execute("PRAGMA table_info(chapters)").fetchall()
-        }
-        if "status" not in chapter_columns:
-            conn.execute(
-                "ALTER TABLE chapters ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'"
-            )
-        if "title" not in chapter_columns:
-            conn.execute(
-                "ALTER TABLE chapters ADD COLUMN title TEXT"
-            )
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS words (
-                id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                chapter_id INTEGER NOT NULL REFERENCES chapters(id) ON DELETE CASCADE,
-                user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                word       TEXT    NOT NULL,
-                base_form  TEXT    NOT NULL,
-                output     TEXT    NOT NULL,
-                status     TEXT    NOT NULL DEFAULT 'to_learn',
-                created_at TEXT    NOT NULL DEFAULT (datetime('now'))
+    try:
+        if DB_MIGRATE_ON_STARTUP:
+            migrations.migrate(conn)
+            return
+        version = migrations.get_schema_version(conn)
+        if version < migrations.LATEST_VERSION:
+            raise RuntimeError(
+                f"Schéma en version {version}, version {migrations.LATEST_VERSION} attendue. "
+                "Lance `python migrations.py` avant de démarrer l'API."
             )
-        """)
-    conn.close()
+    finally:
+        release_connection(conn)
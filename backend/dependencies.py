@@ -5,18 +5,27 @@ Injectables via Depends() dans n'importe quelle route protégée.
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+import config
 from models import TokenData
 from services import auth_service
 
 _bearer = HTTPBearer()
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(_bearer),
 ) -> TokenData:
     """
     Extrait et valide le token JWT du header Authorization: Bearer <token>.
     Retourne un TokenData(user_id, username) si valide.
     Lève une HTTPException 401 sinon.
+    Async : simple décodage JWT, inutile de passer par le threadpool.
     """
     return auth_service.decode_access_token(credentials.credentials)
+
+
+async def get_admin_user(current_user: TokenData = Depends(get_current_user)) -> TokenData:
+    """Comme get_current_user, réservé aux comptes de ADMIN_USERNAMES (403 sinon)."""
+    if current_user.username not in config.ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
+    return current_user
@@ -0,0 +1,89 @@
+"""
+Clients HTTP partagés vers les API externes (Gemini, RapidAPI, Resend).
+
+Un client par upstream, ouvert au démarrage de l'app (lifespan de main.py) et fermé à
+l'arrêt : les connexions keep-alive (DNS + TCP + TLS déjà faits) sont réutilisées d'un
+appel à l'autre, avec une limite de connexions propre à chaque upstream.
+
+Gemini et RapidAPI sont appelés depuis du code async (httpx.AsyncClient) ;
+Resend depuis les routes auth synchrones (httpx.Client, thread-safe).
+"""
+import importlib.util
+import logging
+
+import httpx
+
+import config
+
+logger = logging.getLogger("chapterprep.http")
+
+_async_clients: dict[str, httpx.AsyncClient] = {}
+_sync_clients: dict[str, httpx.Client] = {}
+
+
+def _http2() -> bool:
+    # HTTP/2 nécessite le paquet h2 (requirements.txt) : sans lui, on reste en HTTP/1.1.
+    if config.HTTP2_ENABLED and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2_ENABLED=true mais le paquet h2 est absent : HTTP/1.1 utilisé.")
+        return False
+    return config.HTTP2_ENABLED
+
+
+def _settings(timeout_seconds: float, max_connections: int) -> dict:
+    return {
+        "timeout": httpx.Timeout(timeout_seconds, connect=config.HTTP_CONNECT_TIMEOUT_SECONDS),
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        "http2": _http2(),
+    }
+
+
+_ASYNC_UPSTREAMS = {
+    "gemini": lambda: _settings(config.GEMINI_TIMEOUT_SECONDS, config.GEMINI_MAX_CONNECTIONS),
+    "rapidapi": lambda: _settings(config.RAPIDAPI_TIMEOUT_SECONDS, config.RAPIDAPI_MAX_CONNECTIONS),
+}
+_SYNC_UPSTREAMS = {
+    "resend": lambda: _settings(config.RESEND_TIMEOUT_SECONDS, config.RESEND_MAX_CONNECTIONS),
+}
+
+
+# ─── Accès ───────────────────────────────────────────────────
+# Ouverture à la demande si le lifespan n'a pas tourné (script, test sans `with TestClient`).
+
+def get_async_client(upstream: str) -> httpx.AsyncClient:
+    """Client partagé pour "gemini" ou "rapidapi"."""
+    client = _async_clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _async_clients[upstream] = httpx.AsyncClient(**_ASYNC_UPSTREAMS[upstream]())
+    return client
+
+
+def get_sync_client(upstream: str) -> httpx.Client:
+    """Client partagé pour "resend"."""
+    client = _sync_clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _sync_clients[upstream] = httpx.Client(**_SYNC_UPSTREAMS[upstream]())
+    return client
+
+
+# ─── Cycle de vie ────────────────────────────────────────────
+
+def open_http_clients() -> None:
+    """Crée tous les clients (appelé au démarrage)."""
+    for upstream in _ASYNC_UPSTREAMS:
+        get_async_client(upstream)
+    for upstream in _SYNC_UPSTREAMS:
+        get_sync_client(upstream)
+
+
+async def close_http_clients() -> None:
+    """Ferme les pools de connexions (appelé à l'arrêt)."""
+    for client in _async_clients.values():
+        await client.aclose()
+    for client in _sync_clients.values():
+        client.close()
+    _async_clients.clear()
+    _sync_clients.clear()
@@ -0,0 +1,182 @@
+"""
+Instrumentation SQL par requête HTTP.
+
+Chaque connexion du pool est une InstrumentedConnection : tant qu'une requête HTTP est
+en cours (QueryStats posé dans un ContextVar par query_stats_middleware), chaque
+statement est compté et chronométré (execute + fetch).
+
+- Statement plus lent que SQL_SLOW_QUERY_MS → logger "chapterprep.sql.slow",
+  avec son EXPLAIN QUERY PLAN.
+- DEBUG=true seulement (sinon ni comptage ni normalisation du SQL) :
+    - même SQL exécuté SQL_N_PLUS_ONE_THRESHOLD fois ou plus dans une requête → avertissement N+1 ;
+    - en-têtes X-DB-Query-Count, X-DB-Time-Ms, X-DB-Slowest-Ms (et X-DB-N-Plus-One).
+Les boucles longues d'une même requête (relecture d'une tâche par un flux SSE) passent
+par untracked_queries() : hors compte, elles ne sont pas des N+1.
+"""
+import logging
+import sqlite3
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import Request
+
+from config import DEBUG, SQL_N_PLUS_ONE_THRESHOLD, SQL_SLOW_QUERY_LOG, SQL_SLOW_QUERY_MS
+
+logger = logging.getLogger("chapterprep.sql")
+slow_query_logger = logging.getLogger("chapterprep.sql.slow")
+if SQL_SLOW_QUERY_LOG:
+    _handler = logging.FileHandler(SQL_SLOW_QUERY_LOG, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.setLevel(logging.WARNING)
+
+
+class QueryStats:
+    """Compteurs SQL d'une requête HTTP (statements comptés seulement si `count_statements`)."""
+
+    def __init__(self, count_statements: bool) -> None:
+        self.count_statements = count_statements
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.by_sql: Counter[str] = Counter()
+
+    def add_statement(self, sql: str) -> None:
+        if not self.count_statements:
+            return
+        self.count += 1
+        if SQL_N_PLUS_ONE_THRESHOLD > 0:
+            self.by_sql[" ".join(sql.split())] += 1
+
+    def add_time(self, elapsed_ms: float, statement_ms: float) -> None:
+        self.total_ms += elapsed_ms
+        self.slowest_ms = max(self.slowest_ms, statement_ms)
+
+    def repeated_statements(self) -> list[tuple[str, int]]:
+        return [
+            (sql, n) for sql, n in self.by_sql.most_common()
+            if n >= SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def untracked_queries() -> Iterator[None]:
+    """Statements exécutés dans ce bloc hors des compteurs de la requête HTTP en cours."""
+    token = _current_stats.set(None)
+    try:
+        yield
+    finally:
+        _current_stats.reset(token)
+
+
+class _InstrumentedCursor(sqlite3.Cursor):
+    """Chronomètre execute() puis les fetch, cumulés sur le dernier statement exécuté."""
+
+    _sql: str = ""
+    _params = ()
+    _elapsed_ms: float = 0.0
+    _explained: bool = False
+
+    def _track(self, started: float) -> None:
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._elapsed_ms += elapsed_ms
+        stats.add_time(elapsed_ms, self._elapsed_ms)
+        if self._elapsed_ms >= SQL_SLOW_QUERY_MS and not self._explained:
+            self._explained = True
+            _log_slow_query(self.connection, self._sql, self._params, self._elapsed_ms)
+
+    def execute(self, sql, parameters=(), /):
+        stats = _current_stats.get()
+        if stats is None:
+            return super().execute(sql, parameters)
+        stats.add_statement(sql)
+        self._sql, self._params, self._elapsed_ms, self._explained = sql, parameters, 0.0, False
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._track(started)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        stats = _current_stats.get()
+        if stats is None:
+            return super().executemany(sql, seq_of_parameters)
+        stats.add_statement(sql)
+        # Pas d'EXPLAIN possible sans un jeu de paramètres : on ne garde pas le générateur.
+        self._sql, self._params, self._elapsed_ms, self._explained = sql, None, 0.0, False
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._track(started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._track(started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._track(started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Fabrique de connexion (sqlite3.connect(factory=...)) : execute passe par le curseur chronométré."""
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor(_InstrumentedCursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor(_InstrumentedCursor).executemany(sql, seq_of_parameters)
+
+
+def _log_slow_query(conn: sqlite3.Connection, sql: str, params, elapsed_ms: float) -> None:
+    plan = "(plan indisponible)"
+    if params is not None:
+        try:
+            # sqlite3.Connection.execute : l'EXPLAIN lui-même n'est pas instrumenté.
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            plan = " | ".join(str(tuple(row)[-1]) for row in rows)
+        except sqlite3.Error as exc:
+            plan = f"(EXPLAIN impossible : {exc})"
+    slow_query_logger.warning(
+        "slow query %.1f ms : %s -- plan : %s", elapsed_ms, " ".join(sql.split()), plan
+    )
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Ouvre un QueryStats pour la requête. Le ContextVar suit la requête jusque dans
+    l'executor SQLite (database.run_in_db_executor copie le contexte).
+    """
+    stats = QueryStats(count_statements=DEBUG)
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+
+    if DEBUG:
+        repeated = stats.repeated_statements()
+        for sql, n in repeated:
+            logger.warning("N+1 suspect sur %s %s : %d × %s", request.method, request.url.path, n, sql)
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.total_ms:.2f}"
+        response.headers["X-DB-Slowest-Ms"] = f"{stats.slowest_ms:.2f}"
+        if repeated:
+            response.headers["X-DB-N-Plus-One"] = str(len(repeated))
+    return response
@@ -0,0 +1,128 @@
+"""
+Lecture incrémentale d'un tableau JSON reçu par morceaux (réponse Gemini en streaming).
+
+`feed()` retourne les éléments du tableau dès que leur dernier caractère est arrivé,
+sans attendre la fin du tableau : le premier mot extrait est disponible après un seul
+objet généré, pas après la réponse entière.
+Tout ce qui précède le premier '[' est ignoré (bloc ```json, texte d'introduction).
+Un tableau coupé (réponse tronquée) garde ses éléments complets ; salvage_json fait de
+même pour un document entier (objet de l'extraction groupée).
+"""
+import json
+from typing import Any
+
+
+class JsonArrayStreamParser:
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0                  # prochain caractère de _buffer à examiner
+        self._start: int | None = None  # début de l'élément en cours dans _buffer
+        self._depth = 0                # 0 : avant le '[' ; 1 : entre les éléments
+        self._in_string = False
+        self._escape = False
+        self.started = False           # '[' rencontré
+        self.done = False              # ']' final rencontré
+
+    def feed(self, chunk: str) -> list[Any]:
+        """
+        Ajoute `chunk` et retourne les éléments complétés par ce morceau.
+        Raises:
+            ValueError — si un élément complet n'est pas du JSON valide.
+        """
+        self._buffer += chunk
+        buf = self._buffer
+        items: list[Any] = []
+        i = self._pos
+        while i < len(buf) and not self.done:
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if ch == "[":
+                    self._depth = 1
+                    self.started = True
+            elif ch in "{[":
+                if self._depth == 1:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    items.append(self._decode(buf[self._start:i + 1]))
+                    self._start = None
+                elif self._depth == 0:
+                    # ']' du tableau : dernier élément scalaire éventuel.
+                    if self._start is not None:
+                        items.append(self._decode(buf[self._start:i]))
+                        self._start = None
+                    self.done = True
+            elif ch == ",":
+                if self._depth == 1 and self._start is not None:
+                    items.append(self._decode(buf[self._start:i]))
+                    self._start = None
+            elif not ch.isspace() and self._depth == 1 and self._start is None:
+                self._start = i
+                if ch == '"':
+                    self._in_string = True
+            elif ch == '"':
+                self._in_string = True
+            i += 1
+
+        # Oublie ce qui a déjà été lu, en gardant l'élément en cours.
+        keep_from = i if self._start is None else self._start
+        self._buffer = buf[keep_from:]
+        self._pos = i - keep_from
+        if self._start is not None:
+            self._start = 0
+        return items
+
+    @staticmethod
+    def _decode(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Élément JSON invalide : {text[:80]!r}") from exc
+
+
+def salvage_json(text: str) -> Any:
+    """
+    Partie utilisable d'un document JSON coupé (réponse tronquée), qui commence à son
+    premier '{' ou '[' : coupée après le dernier objet ou tableau complet, conteneurs
+    encore ouverts refermés. `{"12": [{…}, {…}, {"wo` → `{"12": [{…}, {…}]}`.
+    Raises:
+        ValueError — si aucun objet ou tableau n'est complet.
+    """
+    closing: list[str] = []
+    in_string = escape = False
+    cut: tuple[int, str] | None = None   # (fin du préfixe, fermetures à ajouter)
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closing.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not closing:
+                break
+            closing.pop()
+            cut = (i + 1, "".join(reversed(closing)))
+            if not closing:
+                break
+    if cut is None:
+        raise ValueError("Aucun objet JSON complet dans la réponse.")
+    end, suffix = cut
+    try:
+        return json.loads(text[:end] + suffix)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"JSON invalide : {text[:80]!r}") from exc
@@ -1,14 +1,36 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import init_db
+from database import close_pool, init_db
+from http_clients import close_http_clients, open_http_clients
+from instrumentation import query_stats_middleware
+from services import extraction_cache_service, job_service
+from routes import admin as admin_router
 from routes import auth as auth_router
 from routes import books as books_router
 from routes import chapters as chapters_router
+from routes import jobs as jobs_router
+from routes import search as search_router
 from routes import translate as translate_router
 from routes import utils as utils_router
 
-app = FastAPI(title="ChapterPrep API", version="0.1.0")
+
+# ─── Cycle de vie : base, clients HTTP partagés, workers d'extraction, compteurs du cache ──
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    open_http_clients()
+    await job_service.start_workers()
+    yield
+    await job_service.stop_workers()
+    await close_http_clients()
+    await extraction_cache_service.flush_stats()
+    close_pool()
+
+
+app = FastAPI(title="ChapterPrep API", version="0.1.0", lifespan=lifespan)
 
 # ─── CORS ────────────────────────────────────────────────────
 app.add_middleware(
@@ -19,15 +41,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ─── Initialisation de la base ───────────────────────────────
-@app.on_event("startup")
-def on_startup():
-    init_db()
+# ─── Instrumentation SQL (compteurs par requête, slow queries, N+1) ──
+app.middleware("http")(query_stats_middleware)
 
 # ─── Routers ─────────────────────────────────────────────────
+app.include_router(admin_router.router)
 app.include_router(auth_router.router)
 app.include_router(books_router.router)
 app.include_router(chapters_router.router)
+app.include_router(jobs_router.router)
+app.include_router(search_router.router)
 app.include_router(translate_router.router)
 app.include_router(utils_router.router)
 
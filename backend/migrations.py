@@ -0,0 +1,508 @@
+"""
+Migrations versionnées du schéma SQLite.
+
+La version appliquée est stockée dans l'en-tête de la base (PRAGMA user_version) :
+une base à jour ne coûte qu'une lecture au démarrage.
+Chaque étape s'exécute dans sa propre transaction, avec la mise à jour de version.
+
+Migration hors ligne (avant un déploiement) :
+    python migrations.py                 → applique les migrations manquantes
+    python migrations.py --status        → affiche la version courante
+    python migrations.py --database PATH → cible une autre base que DATABASE_URL
+"""
+import argparse
+import sqlite3
+from typing import Callable
+
+from config import DATABASE_URL
+
+
+# ─── Étapes ──────────────────────────────────────────────────
+# Ne jamais modifier une étape déjà publiée : en ajouter une nouvelle à la fin.
+
+# Lignes lues par lot par les étapes qui recalculent une colonne depuis le texte.
+_BATCH_SIZE = 500
+
+
+def _001_initial_schema(conn: sqlite3.Connection) -> None:
+    """Tables users, books, chapters, words (+ colonnes ajoutées avant le versioning)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            username   TEXT    NOT NULL UNIQUE,
+            email      TEXT    NOT NULL UNIQUE,
+            password   TEXT    NOT NULL,
+            email_verified INTEGER NOT NULL DEFAULT 0,
+            email_verified_at TEXT,
+            verification_token_hash TEXT,
+            verification_token_expires_at TEXT,
+            created_at TEXT    NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    # Bases créées avant le versioning : colonnes ajoutées au fil de l'eau.
+    user_columns = {
+        row[1] for row in conn.execute("PRAGMA table_info(users)").fetchall()
+    }
+    if "email_verified" not in user_columns:
+        conn.execute(
+            "ALTER TABLE users ADD COLUMN email_verified INTEGER NOT NULL DEFAULT 0"
+        )
+    if "email_verified_at" not in user_columns:
+        conn.execute("ALTER TABLE users ADD COLUMN email_verified_at TEXT")
+    if "verification_token_hash" not in user_columns:
+        conn.execute("ALTER TABLE users ADD COLUMN verification_token_hash TEXT")
+    if "verification_token_expires_at" not in user_columns:
+        conn.execute("ALTER TABLE users ADD COLUMN verification_token_expires_at TEXT")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS books (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            title      TEXT    NOT NULL,
+            author     TEXT,
+            language   TEXT    NOT NULL DEFAULT 'fr',
+            created_at TEXT    NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chapters (
+            id               INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id          INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            book_id          INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+            chapter_number   INTEGER NOT NULL,
+            title            TEXT,
+            text             TEXT    NOT NULL,
+            level            TEXT    NOT NULL,
+            translation_mode TEXT    NOT NULL,
+            status           TEXT    NOT NULL DEFAULT 'pending',
+            created_at       TEXT    NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    chapter_columns = {
+        row[1] for row in conn.execute("PRAGMA table_info(chapters)").fetchall()
+    }
+    if "status" not in chapter_columns:
+        conn.execute(
+            "ALTER TABLE chapters ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'"
+        )
+    if "title" not in chapter_columns:
+        conn.execute("ALTER TABLE chapters ADD COLUMN title TEXT")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS words (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            chapter_id INTEGER NOT NULL REFERENCES chapters(id) ON DELETE CASCADE,
+            user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            word       TEXT    NOT NULL,
+            base_form  TEXT    NOT NULL,
+            output     TEXT    NOT NULL,
+            status     TEXT    NOT NULL DEFAULT 'to_learn',
+            created_at TEXT    NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+
+
+def _002_secondary_indexes(conn: sqlite3.Connection) -> None:
+    """Index composites calqués sur les WHERE / ORDER BY des repositories."""
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_verification_token_hash
+        ON users (verification_token_hash)
+        WHERE verification_token_hash IS NOT NULL
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_books_user_created
+        ON books (user_id, created_at)
+    """)
+    # Sert aussi le ON DELETE CASCADE books → chapters (book_id en tête).
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chapters_book_user_number
+        ON chapters (book_id, user_id, chapter_number, created_at)
+    """)
+    # Sert aussi le ON DELETE CASCADE chapters → words (chapter_id en tête).
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_words_chapter_user_created
+        ON words (chapter_id, user_id, created_at)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_words_chapter_user_word
+        ON words (chapter_id, user_id, word)
+    """)
+
+
+def _003_chapter_word_count(conn: sqlite3.Connection) -> None:
+    """Colonne chapters.word_count + index couvrant pour lister sans lire le texte."""
+    conn.execute("ALTER TABLE chapters ADD COLUMN word_count INTEGER NOT NULL DEFAULT 0")
+    # Par lots keyset sur id : un lot de textes en mémoire à la fois, et pas de SELECT
+    # encore ouvert sur la table pendant ses UPDATE.
+    last_id = 0
+    while rows := conn.execute(
+        "SELECT id, text FROM chapters WHERE id > ? ORDER BY id LIMIT ?", (last_id, _BATCH_SIZE)
+    ).fetchall():
+        conn.executemany(
+            "UPDATE chapters SET word_count = ? WHERE id = ?",
+            ((len(row[1].split()), row[0]) for row in rows),
+        )
+        last_id = rows[-1][0]
+    # Remplace idx_chapters_book_user_number : mêmes colonnes en tête (CASCADE books → chapters),
+    # plus toutes les colonnes du résumé pour que la liste ne touche jamais la table.
+    conn.execute("DROP INDEX IF EXISTS idx_chapters_book_user_number")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chapters_book_user_listing
+        ON chapters (
+            book_id, user_id, chapter_number, created_at,
+            title, level, translation_mode, status, word_count
+        )
+    """)
+
+
+def _004_chapter_listing_keyset(conn: sqlite3.Connection) -> None:
+    """Index de liste des chapitres trié par (chapter_number, id) pour la pagination keyset."""
+    conn.execute("DROP INDEX IF EXISTS idx_chapters_book_user_listing")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chapters_book_user_keyset
+        ON chapters (
+            book_id, user_id, chapter_number, id,
+            created_at, title, level, translation_mode, status, word_count
+        )
+    """)
+
+
+def _005_chapter_search(conn: sqlite3.Connection) -> None:
+    """Index plein texte FTS5 des chapitres (titre + texte), tenu à jour par triggers."""
+    # External content : l'index ne stocke pas une 2e copie du texte, il relit chapters
+    # (par rowid = chapters.id) pour les extraits. prefix : index des préfixes de 2 et 3
+    # caractères, sans lequel « ch* » parcourt la liste de chaque terme commençant par ch.
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS chapters_fts USING fts5(
+            title, text,
+            content = 'chapters',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    # Indexation incrémentale : seules les lignes écrites sont (ré)indexées,
+    # dans la transaction de l'écriture. Les suppressions en cascade (books → chapters)
+    # déclenchent aussi chapters_fts_ad.
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chapters_fts_ai AFTER INSERT ON chapters BEGIN
+            INSERT INTO chapters_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chapters_fts_ad AFTER DELETE ON chapters BEGIN
+            INSERT INTO chapters_fts (chapters_fts, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+        END
+    """)
+    # OF title, text : les changements de status / level ne touchent pas l'index.
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chapters_fts_au AFTER UPDATE OF title, text ON chapters BEGIN
+            INSERT INTO chapters_fts (chapters_fts, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+            INSERT INTO chapters_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+        END
+    """)
+    # Chapitres existants : indexés une seule fois, ici.
+    conn.execute("INSERT INTO chapters_fts (chapters_fts) VALUES ('rebuild')")
+
+
+def _006_extraction_cache(conn: sqlite3.Connection) -> None:
+    """Cache des extractions Gemini (clé = hash du texte et des réglages) + compteurs."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS extraction_cache (
+            cache_key    TEXT    PRIMARY KEY,
+            words        TEXT    NOT NULL,
+            size_bytes   INTEGER NOT NULL,
+            hit_count    INTEGER NOT NULL DEFAULT 0,
+            created_at   TEXT    NOT NULL DEFAULT (datetime('now')),
+            last_used_at TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        ) WITHOUT ROWID
+    """)
+    # Éviction LRU : les entrées les moins récemment servies partent en premier.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used
+        ON extraction_cache (last_used_at)
+    """)
+    # Une seule ligne (id = 1) : compteurs partagés par tous les workers.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS extraction_cache_stats (
+            id        INTEGER PRIMARY KEY CHECK (id = 1),
+            hits      INTEGER NOT NULL DEFAULT 0,
+            misses    INTEGER NOT NULL DEFAULT 0,
+            evictions INTEGER NOT NULL DEFAULT 0,
+            -- Somme de extraction_cache.size_bytes, tenue à jour par le repository.
+            total_bytes INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO extraction_cache_stats (id) VALUES (1)")
+
+
+def _007_extraction_jobs(conn: sqlite3.Connection) -> None:
+    """File persistante des extractions de vocabulaire (traitées en arrière-plan)."""
+    # chapter_id ON DELETE SET NULL : une tâche échouée dont le chapitre a été supprimé
+    # reste lisible par le client qui la suit. book_id sans FK : le livre est déjà
+    # couvert par la cascade livres → chapitres.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS extraction_jobs (
+            id                        INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id                   INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            book_id                   INTEGER NOT NULL,
+            chapter_id                INTEGER REFERENCES chapters(id) ON DELETE SET NULL,
+            target_language           TEXT    NOT NULL,
+            level                     TEXT    NOT NULL,
+            translation_mode          TEXT    NOT NULL,
+            words_to_extract          INTEGER NOT NULL,
+            delete_chapter_on_failure INTEGER NOT NULL DEFAULT 0,
+            status                    TEXT    NOT NULL DEFAULT 'queued',
+            attempts                  INTEGER NOT NULL DEFAULT 0,
+            result                    TEXT,
+            error                     TEXT,
+            lease_expires_at          TEXT,
+            created_at                TEXT    NOT NULL DEFAULT (datetime('now')),
+            started_at                TEXT,
+            finished_at               TEXT
+        )
+    """)
+    # Partiel : ne contient que les tâches à prendre, reste petit quel que soit l'historique.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_extraction_jobs_pending
+        ON extraction_jobs (status, id)
+        WHERE status IN ('queued', 'running')
+    """)
+    # Sert le ON DELETE SET NULL chapitres → tâches.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_extraction_jobs_chapter
+        ON extraction_jobs (chapter_id)
+    """)
+
+
+def _008_extraction_job_priority(conn: sqlite3.Connection) -> None:
+    """Priorité des tâches : l'extraction d'un livre entier passe après les extractions unitaires."""
+    conn.execute("ALTER TABLE extraction_jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+    # Prise des tâches dans l'ordre (priority, id) sans tri.
+    conn.execute("DROP INDEX IF EXISTS idx_extraction_jobs_pending")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_extraction_jobs_pending
+        ON extraction_jobs (priority, id)
+        WHERE status IN ('queued', 'running')
+    """)
+
+
+def _009_extraction_job_engine(conn: sqlite3.Connection) -> None:
+    """Moteur d'extraction de chaque tâche ('gemini' ou 'local')."""
+    conn.execute("ALTER TABLE extraction_jobs ADD COLUMN engine TEXT NOT NULL DEFAULT 'gemini'")
+
+
+def _010_llm_usage_daily(conn: sqlite3.Connection) -> None:
+    """Consommation des appels Gemini, agrégée par jour, utilisateur, livre et réglages."""
+    # Une ligne par combinaison du jour : la table reste petite quel que soit le nombre
+    # d'appels. latency_histogram : tableau JSON de compteurs (usage_service._LATENCY_BUCKETS_MS).
+    # book_id sans FK : l'historique de consommation survit à la suppression du livre.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_usage_daily (
+            day               TEXT    NOT NULL,
+            user_id           INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            book_id           INTEGER NOT NULL,
+            model             TEXT    NOT NULL,
+            level             TEXT    NOT NULL,
+            translation_mode  TEXT    NOT NULL,
+            outcome           TEXT    NOT NULL,
+            calls             INTEGER NOT NULL,
+            attempts          INTEGER NOT NULL,
+            prompt_tokens     INTEGER NOT NULL,
+            candidate_tokens  INTEGER NOT NULL,
+            total_tokens      INTEGER NOT NULL,
+            latency_ms_total  INTEGER NOT NULL,
+            latency_histogram TEXT    NOT NULL,
+            PRIMARY KEY (day, user_id, book_id, model, level, translation_mode, outcome)
+        ) WITHOUT ROWID
+    """)
+    # Sert le ON DELETE CASCADE utilisateurs → consommation.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_llm_usage_daily_user
+        ON llm_usage_daily (user_id)
+    """)
+
+
+def _011_shared_lexicon(conn: sqlite3.Connection) -> None:
+    """Lexique partagé entre utilisateurs (traductions / définitions déjà obtenues)."""
+    # Une entrée par (langue, mode, forme de base) : la première sortie obtenue est gardée,
+    # `confirmations` compte les utilisateurs qui ont gardé le mot avec cette même sortie.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lexicon (
+            language         TEXT    NOT NULL,
+            translation_mode TEXT    NOT NULL,
+            base_form        TEXT    NOT NULL,
+            output           TEXT    NOT NULL,
+            confirmations    INTEGER NOT NULL DEFAULT 0,
+            created_at       TEXT    NOT NULL DEFAULT (datetime('now')),
+            PRIMARY KEY (language, translation_mode, base_form)
+        ) WITHOUT ROWID
+    """)
+    # Forme rencontrée dans un texte (minuscules) → forme de base, tous modes confondus.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lexicon_forms (
+            language  TEXT NOT NULL,
+            form      TEXT NOT NULL,
+            base_form TEXT NOT NULL,
+            PRIMARY KEY (language, form)
+        ) WITHOUT ROWID
+    """)
+
+    # Reprise des mots déjà confirmés : la sortie la plus souvent gardée l'emporte.
+    conn.execute("""
+        INSERT OR IGNORE INTO lexicon (language, translation_mode, base_form, output, confirmations)
+        SELECT b.language, c.translation_mode, w.base_form, w.output, COUNT(*)
+        FROM words w
+        JOIN chapters c ON c.id = w.chapter_id
+        JOIN books b ON b.id = c.book_id
+        GROUP BY b.language, c.translation_mode, w.base_form, w.output
+        ORDER BY COUNT(*) DESC
+    """)
+    # lower() de SQLite ne gère que l'ASCII : minuscules faites en Python.
+    rows = conn.execute("""
+        SELECT DISTINCT b.language, w.word, w.base_form
+        FROM words w
+        JOIN chapters c ON c.id = w.chapter_id
+        JOIN books b ON b.id = c.book_id
+    """).fetchall()
+    conn.executemany(
+        "INSERT OR IGNORE INTO lexicon_forms (language, form, base_form) VALUES (?, ?, ?)",
+        [(language, word.lower(), base_form) for language, word, base_form in rows],
+    )
+
+
+def _012_words_by_user(conn: sqlite3.Connection) -> None:
+    """Index des mots par utilisateur (mots déjà connus, exclus des extractions)."""
+    # Sert aussi le ON DELETE CASCADE utilisateurs → mots.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_words_user
+        ON words (user_id)
+    """)
+
+
+def _013_chapter_search_by_user(conn: sqlite3.Connection) -> None:
+    """chapters_fts indexe aussi user_id : la recherche ne parcourt que les chapitres de l'utilisateur."""
+    # user_id est un terme de l'index (« 42 ») et non une colonne UNINDEXED : en external
+    # content, une colonne UNINDEXED est relue dans chapters ligne par ligne, après le
+    # MATCH sur tous les utilisateurs. Indexé, `user_id : 42 AND …` croise les listes
+    # de l'index : bm25 et la LIMIT ne portent que sur les chapitres de l'utilisateur.
+    for trigger in ("chapters_fts_ai", "chapters_fts_ad", "chapters_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS chapters_fts")
+    conn.execute("""
+        CREATE VIRTUAL TABLE chapters_fts USING fts5(
+            title, text, user_id,
+            content = 'chapters',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER chapters_fts_ai AFTER INSERT ON chapters BEGIN
+            INSERT INTO chapters_fts (rowid, title, text, user_id)
+            VALUES (new.id, new.title, new.text, new.user_id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER chapters_fts_ad AFTER DELETE ON chapters BEGIN
+            INSERT INTO chapters_fts (chapters_fts, rowid, title, text, user_id)
+            VALUES ('delete', old.id, old.title, old.text, old.user_id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER chapters_fts_au AFTER UPDATE OF title, text ON chapters BEGIN
+            INSERT INTO chapters_fts (chapters_fts, rowid, title, text, user_id)
+            VALUES ('delete', old.id, old.title, old.text, old.user_id);
+            INSERT INTO chapters_fts (rowid, title, text, user_id)
+            VALUES (new.id, new.title, new.text, new.user_id);
+        END
+    """)
+    conn.execute("INSERT INTO chapters_fts (chapters_fts) VALUES ('rebuild')")
+
+
+# Ordre = numéro de version (la version N correspond à MIGRATIONS[N - 1]).
+MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _001_initial_schema,
+    _002_secondary_indexes,
+    _003_chapter_word_count,
+    _004_chapter_listing_keyset,
+    _005_chapter_search,
+    _006_extraction_cache,
+    _007_extraction_jobs,
+    _008_extraction_job_priority,
+    _009_extraction_job_engine,
+    _010_llm_usage_daily,
+    _011_shared_lexicon,
+    _012_words_by_user,
+    _013_chapter_search_by_user,
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+
+# ─── Moteur ──────────────────────────────────────────────────
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> list[int]:
+    """
+    Applique les migrations manquantes, dans l'ordre. Retourne les versions appliquées.
+    Chaque étape est atomique : en cas d'erreur, la base reste à la version précédente.
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied: list[int] = []
+    for version, step in enumerate(MIGRATIONS, start=1):
+        # BEGIN IMMEDIATE sérialise les workers qui démarrent en même temps :
+        # la version est relue une fois le verrou d'écriture obtenu.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            step(conn)
+            # PRAGMA n'accepte pas de paramètre lié ; version est un int interne.
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+# ─── CLI ─────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrations du schéma ChapterPrep.")
+    parser.add_argument("--database", default=DATABASE_URL, help="Chemin de la base SQLite.")
+    parser.add_argument("--status", action="store_true", help="Affiche la version sans migrer.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database, isolation_level=None)
+    try:
+        current = get_schema_version(conn)
+        if args.status:
+            print(f"Version du schéma : {current} / {LATEST_VERSION}")
+            for version, step in enumerate(MIGRATIONS, start=1):
+                mark = "x" if version <= current else " "
+                print(f"  [{mark}] {version:03d} {step.__doc__}")
+            return
+
+        applied = migrate(conn)
+        if applied:
+            print(f"Migrations appliquées : {applied} (version {LATEST_VERSION}).")
+        else:
+            print(f"Base déjà à jour (version {current}).")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
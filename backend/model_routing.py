@@ -0,0 +1,95 @@
+"""
+Choix du modèle Gemini de chaque extraction (routage), par processus.
+
+Une extraction va au modèle rapide GEMINI_FAST_MODEL (réflexion limitée à
+GEMINI_FAST_THINKING_BUDGET jetons) si elle est petite et simple :
+    - prompt estimé d'au plus GEMINI_FAST_MAX_PROMPT_TOKENS jetons ;
+    - au plus GEMINI_FAST_MAX_WORDS mots à choisir ;
+    - niveau dans GEMINI_FAST_LEVELS (C1 / C2 : mots rares, modèle principal) ;
+    - modèle rapide disponible (disjoncteur fermé, ou appel d'essai possible) ;
+    - modèle rapide pas plus lent que le principal (latence p50 récente jusqu'au premier
+      élément, resilience.LatencyTracker) ; sinon un appel sur _PROBE_EVERY y va quand
+      même (raison « probe ») pour que sa latence reste à jour.
+Sinon : GEMINI_MODEL, sans réglage particulier. GEMINI_FAST_MODEL vide : pas de routage.
+
+Chaque décision est comptée par (modèle, raison) — GET /utils/gemini — et le modèle
+retenu est enregistré avec la consommation de l'appel (llm_usage_daily.model).
+"""
+import logging
+from collections import Counter
+
+import config
+from resilience import get_gemini_upstream
+
+logger = logging.getLogger("chapterprep.routing")
+
+_PROBE_EVERY = 20
+
+_decisions: Counter[tuple[str, str]] = Counter()
+_slower_count = 0
+
+
+class Route:
+    """Modèle d'un appel et réglages ajoutés à son generationConfig."""
+
+    def __init__(self, model: str, reason: str, generation_config: dict | None = None):
+        self.model = model
+        self.reason = reason
+        self.generation_config = generation_config or {}
+
+
+def _fast_route(reason: str) -> Route:
+    generation_config = {}
+    if config.GEMINI_FAST_THINKING_BUDGET >= 0:
+        generation_config["thinkingConfig"] = {"thinkingBudget": config.GEMINI_FAST_THINKING_BUDGET}
+    return Route(config.GEMINI_FAST_MODEL, reason, generation_config)
+
+
+def _fast_is_slower() -> bool:
+    """Latences p50 récentes des deux modèles (None tant qu'il y a trop peu de mesures)."""
+    fast_p50 = get_gemini_upstream(config.GEMINI_FAST_MODEL).latencies.percentile(50)
+    main_p50 = get_gemini_upstream(config.GEMINI_MODEL).latencies.percentile(50)
+    return fast_p50 is not None and main_p50 is not None and fast_p50 >= main_p50
+
+
+def _reason(estimated_prompt_tokens: int, word_count: int, level: str) -> str | None:
+    """Raison d'écarter le modèle rapide (None : modèle rapide)."""
+    if not config.GEMINI_FAST_MODEL or config.GEMINI_FAST_MODEL == config.GEMINI_MODEL:
+        return "disabled"
+    if level not in config.GEMINI_FAST_LEVELS:
+        return "level"
+    if word_count > config.GEMINI_FAST_MAX_WORDS:
+        return "words"
+    if estimated_prompt_tokens > config.GEMINI_FAST_MAX_PROMPT_TOKENS:
+        return "input_size"
+    if not get_gemini_upstream(config.GEMINI_FAST_MODEL).breaker.is_available():
+        return "fast_unavailable"
+    if _fast_is_slower():
+        return "fast_slower"
+    return None
+
+
+def choose_route(estimated_prompt_tokens: int, word_count: int, level: str) -> Route:
+    """Modèle et réglages d'un appel Gemini (décision comptée)."""
+    global _slower_count
+    reason = _reason(estimated_prompt_tokens, word_count, level)
+    if reason is None:
+        route = _fast_route("small")
+    elif reason == "fast_slower" and (_slower_count := _slower_count + 1) % _PROBE_EVERY == 0:
+        route = _fast_route("probe")
+    else:
+        route = Route(config.GEMINI_MODEL, reason)
+    _decisions[(route.model, route.reason)] += 1
+    logger.debug(
+        "Routage : %s (%s) — %d jetons de prompt estimés, %d mots, niveau %s",
+        route.model, route.reason, estimated_prompt_tokens, word_count, level,
+    )
+    return route
+
+
+def get_routing_stats() -> dict:
+    """Décisions de ce processus : {modèle: {raison: nombre}}."""
+    stats: dict[str, dict[str, int]] = {}
+    for (model, reason), count in sorted(_decisions.items()):
+        stats.setdefault(model, {})[reason] = count
+    return stats
@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import Generic, Optional, TypeVar
 
 from pydantic import BaseModel, EmailStr, field_validator
 
+T = TypeVar("T")
+
 
 # ── Inscription ──────────────────────────────────────────────
 class RegisterRequest(BaseModel):
@@ -66,6 +68,13 @@ class TokenData(BaseModel):
     username: str
 
 
+# ── Pagination (keyset) ──────────────────────────────────────
+class Page(BaseModel, Generic[T]):
+    """Une page de résultats. next_cursor est opaque ; None sur la dernière page."""
+    items:       list[T]
+    next_cursor: Optional[str] = None
+
+
 # ── Livres ───────────────────────────────────────────────────
 _ALLOWED_LANGUAGES = {"fr", "en", "es", "de", "it"}
 
@@ -133,6 +142,8 @@ class BookResponse(BaseModel):
 
 _ALLOWED_LEVELS = {"A1", "A2", "B1", "B2", "C1", "C2"}
 _ALLOWED_TRANSLATION_MODES = {"translation", "definition"}
+# None : EXTRACTION_ENGINE. "local" : extraction hors ligne, sans traduction (voir vocabulary_service).
+_ALLOWED_ENGINES = {"gemini", "local"}
 
 
 class ChapterCreateRequest(BaseModel):
@@ -141,6 +152,7 @@ class ChapterCreateRequest(BaseModel):
     words_to_extract: int           # nombre de mots que Gemini doit extraire (1–50)
     level:            str           # A1 à C2
     translation_mode: str           # "translation" ou "definition"
+    engine:           Optional[str] = None   # "gemini" ou "local" (défaut : EXTRACTION_ENGINE)
 
     @field_validator("text")
     @classmethod
@@ -178,11 +190,19 @@ class ChapterCreateRequest(BaseModel):
             raise ValueError(f"Mode invalide. Valeurs acceptées : {sorted(_ALLOWED_TRANSLATION_MODES)}")
         return v
 
+    @field_validator("engine")
+    @classmethod
+    def engine_valid(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in _ALLOWED_ENGINES:
+            raise ValueError(f"Moteur invalide. Valeurs acceptées : {sorted(_ALLOWED_ENGINES)}")
+        return v
+
 
 class ChapterExtractRequest(BaseModel):
     words_to_extract: int
     level:            str
     translation_mode: str
+    engine:           Optional[str] = None
 
     @field_validator("words_to_extract")
     @classmethod
@@ -205,6 +225,13 @@ class ChapterExtractRequest(BaseModel):
             raise ValueError(f"Mode invalide. Valeurs acceptées : {sorted(_ALLOWED_TRANSLATION_MODES)}")
         return v
 
+    @field_validator("engine")
+    @classmethod
+    def engine_valid(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in _ALLOWED_ENGINES:
+            raise ValueError(f"Moteur invalide. Valeurs acceptées : {sorted(_ALLOWED_ENGINES)}")
+        return v
+
 
 class ChapterResponse(BaseModel):
     id:               int
@@ -219,6 +246,32 @@ class ChapterResponse(BaseModel):
     created_at:       str
 
 
+class ChapterSummaryResponse(BaseModel):
+    """Élément de GET /books/{book_id}/chapters : tout sauf le texte du chapitre."""
+    id:               int
+    user_id:          int
+    book_id:          int
+    chapter_number:   int
+    title:            str
+    level:            str
+    translation_mode: str
+    status:           str
+    word_count:       int
+    vocabulary_count: int
+    created_at:       str
+
+
+class SearchHitResponse(BaseModel):
+    """Élément de GET /search : chapitre trouvé, extrait HTML (termes dans <mark>, reste échappé)."""
+    book_id:        int
+    book_title:     str
+    chapter_id:     int
+    chapter_number: int
+    chapter_title:  str
+    snippet:        str
+    score:          float
+
+
 class ChapterTitleUpdateRequest(BaseModel):
     title: str
 
@@ -240,10 +293,56 @@ class WordItem(BaseModel):
     output:    str
 
 
-class ExtractionResponse(BaseModel):
-    """Réponse du endpoint POST /books/{book_id}/chapters : chapitre créé + mots suggérés."""
+class JobResponse(BaseModel):
+    """État d'une tâche d'extraction (GET /jobs/{job_id})."""
+    id:          int
+    status:      str                    # queued | running | done | failed
+    engine:      str                    # gemini | local
+    book_id:     int
+    chapter_id:  Optional[int]          # None si le chapitre a été supprimé
+    words:       Optional[list[WordItem]] = None   # "done" : tous les mots ; "running" : mots déjà reçus
+    error:       Optional[str] = None              # si status == "failed"
+    created_at:  str
+    finished_at: Optional[str] = None
+
+
+class ExtractionJobAcceptedResponse(BaseModel):
+    """Réponse 202 des routes d'extraction : chapitre + tâche à suivre (GET /jobs/{id})."""
     chapter: ChapterResponse
-    words:   list[WordItem]
+    job:     JobResponse
+
+
+class BookExtractRequest(BaseModel):
+    """Corps de POST /books/{book_id}/extract (extraction de tous les chapitres 'pending')."""
+    words_to_extract: Optional[int] = None   # None : recommandation selon la longueur de chaque chapitre
+    engine:           Optional[str] = None   # None : EXTRACTION_ENGINE
+
+    @field_validator("words_to_extract")
+    @classmethod
+    def words_to_extract_valid(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and not (1 <= v <= 50):
+            raise ValueError("Le nombre de mots doit être compris entre 1 et 50.")
+        return v
+
+    @field_validator("engine")
+    @classmethod
+    def engine_valid(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in _ALLOWED_ENGINES:
+            raise ValueError(f"Moteur invalide. Valeurs acceptées : {sorted(_ALLOWED_ENGINES)}")
+        return v
+
+
+class BookExtractionProgressResponse(BaseModel):
+    """Progression de l'extraction d'un livre (GET /books/{book_id}/extraction)."""
+    book_id:          int
+    pending_chapters: int   # chapitres sans mots confirmés, répartis ci-dessous
+    not_started:      int   # aucune tâche
+    queued:           int
+    running:          int
+    extracted:        int   # mots prêts à être confirmés
+    failed:           int   # relancer POST /books/{book_id}/extract
+    confirmed:        int   # chapitres dont les mots sont confirmés
+    jobs_created:     int = 0   # tâches créées par ce POST /books/{book_id}/extract
 
 
 class WordsConfirmRequest(BaseModel):
@@ -286,6 +385,7 @@ class TranslateRequest(BaseModel):
 
 class TranslateResponse(BaseModel):
     word:        str
+    base_form:   str   # forme de base du lexique partagé si connue, sinon le mot lui-même
     translation: str
 
 
@@ -303,3 +403,24 @@ class SingleWordAddRequest(BaseModel):
         if not v:
             raise ValueError("Ce champ ne peut pas être vide.")
         return v
+
+
+# ── Consommation Gemini (admin) ──────────────────────────────
+
+class LlmUsageReportRow(BaseModel):
+    """Ligne de GET /admin/llm-usage : un groupe (selon group_by) sur la période."""
+    group:            dict[str, str | int]   # ex. {"user_id": 3, "username": "alice"} ; {} sans group_by
+    calls:            int
+    ok:               int
+    errors:           int
+    fallbacks:        int   # Gemini en échec ou trop lent, mots du moteur local
+    retries:          int   # tentatives au-delà de la première (requêtes doublées comprises)
+    prompt_tokens:    int
+    candidate_tokens: int
+    total_tokens:     int   # dont jetons de réflexion du modèle
+    cost_usd:         float
+    latency_avg_ms:   int
+    latency_p50_ms:   int   # centiles estimés sur l'histogramme (cases ×1,4)
+    latency_p95_ms:   int
+    latency_p99_ms:   int
+
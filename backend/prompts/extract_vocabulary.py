@@ -2,6 +2,24 @@
 Prompt de construction pour l'extraction de vocabulaire via Gemini.
 """
 
+# À incrémenter à chaque changement du prompt : invalide le cache des extractions.
+PROMPT_VERSION = 1
+CANDIDATES_PROMPT_VERSION = 1
+
+# Schéma de réponse Gemini (responseSchema, GEMINI_STRUCTURED_OUTPUT) : champs de WordItem,
+# dans l'ordre de l'exemple des prompts.
+_WORD_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "word": {"type": "STRING"},
+        "base_form": {"type": "STRING"},
+        "output": {"type": "STRING"},
+    },
+    "required": ["word", "base_form", "output"],
+    "propertyOrdering": ["word", "base_form", "output"],
+}
+WORDS_RESPONSE_SCHEMA = {"type": "ARRAY", "items": _WORD_SCHEMA}
+
 _LEVEL_GUIDANCE = {
     "A1": (
         "Sélectionne des mots très courants que quelqu'un de niveau débutant absolu "
@@ -48,42 +66,43 @@ _OUTPUT_GUIDANCE = {
 }
 
 
-def build_prompt(
-    text: str,
+# Règles communes à tous les prompts (une ligne de consigne chacune).
+_WORD_RULES = """- Le champ "word" contient le mot tel qu'il apparaît dans le texte.
+- Le champ "base_form" contient la forme canonique : infinitif pour les verbes, nominatif singulier pour les noms, masculin singulier pour les adjectifs.
+- Ne sélectionne pas les noms propres (prénoms, lieux).
+- Ne sélectionne pas les mots identiques en français et dans la langue cible."""
+
+
+def _exclusion(excluded_words: list[str]) -> str:
+    return f"\n- Ne sélectionne aucun de ces mots, déjà retenus : {', '.join(excluded_words)}." if excluded_words else ""
+
+
+def _instructions(
     level: str,
     target_language: str,
     word_count: int,
     translation_mode: str,
+    source: str,
+    excluded_words: list[str],
 ) -> str:
     """
-    Construit le prompt envoyé à Gemini pour extraire du vocabulaire.
-
-    Returns:
-        str: Le prompt complet attendant un JSON uniquement en réponse.
+    CONSIGNES + format de réponse, communs aux deux prompts. `source` : où choisir les mots ;
+    `excluded_words` : mots à ne pas proposer (aucune consigne si vide).
     """
     level_guidance = _LEVEL_GUIDANCE[level]
+    exclusion = _exclusion(excluded_words)
 
     output_guidance = _OUTPUT_GUIDANCE[translation_mode].format(
         target_language=target_language,
         level=level,
     )
 
-    return f"""Tu es un expert en didactique des langues. Ton rôle est d'extraire du vocabulaire utile à apprendre depuis un texte en {target_language}.
-
-TEXTE SOURCE :
----
-{text}
----
-
-CONSIGNES :
+    return f"""CONSIGNES :
 - Niveau de l'apprenant : {level}
 - {level_guidance}
-- Sélectionne EXACTEMENT {word_count} mots ou expressions depuis le texte.
+- Sélectionne EXACTEMENT {word_count} mots ou expressions {source}.{exclusion}
 - {output_guidance}
-- Le champ "word" contient le mot tel qu'il apparaît dans le texte.
-- Le champ "base_form" contient la forme canonique : infinitif pour les verbes, nominatif singulier pour les noms, masculin singulier pour les adjectifs.
-- Ne sélectionne pas les noms propres (prénoms, lieux).
-- Ne sélectionne pas les mots identiques en français et dans la langue cible.
+{_WORD_RULES}
 - Retourne UNIQUEMENT un tableau JSON valide, sans texte avant, sans texte après, sans bloc de code markdown.
 
 FORMAT DE RÉPONSE ATTENDU (exemple) :
@@ -96,3 +115,128 @@ FORMAT DE RÉPONSE ATTENDU (exemple) :
 ]
 
 Retourne maintenant le tableau JSON pour les {word_count} mots sélectionnés."""
+
+
+def build_prompt(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    translation_mode: str,
+    excluded_words: list[str] | None = None,
+) -> str:
+    """
+    Construit le prompt envoyé à Gemini pour extraire du vocabulaire.
+    `excluded_words` : mots déjà retenus ailleurs (lexique partagé), à ne pas proposer.
+
+    Returns:
+        str: Le prompt complet attendant un JSON uniquement en réponse.
+    """
+    instructions = _instructions(
+        level, target_language, word_count, translation_mode,
+        source="depuis le texte", excluded_words=excluded_words or [],
+    )
+
+    return f"""Tu es un expert en didactique des langues. Ton rôle est d'extraire du vocabulaire utile à apprendre depuis un texte en {target_language}.
+
+TEXTE SOURCE :
+---
+{text}
+---
+
+{instructions}"""
+
+
+def build_candidates_prompt(
+    candidates: list[tuple[str, str]],
+    level: str,
+    target_language: str,
+    word_count: int,
+    translation_mode: str,
+) -> str:
+    """
+    Variante de build_prompt pour EXTRACTION_PROMPT_MODE=candidates : le texte est remplacé
+    par les candidats présélectionnés localement (candidate_service), chacun avec un extrait
+    de contexte pour lever les ambiguïtés de sens.
+    """
+    candidate_lines = "\n".join(f"{word} — « {context} »" for word, context in candidates)
+    instructions = _instructions(
+        level, target_language, word_count, translation_mode,
+        source="parmi les candidats", excluded_words=[],
+    )
+
+    return f"""Tu es un expert en didactique des langues. Ton rôle est d'extraire du vocabulaire utile à apprendre depuis un texte en {target_language}.
+
+MOTS CANDIDATS (mots du texte, les plus courants déjà retirés), chacun suivi d'un extrait du texte :
+---
+{candidate_lines}
+---
+
+{instructions}"""
+
+
+def build_pack_prompt(
+    sections: list[tuple[int, int, str | list[tuple[str, str]], list[str]]],
+    level: str,
+    target_language: str,
+    translation_mode: str,
+) -> str:
+    """
+    Prompt de l'extraction groupée : plusieurs chapitres (même niveau et mode), chacun dans
+    une section délimitée, réponse attendue en un objet JSON {id du chapitre: [mots]}.
+    Chaque section : (id du chapitre, nombre de mots, texte ou candidats (mot, contexte)
+    comme dans build_candidates_prompt, mots à ne pas proposer pour ce chapitre).
+    """
+    blocks = []
+    for chapter_id, word_count, source, excluded_words in sections:
+        if isinstance(source, str):
+            header = f"=== CHAPITRE {chapter_id} — {word_count} mots à choisir depuis le texte ==="
+            body = source
+        else:
+            header = f"=== CHAPITRE {chapter_id} — {word_count} mots à choisir parmi les candidats ==="
+            body = "\n".join(f"{word} — « {context} »" for word, context in source)
+        blocks.append(f"{header}{_exclusion(excluded_words)}\n---\n{body}\n---")
+    sections_text = "\n\n".join(blocks)
+    chapter_ids = ", ".join(f'"{chapter_id}"' for chapter_id, *_ in sections)
+
+    output_guidance = _OUTPUT_GUIDANCE[translation_mode].format(
+        target_language=target_language,
+        level=level,
+    )
+
+    return f"""Tu es un expert en didactique des langues. Ton rôle est d'extraire du vocabulaire utile à apprendre depuis plusieurs chapitres d'un texte en {target_language}, chacun séparément.
+
+{sections_text}
+
+CONSIGNES :
+- Niveau de l'apprenant : {level}
+- {_LEVEL_GUIDANCE[level]}
+- Pour chaque chapitre, sélectionne EXACTEMENT le nombre de mots ou expressions indiqué dans son en-tête, uniquement depuis sa section (texte ou candidats), en respectant ses exclusions.
+- Ne retiens pas un même mot dans deux chapitres.
+- {output_guidance}
+{_WORD_RULES}
+- Retourne UNIQUEMENT un objet JSON valide, sans texte avant, sans texte après, sans bloc de code markdown.
+
+FORMAT DE RÉPONSE ATTENDU (exemple) : une clé par chapitre (son numéro), associée au tableau de ses mots.
+{{
+  "12": [
+    {{
+      "word": "la forme du mot dans le texte",
+      "base_form": "forme canonique",
+      "output": "traduction ou définition"
+    }}
+  ]
+}}
+
+Retourne maintenant l'objet JSON avec les clés {chapter_ids}."""
+
+
+def pack_response_schema(chapter_ids: list[int]) -> dict:
+    """Schéma de réponse de build_pack_prompt : un tableau de mots par id de chapitre."""
+    keys = [str(chapter_id) for chapter_id in chapter_ids]
+    return {
+        "type": "OBJECT",
+        "properties": {key: WORDS_RESPONSE_SCHEMA for key in keys},
+        "required": keys,
+        "propertyOrdering": keys,
+    }
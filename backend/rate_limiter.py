@@ -0,0 +1,81 @@
+"""
+Limitation du débit des appels Gemini (seaux à jetons, par processus).
+
+Deux seaux : GEMINI_REQUESTS_PER_MINUTE (un jeton par appel) et GEMINI_TOKENS_PER_MINUTE
+(jetons du modèle : estimation avant l'appel, corrigée ensuite avec usageMetadata).
+Un appel attend que les deux seaux aient de quoi le servir : une extraction de livre
+entier (une tâche par chapitre, EXTRACTION_WORKERS en parallèle) reste dans le quota
+de l'API au lieu de finir en 429.
+Valeur 0 = seau désactivé. Avec plusieurs workers uvicorn, chaque processus a ses
+propres seaux : diviser les quotas en conséquence.
+"""
+import asyncio
+import time
+
+import config
+
+
+class TokenBucket:
+    """
+    Seau de `per_minute` jetons, rempli en continu (per_minute / 60 par seconde).
+    Les appels à `acquire` sont servis dans l'ordre d'arrivée (verrou tenu pendant l'attente).
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Attend que `amount` jetons soient disponibles puis les retire (plafonné à la capacité)."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= amount
+
+    def adjust(self, delta: float) -> None:
+        """Retire `delta` jetons (rend si négatif) : écart entre l'estimation et la consommation réelle."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class GeminiRateLimiter:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    async def reserve(self, estimated_tokens: int) -> None:
+        """Attend la place pour un appel d'environ `estimated_tokens` jetons."""
+        if self._requests is not None:
+            await self._requests.acquire(1)
+        if self._tokens is not None:
+            await self._tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, used_tokens: int) -> None:
+        """Corrige le seau de jetons avec la consommation réelle de l'appel."""
+        if self._tokens is not None:
+            self._tokens.adjust(used_tokens - estimated_tokens)
+
+
+_gemini_limiter: GeminiRateLimiter | None = None
+
+
+def get_gemini_limiter() -> GeminiRateLimiter:
+    """Limiteur partagé par tous les appels Gemini du processus (créé à la demande)."""
+    global _gemini_limiter
+    if _gemini_limiter is None:
+        _gemini_limiter = GeminiRateLimiter(
+            config.GEMINI_REQUESTS_PER_MINUTE,
+            config.GEMINI_TOKENS_PER_MINUTE,
+        )
+    return _gemini_limiter
@@ -0,0 +1,47 @@
+"""
+API asynchrone des repositories : mêmes fonctions, mêmes signatures, exécutées
+dans l'executor SQLite dédié (database.run_in_db_executor).
+À utiliser depuis le code async pour que la boucle d'événements ne bloque jamais sur SQLite.
+
+    from repositories.aio import chapter_repository
+    row = await chapter_repository.get_chapter_for_user(chapter_id, book_id, user_id)
+"""
+import functools
+import inspect
+from types import ModuleType, SimpleNamespace
+
+from database import run_in_db_executor
+from repositories import book_repository as _book_repository
+from repositories import chapter_repository as _chapter_repository
+from repositories import extraction_cache_repository as _extraction_cache_repository
+from repositories import job_repository as _job_repository
+from repositories import lexicon_repository as _lexicon_repository
+from repositories import usage_repository as _usage_repository
+from repositories import user_repository as _user_repository
+from repositories import word_repository as _word_repository
+
+
+def _to_async(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_executor(fn, *args, **kwargs)
+    return wrapper
+
+
+def _async_repository(module: ModuleType) -> SimpleNamespace:
+    """Enveloppe chaque fonction publique définie dans le module (pas celles qu'il importe)."""
+    return SimpleNamespace(**{
+        name: _to_async(fn)
+        for name, fn in inspect.getmembers(module, inspect.isfunction)
+        if not name.startswith("_") and fn.__module__ == module.__name__
+    })
+
+
+book_repository = _async_repository(_book_repository)
+chapter_repository = _async_repository(_chapter_repository)
+extraction_cache_repository = _async_repository(_extraction_cache_repository)
+job_repository = _async_repository(_job_repository)
+lexicon_repository = _async_repository(_lexicon_repository)
+usage_repository = _async_repository(_usage_repository)
+user_repository = _async_repository(_user_repository)
+word_repository = _async_repository(_word_repository)
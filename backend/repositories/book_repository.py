@@ -3,20 +3,35 @@ Toutes les requêtes SQL liées aux livres.
 Aucune logique métier : lecture / écriture en base uniquement.
 """
 import sqlite3
-from database import get_connection
+from database import get_connection, release_connection
 
 
 # ─── Lecture ─────────────────────────────────────────────────
 
-def get_books_by_user(user_id: int) -> list[sqlite3.Row]:
+def get_books_by_user(
+    user_id: int,
+    limit: int | None = None,
+    after: tuple[str, int] | None = None,
+) -> list[sqlite3.Row]:
+    """
+    Livres du plus récent au plus ancien, triés par (created_at, id).
+    `after` = clé (created_at, id) de la dernière ligne de la page précédente (keyset).
+    """
+    query = "SELECT * FROM books WHERE user_id = ?"
+    params: list = [user_id]
+    if after is not None:
+        query += " AND (created_at, id) < (?, ?)"
+        params.extend(after)
+    query += " ORDER BY created_at DESC, id DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
     conn = get_connection()
     try:
-        return conn.execute(
-            "SELECT * FROM books WHERE user_id = ? ORDER BY created_at DESC",
-            (user_id,),
-        ).fetchall()
+        return conn.execute(query, params).fetchall()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 def get_book_by_id(book_id: int) -> sqlite3.Row | None:
@@ -26,7 +41,7 @@ def get_book_by_id(book_id: int) -> sqlite3.Row | None:
             "SELECT * FROM books WHERE id = ?", (book_id,)
         ).fetchone()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 # ─── Suppression ────────────────────────────────────────────
@@ -37,7 +52,7 @@ def delete_book(book_id: int) -> None:
         with conn:
             conn.execute("DELETE FROM books WHERE id = ?", (book_id,))
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 # ─── Écriture ─────────────────────────────────────────────────
@@ -53,4 +68,45 @@ def create_book(user_id: int, title: str, author: str | None, language: str) ->
             )
             return cursor.lastrowid
     finally:
-        conn.close()
+        release_connection(conn)
+
+
+def create_book_with_chapters(
+    user_id: int,
+    title: str,
+    author: str | None,
+    language: str,
+    chapters: list[dict],
+    level: str,
+    translation_mode: str,
+) -> int:
+    """
+    Insère un livre et tous ses chapitres (numérotés à partir de 1) en une seule transaction.
+    Chaque dict doit avoir : text, word_count.
+    Tout ou rien : si un chapitre échoue, le livre n'est pas créé. Retourne l'id du livre.
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO books (user_id, title, author, language) VALUES (?, ?, ?, ?)",
+                (user_id, title, author, language),
+            )
+            book_id = cursor.lastrowid
+            conn.executemany(
+                """
+                INSERT INTO chapters
+                    (user_id, book_id, chapter_number, title, text, word_count, level, translation_mode)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (
+                        user_id, book_id, number, f"Chapitre {number}",
+                        ch["text"], ch["word_count"], level, translation_mode,
+                    )
+                    for number, ch in enumerate(chapters, start=1)
+                ),
+            )
+            return book_id
+    finally:
+        release_connection(conn)
@@ -3,131 +3,255 @@ Toutes les requêtes SQL liées aux chapitres.
 Aucune logique métier : lecture / écriture en base uniquement.
 """
 import sqlite3
-from database import get_connection
+from database import get_connection, release_connection
 
 
 # ─── Écriture ────────────────────────────────────────────────
+# Les écritures sur un chapitre existant filtrent par id, book_id ET user_id :
+# vérification d'ownership et écriture en une seule requête.
 
 def create_chapter(
     user_id: int,
     book_id: int,
     chapter_number: int,
     text: str,
+    word_count: int,
     level: str,
     translation_mode: str,
-) -> int:
-    """Insère un nouveau chapitre et retourne son id."""
+) -> sqlite3.Row:
+    """Insère un nouveau chapitre et retourne la ligne créée."""
     chapter_title = f"Chapitre {chapter_number}"
     conn = get_connection()
     try:
         with conn:
-            cursor = conn.execute(
+            return conn.execute(
                 """
                 INSERT INTO chapters
-                    (user_id, book_id, chapter_number, title, text, level, translation_mode)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                    (user_id, book_id, chapter_number, title, text, word_count, level, translation_mode)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING *
                 """,
-                (user_id, book_id, chapter_number, chapter_title, text, level, translation_mode),
-            )
-            return cursor.lastrowid
+                (user_id, book_id, chapter_number, chapter_title, text, word_count, level, translation_mode),
+            ).fetchone()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def update_chapter_status(chapter_id: int, status: str) -> None:
-    """Met à jour le statut d'un chapitre (pending/done)."""
+def update_chapter_learning_settings(
+    chapter_id: int,
+    book_id: int,
+    user_id: int,
+    level: str,
+    translation_mode: str,
+) -> sqlite3.Row | None:
+    """Retourne la ligne mise à jour, ou None si le chapitre n'appartient pas à ce livre / cet utilisateur."""
     conn = get_connection()
     try:
         with conn:
-            conn.execute(
-                "UPDATE chapters SET status = ? WHERE id = ?",
-                (status, chapter_id),
-            )
+            return conn.execute(
+                """
+                UPDATE chapters
+                SET level = ?, translation_mode = ?
+                WHERE id = ? AND book_id = ? AND user_id = ?
+                RETURNING *
+                """,
+                (level, translation_mode, chapter_id, book_id, user_id),
+            ).fetchone()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def update_chapter_learning_settings(
+def update_chapter_title(
     chapter_id: int,
-    level: str,
-    translation_mode: str,
-) -> None:
+    book_id: int,
+    user_id: int,
+    title: str,
+) -> sqlite3.Row | None:
+    """Retourne la ligne mise à jour, ou None si le chapitre n'appartient pas à ce livre / cet utilisateur."""
     conn = get_connection()
     try:
         with conn:
-            conn.execute(
+            return conn.execute(
                 """
                 UPDATE chapters
-                SET level = ?, translation_mode = ?
-                WHERE id = ?
+                SET title = ?
+                WHERE id = ? AND book_id = ? AND user_id = ?
+                RETURNING *
                 """,
-                (level, translation_mode, chapter_id),
-            )
+                (title, chapter_id, book_id, user_id),
+            ).fetchone()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def update_chapter_title(chapter_id: int, title: str) -> None:
+def delete_chapter(chapter_id: int, book_id: int, user_id: int) -> bool:
+    """Supprime le chapitre s'il appartient à ce livre et à cet utilisateur. Retourne True si supprimé."""
     conn = get_connection()
     try:
         with conn:
-            conn.execute(
-                "UPDATE chapters SET title = ? WHERE id = ?",
-                (title, chapter_id),
+            cursor = conn.execute(
+                "DELETE FROM chapters WHERE id = ? AND book_id = ? AND user_id = ?",
+                (chapter_id, book_id, user_id),
             )
+            return cursor.rowcount > 0
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 # ─── Lecture ─────────────────────────────────────────────────
 
-def get_chapter_by_id(chapter_id: int) -> sqlite3.Row | None:
+def get_chapter_for_user(chapter_id: int, book_id: int, user_id: int) -> sqlite3.Row | None:
+    """Retourne le chapitre, ou None s'il n'existe pas ou n'appartient pas à ce livre / cet utilisateur."""
     conn = get_connection()
     try:
         return conn.execute(
-            "SELECT * FROM chapters WHERE id = ?", (chapter_id,)
+            "SELECT * FROM chapters WHERE id = ? AND book_id = ? AND user_id = ?",
+            (chapter_id, book_id, user_id),
         ).fetchone()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def get_chapters_by_book_and_user(book_id: int, user_id: int) -> list[sqlite3.Row]:
+def chapter_exists_for_user(chapter_id: int, book_id: int, user_id: int) -> bool:
+    """Vérification d'ownership seule : ne lit pas la ligne (ni le texte)."""
     conn = get_connection()
     try:
-        return conn.execute(
-            """
-            SELECT *
-            FROM chapters
-            WHERE book_id = ? AND user_id = ?
-            ORDER BY chapter_number ASC, created_at ASC
-            """,
-            (book_id, user_id),
-        ).fetchall()
+        row = conn.execute(
+            "SELECT 1 FROM chapters WHERE id = ? AND book_id = ? AND user_id = ?",
+            (chapter_id, book_id, user_id),
+        ).fetchone()
+        return row is not None
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def delete_chapter(chapter_id: int) -> None:
+def get_chapters_by_book_and_user(
+    book_id: int,
+    user_id: int,
+    limit: int | None = None,
+    after: tuple[int, int] | None = None,
+) -> list[sqlite3.Row]:
+    """
+    Résumé des chapitres d'un livre, sans la colonne text, triés par (chapter_number, id).
+    `after` = clé (chapter_number, id) de la dernière ligne de la page précédente (keyset).
+    Servi entièrement par idx_chapters_book_user_keyset (+ un comptage
+    couvrant sur words par chapitre).
+    """
+    query = """
+        SELECT
+            c.id, c.user_id, c.book_id, c.chapter_number, c.title,
+            c.level, c.translation_mode, c.status, c.word_count, c.created_at,
+            (
+                SELECT COUNT(*)
+                FROM words w
+                WHERE w.chapter_id = c.id AND w.user_id = c.user_id
+            ) AS vocabulary_count
+        FROM chapters c
+        WHERE c.book_id = ? AND c.user_id = ?
+    """
+    params: list = [book_id, user_id]
+    if after is not None:
+        query += " AND (c.chapter_number, c.id) > (?, ?)"
+        params.extend(after)
+    query += " ORDER BY c.chapter_number ASC, c.id ASC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
     conn = get_connection()
     try:
-        with conn:
-            conn.execute("DELETE FROM chapters WHERE id = ?", (chapter_id,))
+        return conn.execute(query, params).fetchall()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def get_chapter_with_language(chapter_id: int) -> sqlite3.Row | None:
-    """Retourne le chapitre + la langue du livre associé via JOIN."""
+def get_pending_chapters_for_extraction(book_id: int, user_id: int) -> list[sqlite3.Row]:
+    """
+    Chapitres 'pending' d'un livre, réglages d'extraction seulement (ni le texte, ni les mots),
+    triés par (chapter_number, id). Servi entièrement par idx_chapters_book_user_keyset.
+    """
     conn = get_connection()
     try:
         return conn.execute(
             """
-            SELECT chapters.*, books.language
+            SELECT id, chapter_number, word_count, level, translation_mode
+            FROM chapters
+            WHERE book_id = ? AND user_id = ? AND status = 'pending'
+            ORDER BY chapter_number ASC, id ASC
+            """,
+            (book_id, user_id),
+        ).fetchall()
+    finally:
+        release_connection(conn)
+
+
+def get_chapter_language(chapter_id: int, user_id: int) -> str | None:
+    """Langue du livre du chapitre via JOIN, ou None si le chapitre n'appartient pas à l'utilisateur."""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            """
+            SELECT books.language
             FROM chapters
             JOIN books ON chapters.book_id = books.id
-            WHERE chapters.id = ?
+            WHERE chapters.id = ? AND chapters.user_id = ?
             """,
-            (chapter_id,),
+            (chapter_id, user_id),
         ).fetchone()
+        return row["language"] if row else None
+    finally:
+        release_connection(conn)
+
+
+# ─── Recherche plein texte ───────────────────────────────────
+
+def search_chapters(
+    user_id: int,
+    match: str,
+    limit: int,
+    book_id: int | None = None,
+    highlight: tuple[str, str] = ("[", "]"),
+) -> list[sqlite3.Row]:
+    """
+    Chapitres de l'utilisateur correspondant à `match` (syntaxe FTS5, déjà échappée),
+    classés par pertinence bm25 (le titre pèse plus que le texte).
+    `highlight` = marqueurs posés autour des termes trouvés dans l'extrait.
+    Le MATCH est restreint à l'utilisateur dans l'index (`user_id : …`, colonne sans
+    poids dans bm25) : classement et LIMIT ne parcourent que ses chapitres.
+    L'extrait n'est calculé que pour les `limit` meilleurs résultats (CTE hits),
+    pas pour chaque chapitre correspondant.
+    """
+    # user_id est un int : inséré tel quel dans l'expression FTS5.
+    match = f"user_id : {int(user_id)} AND {{title text}} : ({match})"
+    hits_query = """
+        SELECT chapters_fts.rowid AS id, bm25(chapters_fts, 5.0, 1.0, 0.0) AS score
+        FROM chapters_fts
+    """
+    params: list = []
+    if book_id is not None:
+        hits_query += " JOIN chapters c ON c.id = chapters_fts.rowid AND c.book_id = ?"
+        params.append(book_id)
+    hits_query += " WHERE chapters_fts MATCH ? ORDER BY score ASC, id ASC LIMIT ?"
+    params.extend([match, limit])
+
+    query = f"""
+        WITH hits AS ({hits_query})
+        SELECT
+            c.id AS chapter_id, c.book_id, c.chapter_number, c.title AS chapter_title,
+            b.title AS book_title,
+            snippet(chapters_fts, 1, ?, ?, '…', 16) AS snippet,
+            hits.score
+        FROM hits
+        JOIN chapters_fts ON chapters_fts.rowid = hits.id
+        JOIN chapters c ON c.id = hits.id
+        JOIN books b ON b.id = c.book_id
+        WHERE chapters_fts MATCH ?
+        ORDER BY hits.score ASC, hits.id ASC
+    """
+    params.extend([highlight[0], highlight[1], match])
+
+    conn = get_connection()
+    try:
+        return conn.execute(query, params).fetchall()
     finally:
-        conn.close()
+        release_connection(conn)
@@ -0,0 +1,142 @@
+"""
+Toutes les requêtes SQL du cache des extractions Gemini.
+Aucune logique métier : lecture / écriture en base uniquement.
+"""
+import sqlite3
+from database import get_connection, release_connection
+
+# Horodatage à la milliseconde : départage les entrées servies dans la même seconde (LRU).
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+# ─── Lecture ─────────────────────────────────────────────────
+
+def get_cached_extraction(cache_key: str, touch_after_minutes: float) -> sqlite3.Row | None:
+    """
+    Entrée en cache (None si absente) : `words` (JSON des mots) et `stale`, vrai si
+    last_used_at date de plus de `touch_after_minutes` (voir touch_extraction).
+    Lecture seule : ni verrou d'écriture ni compteur à chaque lookup.
+    """
+    conn = get_connection()
+    try:
+        return conn.execute(
+            """
+            SELECT words, last_used_at < strftime('%Y-%m-%d %H:%M:%f', 'now', ?) AS stale
+            FROM extraction_cache
+            WHERE cache_key = ?
+            """,
+            (f"-{touch_after_minutes} minutes", cache_key),
+        ).fetchone()
+    finally:
+        release_connection(conn)
+
+
+def get_extraction_cache_stats() -> sqlite3.Row:
+    """Compteurs hits / misses / evictions, taille totale et nombre d'entrées."""
+    conn = get_connection()
+    try:
+        return conn.execute(
+            """
+            SELECT hits, misses, evictions, total_bytes,
+                   (SELECT COUNT(*) FROM extraction_cache) AS entries
+            FROM extraction_cache_stats
+            WHERE id = 1
+            """
+        ).fetchone()
+    finally:
+        release_connection(conn)
+
+
+# ─── Écriture ────────────────────────────────────────────────
+
+def touch_extraction(cache_key: str) -> None:
+    """Marque l'entrée comme récemment utilisée (LRU) ; appelé seulement si elle est `stale`."""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                f"UPDATE extraction_cache SET last_used_at = {_NOW} WHERE cache_key = ?",
+                (cache_key,),
+            )
+    finally:
+        release_connection(conn)
+
+
+def add_extraction_cache_counts(hits_by_key: dict[str, int], misses: int) -> None:
+    """Ajoute en une transaction les hits (par entrée et au total) et les misses d'un lot."""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.executemany(
+                "UPDATE extraction_cache SET hit_count = hit_count + ? WHERE cache_key = ?",
+                ((n, key) for key, n in hits_by_key.items()),
+            )
+            conn.execute(
+                "UPDATE extraction_cache_stats SET hits = hits + ?, misses = misses + ? WHERE id = 1",
+                (sum(hits_by_key.values()), misses),
+            )
+    finally:
+        release_connection(conn)
+
+
+def store_extraction(cache_key: str, words: str, max_bytes: int) -> int:
+    """
+    Enregistre (ou remplace) une extraction, puis évince les entrées les moins
+    récemment utilisées tant que le cache dépasse `max_bytes`.
+    Retourne le nombre d'entrées évincées.
+    """
+    size_bytes = len(words.encode("utf-8"))
+    conn = get_connection()
+    try:
+        with conn:
+            replaced = conn.execute(
+                "DELETE FROM extraction_cache WHERE cache_key = ? RETURNING size_bytes",
+                (cache_key,),
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO extraction_cache (cache_key, words, size_bytes) VALUES (?, ?, ?)",
+                (cache_key, words, size_bytes),
+            )
+            total_bytes = conn.execute(
+                """
+                UPDATE extraction_cache_stats
+                SET total_bytes = total_bytes + ? - ?
+                WHERE id = 1
+                RETURNING total_bytes
+                """,
+                (size_bytes, replaced["size_bytes"] if replaced else 0),
+            ).fetchone()["total_bytes"]
+            if total_bytes <= max_bytes:
+                return 0
+
+            # Parcours par idx_extraction_cache_last_used, du plus ancien au plus récent.
+            victims: list[str] = []
+            freed = 0
+            for row in conn.execute(
+                """
+                SELECT cache_key, size_bytes FROM extraction_cache
+                WHERE cache_key != ?
+                ORDER BY last_used_at ASC
+                """,
+                (cache_key,),
+            ):
+                if total_bytes - freed <= max_bytes:
+                    break
+                victims.append(row["cache_key"])
+                freed += row["size_bytes"]
+
+            conn.executemany(
+                "DELETE FROM extraction_cache WHERE cache_key = ?",
+                ((key,) for key in victims),
+            )
+            conn.execute(
+                """
+                UPDATE extraction_cache_stats
+                SET total_bytes = total_bytes - ?, evictions = evictions + ?
+                WHERE id = 1
+                """,
+                (freed, len(victims)),
+            )
+            return len(victims)
+    finally:
+        release_connection(conn)
@@ -0,0 +1,312 @@
+"""
+Toutes les requêtes SQL liées aux tâches d'extraction (table extraction_jobs).
+Aucune logique métier : lecture / écriture en base uniquement.
+"""
+import sqlite3
+from database import get_connection, release_connection
+
+
+# ─── Écriture ────────────────────────────────────────────────
+
+def create_job(
+    user_id: int,
+    book_id: int,
+    chapter_id: int,
+    target_language: str,
+    level: str,
+    translation_mode: str,
+    words_to_extract: int,
+    engine: str,
+    delete_chapter_on_failure: bool,
+) -> sqlite3.Row:
+    """Insère une tâche en attente (status 'queued') et retourne la ligne créée."""
+    conn = get_connection()
+    try:
+        with conn:
+            return conn.execute(
+                """
+                INSERT INTO extraction_jobs
+                    (user_id, book_id, chapter_id, target_language, level,
+                     translation_mode, words_to_extract, engine, delete_chapter_on_failure)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING *
+                """,
+                (
+                    user_id, book_id, chapter_id, target_language, level,
+                    translation_mode, words_to_extract, engine, int(delete_chapter_on_failure),
+                ),
+            ).fetchone()
+    finally:
+        release_connection(conn)
+
+
+def create_book_jobs(
+    user_id: int,
+    book_id: int,
+    target_language: str,
+    chapters: list[tuple[int, str, str, int]],
+    engine: str,
+    priority: int,
+) -> int:
+    """
+    Insère en une transaction une tâche par chapitre de `chapters`
+    (chapter_id, level, translation_mode, words_to_extract).
+    Un chapitre est ignoré s'il a déjà une tâche en file / en cours, ou une tâche 'done'
+    avec les mêmes réglages : relancer l'extraction d'un livre reprend là où elle s'était
+    arrêtée sans refaire les chapitres déjà extraits.
+    Retourne le nombre de tâches créées.
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            cursor = conn.executemany(
+                """
+                INSERT INTO extraction_jobs
+                    (user_id, book_id, chapter_id, target_language, level,
+                     translation_mode, words_to_extract, engine, priority)
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM extraction_jobs
+                    WHERE chapter_id = ?
+                      AND (
+                          status IN ('queued', 'running')
+                          OR (status = 'done' AND target_language = ? AND level = ?
+                              AND translation_mode = ? AND words_to_extract = ? AND engine = ?)
+                      )
+                )
+                """,
+                (
+                    (
+                        user_id, book_id, chapter_id, target_language, level,
+                        translation_mode, words_to_extract, engine, priority,
+                        chapter_id, target_language, level, translation_mode, words_to_extract, engine,
+                    )
+                    for chapter_id, level, translation_mode, words_to_extract in chapters
+                ),
+            )
+            return cursor.rowcount
+    finally:
+        release_connection(conn)
+
+
+def claim_next_job(lease_seconds: int, max_attempts: int) -> sqlite3.Row | None:
+    """
+    Prend la tâche disponible de plus petite priorité (0 = extraction d'un chapitre,
+    1 = extraction d'un livre entier), la plus ancienne d'abord, et la passe en 'running'
+    avec un bail de `lease_seconds`. Disponible = 'queued', ou 'running' dont le bail a expiré (worker
+    arrêté en cours de route). Une tâche qui a déjà épuisé `max_attempts` est passée
+    en 'failed' au lieu d'être reprise.
+    Une seule instruction UPDATE : deux workers ne peuvent pas prendre la même tâche.
+    `status IN ('queued', 'running')` écrit tel quel : condition de idx_extraction_jobs_pending.
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                """
+                UPDATE extraction_jobs
+                SET status = 'failed',
+                    error = 'Extraction interrompue trop de fois.',
+                    finished_at = datetime('now'),
+                    lease_expires_at = NULL
+                WHERE status IN ('queued', 'running')
+                  AND status = 'running'
+                  AND lease_expires_at < datetime('now')
+                  AND attempts >= ?
+                """,
+                (max_attempts,),
+            )
+            return conn.execute(
+                """
+                UPDATE extraction_jobs
+                SET status = 'running',
+                    attempts = attempts + 1,
+                    result = NULL,
+                    started_at = datetime('now'),
+                    lease_expires_at = datetime('now', '+' || ? || ' seconds')
+                WHERE id = (
+                    SELECT id FROM extraction_jobs
+                    WHERE status IN ('queued', 'running')
+                      AND (status = 'queued' OR lease_expires_at < datetime('now'))
+                    ORDER BY priority ASC, id ASC
+                    LIMIT 1
+                )
+                RETURNING *
+                """,
+                (lease_seconds,),
+            ).fetchone()
+    finally:
+        release_connection(conn)
+
+
+def claim_pack_jobs(job: sqlite3.Row, max_jobs: int, max_words: int, lease_seconds: int) -> list[sqlite3.Row]:
+    """
+    Prend, en plus de `job` (déjà 'running'), jusqu'à `max_jobs` tâches 'queued' à extraire
+    avec lui en un seul appel : même livre, utilisateur, moteur, priorité, langue, niveau et
+    mode, les plus anciennes d'abord, tant que leurs chapitres et celui de `job` font au plus
+    `max_words` mots en tout. Passées en 'running' comme claim_next_job, triées par id.
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            rows = conn.execute(
+                """
+                UPDATE extraction_jobs
+                SET status = 'running',
+                    attempts = attempts + 1,
+                    result = NULL,
+                    started_at = datetime('now'),
+                    lease_expires_at = datetime('now', '+' || ? || ' seconds')
+                WHERE status IN ('queued', 'running')
+                  AND status = 'queued'
+                  AND id IN (
+                    SELECT id FROM (
+                        SELECT j.id, SUM(c.word_count) OVER (ORDER BY j.id) AS pack_words
+                        FROM extraction_jobs j
+                        JOIN chapters c ON c.id = j.chapter_id
+                        WHERE j.status IN ('queued', 'running')
+                          AND j.status = 'queued'
+                          AND j.priority = ?
+                          AND j.book_id = ? AND j.user_id = ? AND j.engine = ?
+                          AND j.target_language = ? AND j.level = ? AND j.translation_mode = ?
+                        ORDER BY j.id
+                        LIMIT ?
+                    )
+                    WHERE pack_words <= ? - (SELECT word_count FROM chapters WHERE id = ?)
+                  )
+                RETURNING *
+                """,
+                (
+                    lease_seconds,
+                    job["priority"],
+                    job["book_id"], job["user_id"], job["engine"],
+                    job["target_language"], job["level"], job["translation_mode"],
+                    max_jobs,
+                    max_words, job["chapter_id"],
+                ),
+            ).fetchall()
+            return sorted(rows, key=lambda row: row["id"])
+    finally:
+        release_connection(conn)
+
+
+# Écritures d'un worker : `attempt` = `attempts` de la ligne qu'il a prise (claim_next_job,
+# claim_pack_jobs). Bail expiré et tâche reprise par un autre worker (attempts + 1) : l'ancien
+# propriétaire n'écrit plus rien. Retour : False si la tâche ne lui appartient plus.
+
+def renew_lease(job_id: int, attempt: int, lease_seconds: int) -> bool:
+    """Prolonge le bail d'une tâche en cours de `lease_seconds` à partir de maintenant."""
+    conn = get_connection()
+    try:
+        with conn:
+            return conn.execute(
+                """
+                UPDATE extraction_jobs
+                SET lease_expires_at = datetime('now', '+' || ? || ' seconds')
+                WHERE id = ? AND status = 'running' AND attempts = ?
+                """,
+                (lease_seconds, job_id, attempt),
+            ).rowcount == 1
+    finally:
+        release_connection(conn)
+
+
+def save_partial_result(job_id: int, attempt: int, result: str) -> bool:
+    """Enregistre les mots déjà reçus (JSON) d'une tâche en cours, lisibles par GET /jobs/{id}."""
+    conn = get_connection()
+    try:
+        with conn:
+            return conn.execute(
+                "UPDATE extraction_jobs SET result = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+                (result, job_id, attempt),
+            ).rowcount == 1
+    finally:
+        release_connection(conn)
+
+
+def complete_job(job_id: int, attempt: int, result: str) -> bool:
+    """Passe la tâche en 'done' avec `result` (JSON des mots)."""
+    return _finish_job(job_id, attempt, "done", result=result, error=None)
+
+
+def fail_job(job_id: int, attempt: int, error: str) -> bool:
+    """Passe la tâche en 'failed' avec le message d'erreur destiné au client."""
+    return _finish_job(job_id, attempt, "failed", result=None, error=error)
+
+
+def _finish_job(job_id: int, attempt: int, status: str, result: str | None, error: str | None) -> bool:
+    conn = get_connection()
+    try:
+        with conn:
+            return conn.execute(
+                """
+                UPDATE extraction_jobs
+                SET status = ?, result = ?, error = ?,
+                    finished_at = datetime('now'), lease_expires_at = NULL
+                WHERE id = ? AND status = 'running' AND attempts = ?
+                """,
+                (status, result, error, job_id, attempt),
+            ).rowcount == 1
+    finally:
+        release_connection(conn)
+
+
+def requeue_job(job_id: int, attempt: int) -> bool:
+    """Remet en file une tâche interrompue par un arrêt propre (sans compter de tentative)."""
+    conn = get_connection()
+    try:
+        with conn:
+            return conn.execute(
+                """
+                UPDATE extraction_jobs
+                SET status = 'queued', attempts = attempts - 1, result = NULL,
+                    started_at = NULL, lease_expires_at = NULL
+                WHERE id = ? AND status = 'running' AND attempts = ?
+                """,
+                (job_id, attempt),
+            ).rowcount == 1
+    finally:
+        release_connection(conn)
+
+
+# ─── Lecture ─────────────────────────────────────────────────
+
+def get_job_for_user(job_id: int, user_id: int) -> sqlite3.Row | None:
+    """Retourne la tâche, ou None si elle n'existe pas ou n'appartient pas à l'utilisateur."""
+    conn = get_connection()
+    try:
+        return conn.execute(
+            "SELECT * FROM extraction_jobs WHERE id = ? AND user_id = ?",
+            (job_id, user_id),
+        ).fetchone()
+    finally:
+        release_connection(conn)
+
+
+def get_book_extraction_progress(book_id: int, user_id: int) -> sqlite3.Row:
+    """
+    Compteurs d'extraction d'un livre. Chapitres 'pending' répartis selon l'état de leur
+    dernière tâche (not_started s'ils n'en ont aucune) ; confirmed = chapitres 'done'
+    (mots confirmés). Dernière tâche par chapitre : MAX(id) sur idx_extraction_jobs_chapter.
+    """
+    conn = get_connection()
+    try:
+        return conn.execute(
+            """
+            SELECT
+                COUNT(*) FILTER (WHERE c.status = 'pending')                         AS pending_chapters,
+                COUNT(*) FILTER (WHERE c.status = 'pending' AND j.id IS NULL)        AS not_started,
+                COUNT(*) FILTER (WHERE c.status = 'pending' AND j.status = 'queued')  AS queued,
+                COUNT(*) FILTER (WHERE c.status = 'pending' AND j.status = 'running') AS running,
+                COUNT(*) FILTER (WHERE c.status = 'pending' AND j.status = 'done')    AS extracted,
+                COUNT(*) FILTER (WHERE c.status = 'pending' AND j.status = 'failed')  AS failed,
+                COUNT(*) FILTER (WHERE c.status != 'pending')                        AS confirmed
+            FROM chapters c
+            LEFT JOIN extraction_jobs j
+                ON j.id = (SELECT MAX(id) FROM extraction_jobs WHERE chapter_id = c.id)
+            WHERE c.book_id = ? AND c.user_id = ?
+            """,
+            (book_id, user_id),
+        ).fetchone()
+    finally:
+        release_connection(conn)
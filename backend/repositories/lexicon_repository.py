@@ -0,0 +1,112 @@
+"""
+Toutes les requêtes SQL liées au lexique partagé (tables lexicon et lexicon_forms).
+Aucune logique métier : lecture / écriture en base uniquement.
+"""
+import sqlite3
+from database import get_connection, release_connection
+
+
+# ─── Écriture ────────────────────────────────────────────────
+
+def _upsert_entries(
+    conn: sqlite3.Connection,
+    language: str,
+    translation_mode: str,
+    words: list[dict],
+    confirmations: int,
+) -> None:
+    """
+    Ajoute les mots absents, dans la transaction en cours de `conn`. Mot déjà présent :
+    sortie inchangée, +`confirmations` seulement si la sortie est la même.
+    """
+    conn.executemany(
+        """
+        INSERT INTO lexicon (language, translation_mode, base_form, output, confirmations)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (language, translation_mode, base_form) DO UPDATE SET
+            confirmations = confirmations + excluded.confirmations
+        WHERE output = excluded.output
+        """,
+        [(language, translation_mode, w["base_form"], w["output"], confirmations) for w in words],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO lexicon_forms (language, form, base_form) VALUES (?, ?, ?)",
+        [(language, w["word"].lower(), w["base_form"]) for w in words],
+    )
+
+
+def add_extracted_words(language: str, translation_mode: str, words: list[dict]) -> None:
+    """Mots produits par une extraction Gemini (chaque dict : word, base_form, output)."""
+    conn = get_connection()
+    try:
+        with conn:
+            _upsert_entries(conn, language, translation_mode, words, confirmations=0)
+    finally:
+        release_connection(conn)
+
+
+def add_confirmed_words(chapter_id: int, words: list[dict]) -> None:
+    """Mots gardés par un utilisateur : langue du livre et mode du chapitre `chapter_id`."""
+    conn = get_connection()
+    try:
+        with conn:
+            row = conn.execute(
+                """
+                SELECT b.language, c.translation_mode
+                FROM chapters c
+                JOIN books b ON b.id = c.book_id
+                WHERE c.id = ?
+                """,
+                (chapter_id,),
+            ).fetchone()
+            if row is not None:
+                _upsert_entries(conn, row["language"], row["translation_mode"], words, confirmations=1)
+    finally:
+        release_connection(conn)
+
+
+# ─── Lecture ─────────────────────────────────────────────────
+
+def get_base_form(language: str, form: str) -> str | None:
+    """Forme de base rattachée à cette forme (en minuscules), ou None."""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT base_form FROM lexicon_forms WHERE language = ? AND form = ?",
+            (language, form),
+        ).fetchone()
+        return row["base_form"] if row else None
+    finally:
+        release_connection(conn)
+
+
+def get_entries_by_forms(
+    language: str,
+    translation_mode: str,
+    forms: list[str],
+    min_confirmations: int,
+) -> list[sqlite3.Row]:
+    """
+    Entrées connues pour ces formes (en minuscules) : form, base_form, output.
+    Seulement celles confirmées au moins `min_confirmations` fois.
+    """
+    if not forms:
+        return []
+    placeholders = ", ".join(["?"] * len(forms))
+    conn = get_connection()
+    try:
+        return conn.execute(
+            f"""
+            SELECT f.form, l.base_form, l.output
+            FROM lexicon_forms f
+            JOIN lexicon l
+              ON l.language = f.language
+             AND l.translation_mode = ?
+             AND l.base_form = f.base_form
+            WHERE f.language = ? AND f.form IN ({placeholders})
+              AND l.confirmations >= ?
+            """,
+            [translation_mode, language, *forms, min_confirmations],
+        ).fetchall()
+    finally:
+        release_connection(conn)
@@ -0,0 +1,84 @@
+"""
+Toutes les requêtes SQL liées à la consommation des appels Gemini (table llm_usage_daily).
+Aucune logique métier : lecture / écriture en base uniquement.
+"""
+import sqlite3
+from database import get_connection, release_connection
+
+
+# ─── Écriture ────────────────────────────────────────────────
+
+def record_llm_call(
+    user_id: int,
+    book_id: int,
+    model: str,
+    level: str,
+    translation_mode: str,
+    outcome: str,
+    attempts: int,
+    prompt_tokens: int,
+    candidate_tokens: int,
+    total_tokens: int,
+    latency_ms: int,
+    latency_bucket: int,
+    empty_histogram: str,
+) -> None:
+    """
+    Ajoute un appel à la ligne du jour (créée si besoin) : compteurs cumulés et
+    +1 dans la case `latency_bucket` de l'histogramme (`empty_histogram` à la création).
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO llm_usage_daily
+                    (day, user_id, book_id, model, level, translation_mode, outcome,
+                     calls, attempts, prompt_tokens, candidate_tokens, total_tokens,
+                     latency_ms_total, latency_histogram)
+                VALUES (date('now'), ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?,
+                        json_set(?, '$[' || ? || ']', 1))
+                ON CONFLICT (day, user_id, book_id, model, level, translation_mode, outcome)
+                DO UPDATE SET
+                    calls            = calls + 1,
+                    attempts         = attempts + excluded.attempts,
+                    prompt_tokens    = prompt_tokens + excluded.prompt_tokens,
+                    candidate_tokens = candidate_tokens + excluded.candidate_tokens,
+                    total_tokens     = total_tokens + excluded.total_tokens,
+                    latency_ms_total = latency_ms_total + excluded.latency_ms_total,
+                    latency_histogram = json_set(
+                        latency_histogram,
+                        '$[' || ? || ']',
+                        json_extract(latency_histogram, '$[' || ? || ']') + 1
+                    )
+                """,
+                (
+                    user_id, book_id, model, level, translation_mode, outcome,
+                    attempts, prompt_tokens, candidate_tokens, total_tokens, latency_ms,
+                    empty_histogram, latency_bucket,
+                    latency_bucket, latency_bucket,
+                ),
+            )
+    finally:
+        release_connection(conn)
+
+
+# ─── Lecture ─────────────────────────────────────────────────
+
+def get_llm_usage(date_from: str, date_to: str) -> list[sqlite3.Row]:
+    """Lignes de llm_usage_daily entre deux jours inclus ('YYYY-MM-DD'), avec le nom d'utilisateur."""
+    conn = get_connection()
+    try:
+        return conn.execute(
+            """
+            SELECT u.day, u.user_id, users.username, u.book_id, u.model, u.level,
+                   u.translation_mode, u.outcome, u.calls, u.attempts, u.prompt_tokens,
+                   u.candidate_tokens, u.total_tokens, u.latency_ms_total, u.latency_histogram
+            FROM llm_usage_daily u
+            JOIN users ON users.id = u.user_id
+            WHERE u.day BETWEEN ? AND ?
+            """,
+            (date_from, date_to),
+        ).fetchall()
+    finally:
+        release_connection(conn)
@@ -3,7 +3,7 @@ Toutes les requêtes SQL liées aux utilisateurs.
 Ce fichier ne contient AUCUNE logique métier : il se contente de lire / écrire en base.
 """
 import sqlite3
-from database import get_connection
+from database import get_connection, release_connection
 
 
 # ─── Lecture ─────────────────────────────────────────────────
@@ -16,7 +16,7 @@ def get_user_by_username(username: str) -> sqlite3.Row | None:
         ).fetchone()
         return row
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 def get_user_by_email(email: str) -> sqlite3.Row | None:
@@ -27,7 +27,7 @@ def get_user_by_email(email: str) -> sqlite3.Row | None:
         ).fetchone()
         return row
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 def get_user_by_id(user_id: int) -> sqlite3.Row | None:
@@ -38,7 +38,7 @@ def get_user_by_id(user_id: int) -> sqlite3.Row | None:
         ).fetchone()
         return row
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 def get_user_by_verification_token_hash(token_hash: str) -> sqlite3.Row | None:
@@ -50,7 +50,7 @@ def get_user_by_verification_token_hash(token_hash: str) -> sqlite3.Row | None:
         ).fetchone()
         return row
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 # ─── Écriture ─────────────────────────────────────────────────
@@ -66,7 +66,7 @@ def create_user(username: str, email: str, hashed_password: str) -> int:
             )
             return cursor.lastrowid
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 def set_verification_token(user_id: int, token_hash: str, expires_at: str) -> None:
@@ -82,7 +82,7 @@ def set_verification_token(user_id: int, token_hash: str, expires_at: str) -> No
                 (token_hash, expires_at, user_id),
             )
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 def mark_email_verified(user_id: int, verified_at: str) -> None:
@@ -101,4 +101,4 @@ def mark_email_verified(user_id: int, verified_at: str) -> None:
                 (verified_at, user_id),
             )
     finally:
-        conn.close()
+        release_connection(conn)
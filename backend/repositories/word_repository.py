@@ -3,94 +3,163 @@ Toutes les requêtes SQL liées aux mots.
 Aucune logique métier : lecture / écriture en base uniquement.
 """
 import sqlite3
-from database import get_connection
+from database import get_connection, release_connection
 
 
 # ─── Écriture ────────────────────────────────────────────────
 
-def create_words(
+# Lignes par INSERT multi-valeurs (5 paramètres par ligne, bien sous la limite SQLite).
+_INSERT_CHUNK_SIZE = 500
+
+
+def _insert_words(
+    conn: sqlite3.Connection,
+    chapter_id: int,
+    user_id: int,
+    words: list[dict],
+) -> None:
+    """INSERT multi-lignes par paquets, dans la transaction en cours de `conn`."""
+    for start in range(0, len(words), _INSERT_CHUNK_SIZE):
+        chunk = words[start:start + _INSERT_CHUNK_SIZE]
+        placeholders = ", ".join(["(?, ?, ?, ?, ?, 'to_learn')"] * len(chunk))
+        params = [
+            value
+            for w in chunk
+            for value in (chapter_id, user_id, w["word"], w["base_form"], w["output"])
+        ]
+        conn.execute(
+            f"""
+            INSERT INTO words (chapter_id, user_id, word, base_form, output, status)
+            VALUES {placeholders}
+            """,
+            params,
+        )
+
+
+def confirm_chapter_words(
     chapter_id: int,
+    book_id: int,
     user_id: int,
     words: list[dict],
-) -> list[int]:
+) -> list[sqlite3.Row] | None:
     """
-    Insère une liste de mots en une transaction.
+    En une transaction : passe le chapitre en 'done' (filtré par id, book_id ET user_id),
+    insère les mots, puis relit tous les mots du chapitre pour cet utilisateur.
     Chaque dict doit avoir : word, base_form, output.
-    Retourne la liste des ids insérés.
+    Retourne None (sans rien écrire) si le chapitre n'appartient pas à ce livre / cet utilisateur.
     """
     conn = get_connection()
-    ids: list[int] = []
     try:
         with conn:
-            for w in words:
-                cursor = conn.execute(
-                    """
-                    INSERT INTO words (chapter_id, user_id, word, base_form, output, status)
-                    VALUES (?, ?, ?, ?, ?, 'to_learn')
-                    """,
-                    (chapter_id, user_id, w["word"], w["base_form"], w["output"]),
-                )
-                ids.append(cursor.lastrowid)
+            cursor = conn.execute(
+                "UPDATE chapters SET status = 'done' WHERE id = ? AND book_id = ? AND user_id = ?",
+                (chapter_id, book_id, user_id),
+            )
+            if cursor.rowcount == 0:
+                return None
+            _insert_words(conn, chapter_id, user_id, words)
+            return conn.execute(
+                """
+                SELECT * FROM words
+                WHERE chapter_id = ? AND user_id = ?
+                ORDER BY created_at ASC, id ASC
+                """,
+                (chapter_id, user_id),
+            ).fetchall()
     finally:
-        conn.close()
-    return ids
+        release_connection(conn)
 
 
 # ─── Lecture ─────────────────────────────────────────────────
 
 
-def get_words_by_chapter_and_user(chapter_id: int, user_id: int) -> list[sqlite3.Row]:
-    """Filtre par chapter_id ET user_id — évite les fuites entre utilisateurs."""
+def get_words_by_chapter_and_user(
+    chapter_id: int,
+    user_id: int,
+    limit: int | None = None,
+    after: tuple[str, int] | None = None,
+) -> list[sqlite3.Row]:
+    """
+    Filtre par chapter_id ET user_id — évite les fuites entre utilisateurs.
+    Trié par (created_at, id) ; `after` = clé de la dernière ligne de la page précédente (keyset).
+    """
+    query = "SELECT * FROM words WHERE chapter_id = ? AND user_id = ?"
+    params: list = [chapter_id, user_id]
+    if after is not None:
+        query += " AND (created_at, id) > (?, ?)"
+        params.extend(after)
+    query += " ORDER BY created_at ASC, id ASC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
     conn = get_connection()
     try:
-        return conn.execute(
-            "SELECT * FROM words WHERE chapter_id = ? AND user_id = ? ORDER BY created_at ASC",
-            (chapter_id, user_id),
-        ).fetchall()
+        return conn.execute(query, params).fetchall()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def get_word_by_id(word_id: int) -> sqlite3.Row | None:
+def get_user_words_stamp(user_id: int) -> tuple[int, int]:
+    """
+    (nombre de mots, plus grand id) de l'utilisateur : change à chaque insertion ou
+    suppression de ses mots (ids AUTOINCREMENT jamais réutilisés).
+    """
     conn = get_connection()
     try:
-        return conn.execute(
-            "SELECT * FROM words WHERE id = ?", (word_id,)
+        row = conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM words WHERE user_id = ?",
+            (user_id,),
         ).fetchone()
+        return row[0], row[1]
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def get_word_by_chapter_user_and_word(
-    chapter_id: int, user_id: int, word: str
-) -> sqlite3.Row | None:
-    """Retourne le mot s'il existe déjà pour ce chapitre et cet utilisateur."""
+def get_user_known_words(user_id: int) -> list[sqlite3.Row]:
+    """
+    Mots de l'utilisateur, tous livres confondus : language (du livre), word, base_form.
+    Doublons possibles (même mot dans deux chapitres) : pas de DISTINCT, qui coûterait un
+    B-tree temporaire, l'appelant en fait un ensemble.
+    """
     conn = get_connection()
     try:
         return conn.execute(
             """
-            SELECT * FROM words
-            WHERE chapter_id = ? AND user_id = ? AND word = ?
+            SELECT b.language, w.word, w.base_form
+            FROM words w
+            JOIN chapters c ON c.id = w.chapter_id
+            JOIN books b ON b.id = c.book_id
+            WHERE w.user_id = ?
             """,
-            (chapter_id, user_id, word),
-        ).fetchone()
+            (user_id,),
+        ).fetchall()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
 def create_single_word(
     chapter_id: int,
     user_id: int,
     word_data: dict,
-) -> int:
-    """Insère un mot unique et retourne son id."""
+) -> sqlite3.Row | None:
+    """
+    Insère un mot unique et retourne la ligne créée.
+    Retourne None (sans insérer) si ce mot existe déjà pour ce chapitre et cet utilisateur :
+    le test d'existence et l'insertion forment une seule requête.
+    """
     conn = get_connection()
     try:
         with conn:
-            cursor = conn.execute(
+            return conn.execute(
                 """
                 INSERT INTO words (chapter_id, user_id, word, base_form, output, status)
-                VALUES (?, ?, ?, ?, ?, 'to_learn')
+                SELECT ?, ?, ?, ?, ?, 'to_learn'
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM words
+                    WHERE chapter_id = ? AND user_id = ? AND word = ?
+                )
+                RETURNING *
                 """,
                 (
                     chapter_id,
@@ -98,22 +167,27 @@ def create_single_word(
                     word_data["word"],
                     word_data["base_form"],
                     word_data["output"],
+                    chapter_id,
+                    user_id,
+                    word_data["word"],
                 ),
-            )
-            return cursor.lastrowid
+            ).fetchone()
     finally:
-        conn.close()
+        release_connection(conn)
 
 
-def delete_word_by_id(word_id: int, user_id: int) -> bool:
-    """Supprime un mot par son id, seulement s'il appartient à l'utilisateur. Retourne True si supprimé."""
+def delete_word_by_id(word_id: int, chapter_id: int, user_id: int) -> bool:
+    """
+    Supprime un mot par son id, seulement s'il appartient à ce chapitre et à l'utilisateur.
+    Retourne True si supprimé.
+    """
     conn = get_connection()
     try:
         with conn:
             cursor = conn.execute(
-                "DELETE FROM words WHERE id = ? AND user_id = ?",
-                (word_id, user_id),
+                "DELETE FROM words WHERE id = ? AND chapter_id = ? AND user_id = ?",
+                (word_id, chapter_id, user_id),
             )
             return cursor.rowcount > 0
     finally:
-        conn.close()
+        release_connection(conn)
@@ -0,0 +1,284 @@
+"""
+Résilience des appels à une API externe (Gemini) : nouvelles tentatives, disjoncteur,
+requêtes doublées (hedging).
+
+    - Nouvelles tentatives : une erreur transitoire (RetryableError : timeout, connexion,
+      429, 5xx) est retentée jusqu'à `max_retries` fois, après un délai exponentiel tiré
+      au hasard (« full jitter ») ou le Retry-After de l'API s'il est plus long.
+    - Disjoncteur : après `failure_threshold` échecs transitoires consécutifs, les appels
+      échouent immédiatement (CircuitOpenError) pendant `reset_seconds` ; ensuite un seul
+      appel d'essai passe, qui referme le circuit s'il réussit.
+    - Hedging : si le premier élément d'une réponse tarde au-delà du centile
+      `hedge_percentile` des latences récentes, une seconde requête identique est lancée ;
+      la première à répondre est gardée, l'autre annulée. Coûte un appel de plus : désactivé
+      par défaut.
+
+Seule l'ouverture d'une réponse (jusqu'à son premier élément) est protégée : une erreur
+après des éléments déjà transmis n'est pas retentée. État par processus et, pour Gemini,
+par modèle (model_routing.py compare leurs latences).
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+import config
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Latences gardées pour le centile de hedging, et minimum avant de l'utiliser.
+_LATENCY_WINDOW = 200
+_MIN_LATENCY_SAMPLES = 20
+
+
+class RetryableError(Exception):
+    """Mixin : erreur transitoire, l'appel peut être retenté. `retry_after` : délai demandé par l'API."""
+    retry_after: float | None = None
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_in: float):
+        super().__init__(f"Circuit ouvert, nouvel essai dans {retry_in:.0f} s")
+        self.retry_in = retry_in
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """Délai avant la tentative `attempt + 1` : uniforme entre 0 et base × 2^attempt (plafonné)."""
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """closed → open (après `failure_threshold` échecs consécutifs) → half_open → closed / open."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def retry_in(self) -> float:
+        return max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+
+    def is_available(self) -> bool:
+        """Un appel passerait-il maintenant ? (allow_request sans réserver l'appel d'essai)"""
+        if self.failure_threshold <= 0 or self.state == "closed":
+            return True
+        if self.state == "open" and self.retry_in() > 0:
+            return False
+        return not self._trial_in_flight
+
+    def allow_request(self) -> bool:
+        if self.failure_threshold <= 0 or self.state == "closed":
+            return True
+        if self.state == "open" and self.retry_in() > 0:
+            return False
+        # Délai écoulé : un seul appel d'essai à la fois.
+        if self._trial_in_flight:
+            return False
+        self.state = "half_open"
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_inconclusive(self) -> None:
+        """Appel sans verdict sur la disponibilité (réponse invalide, annulation)."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.failure_threshold > 0 and (
+            self.state == "half_open" or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != "open":
+                self.opened_count += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Latences récentes (secondes) jusqu'au premier élément d'une réponse réussie."""
+
+    def __init__(self, window: int = _LATENCY_WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float | None:
+        """Centile `p` (0–100) ; None tant qu'il y a moins de _MIN_LATENCY_SAMPLES mesures."""
+        if len(self._samples) < _MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class ResilientUpstream:
+    """Politique de résilience d'une API externe, partagée par tous ses appels du processus."""
+
+    def __init__(
+        self,
+        max_retries: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        failure_threshold: int,
+        reset_seconds: float,
+        hedge_percentile: float,
+    ):
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.hedge_percentile = hedge_percentile
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.latencies = LatencyTracker()
+        self.counters = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "rejected_open": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "circuit_state": self.breaker.state,
+            "circuit_retry_in_seconds": round(self.breaker.retry_in(), 1) if self.breaker.state == "open" else 0,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "circuit_opened": self.breaker.opened_count,
+            **self.counters,
+            "latency_p50_seconds": self.latencies.percentile(50),
+            "latency_p95_seconds": self.latencies.percentile(95),
+        }
+
+    def _hedge_delay(self) -> float | None:
+        if self.hedge_percentile <= 0:
+            return None
+        return self.latencies.percentile(self.hedge_percentile)
+
+    async def open(
+        self,
+        start_attempt: Callable[[bool], AsyncIterator[Any]],
+    ) -> tuple[Any, AsyncIterator[Any]]:
+        """
+        Ouvre une réponse : (premier élément, suite de la réponse retenue).
+        `start_attempt(retry)` lance une tentative ; `retry` : ce n'est pas la première
+        (tentative suivante ou requête doublée, qui doit par exemple reprendre du quota).
+
+        Raises:
+            CircuitOpenError — circuit ouvert, aucun appel fait.
+            L'erreur de la dernière tentative — non transitoire, ou tentatives épuisées.
+        """
+        self.counters["calls"] += 1
+        attempt = 0
+        while True:
+            if not self.breaker.allow_request():
+                self.counters["rejected_open"] += 1
+                raise CircuitOpenError(self.breaker.retry_in())
+            try:
+                result = await self._first_item(start_attempt, retry=attempt > 0)
+            except RetryableError as exc:
+                self.counters["failures"] += 1
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                self.counters["retries"] += 1
+                delay = backoff_delay(attempt, self.retry_base_seconds, self.retry_max_seconds)
+                if exc.retry_after is not None:
+                    delay = max(delay, min(exc.retry_after, self.retry_max_seconds))
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Erreur non transitoire (réponse invalide…) ou annulation : sans verdict
+                # sur la disponibilité de l'API.
+                self.breaker.record_inconclusive()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def _first_item(
+        self,
+        start_attempt: Callable[[bool], AsyncIterator[Any]],
+        retry: bool,
+    ) -> tuple[Any, AsyncIterator[Any]]:
+        """Premier élément d'une tentative, doublée si elle dépasse le délai de hedging."""
+        self.counters["attempts"] += 1
+        started_at = time.monotonic()
+        items = start_attempt(retry)
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            try:
+                first = await anext(items)
+            except BaseException:
+                await items.aclose()
+                raise
+            self.latencies.record(time.monotonic() - started_at)
+            return first, items
+
+        # ── Hedging ──────────────────────────────────────────
+        racing: dict[asyncio.Task, AsyncIterator[Any]] = {
+            asyncio.ensure_future(anext(items)): items,
+        }
+        try:
+            done, _ = await asyncio.wait(racing, timeout=hedge_delay)
+            if not done:
+                self.counters["attempts"] += 1
+                self.counters["hedges"] += 1
+                hedge_items = start_attempt(True)
+                racing[asyncio.ensure_future(anext(hedge_items))] = hedge_items
+
+            error: BaseException | None = None
+            while racing:
+                done, _ = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    winner_items = racing.pop(task)
+                    if task.exception() is None:
+                        if winner_items is not items:
+                            self.counters["hedge_wins"] += 1
+                        self.latencies.record(time.monotonic() - started_at)
+                        return task.result(), winner_items
+                    error = task.exception()
+                    await winner_items.aclose()
+            raise error
+        finally:
+            # Perdant(s), ou annulation de l'appelant pendant la course.
+            for task, losing_items in racing.items():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await losing_items.aclose()
+
+
+_gemini_upstreams: dict[str, ResilientUpstream] = {}
+
+
+def get_gemini_upstream(model: str | None = None) -> ResilientUpstream:
+    """
+    Politique partagée par tous les appels Gemini du processus vers `model` (GEMINI_MODEL
+    par défaut), créée à la demande : un disjoncteur et des latences par modèle.
+    """
+    model = model or config.GEMINI_MODEL
+    if model not in _gemini_upstreams:
+        _gemini_upstreams[model] = ResilientUpstream(
+            max_retries=config.GEMINI_MAX_RETRIES,
+            retry_base_seconds=config.GEMINI_RETRY_BASE_SECONDS,
+            retry_max_seconds=config.GEMINI_RETRY_MAX_SECONDS,
+            failure_threshold=config.GEMINI_CIRCUIT_FAILURES,
+            reset_seconds=config.GEMINI_CIRCUIT_RESET_SECONDS,
+            hedge_percentile=config.GEMINI_HEDGE_PERCENTILE,
+        )
+    return _gemini_upstreams[model]
+
+
+def get_gemini_upstreams() -> dict[str, ResilientUpstream]:
+    """Politiques déjà créées, par modèle."""
+    return dict(_gemini_upstreams)
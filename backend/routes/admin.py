@@ -0,0 +1,32 @@
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from dependencies import get_admin_user
+from models import LlmUsageReportRow, TokenData
+from services import usage_service
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+_DEFAULT_PERIOD_DAYS = 30
+
+
+@router.get("/llm-usage", response_model=list[LlmUsageReportRow])
+async def llm_usage(
+    date_from: date | None = Query(None, description="Premier jour inclus (défaut : il y a 30 jours)"),
+    date_to: date | None = Query(None, description="Dernier jour inclus (défaut : aujourd'hui, UTC)"),
+    group_by: str = Query("user", description="Dimensions séparées par des virgules : day, user, book, model, level, mode, outcome"),
+    current_user: TokenData = Depends(get_admin_user),
+):
+    """Jetons, coût, nouvelles tentatives et centiles de latence des appels Gemini (ADMIN_USERNAMES)."""
+    keys = [key.strip() for key in group_by.split(",") if key.strip()]
+    unknown = [key for key in keys if key not in usage_service.GROUP_BY_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by invalide : {', '.join(unknown)}. Valeurs acceptées : {', '.join(usage_service.GROUP_BY_COLUMNS)}",
+        )
+    # Jours UTC, comme date('now') de SQLite à l'enregistrement.
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=_DEFAULT_PERIOD_DAYS)
+    return await usage_service.get_usage_report(date_from.isoformat(), date_to.isoformat(), keys)
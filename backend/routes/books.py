@@ -1,53 +1,103 @@
 """
-Routes livres : GET /books et POST /books.
+Routes livres : GET /books, POST /books, extraction d'un livre entier
+(POST /books/{book_id}/extract, GET /books/{book_id}/extraction).
 Toutes les routes sont protégées par le token JWT (Depends(get_current_user)).
 """
-from fastapi import APIRouter, Depends
+from typing import Optional
 
+from fastapi import APIRouter, Depends, Query, Response
+
+import config
 from dependencies import get_current_user
-from models import BatchImportRequest, BookCreate, BookResponse, TokenData
-from services import book_service
+from models import (
+    BatchImportRequest,
+    BookCreate,
+    BookExtractionProgressResponse,
+    BookExtractRequest,
+    BookResponse,
+    Page,
+    TokenData,
+)
+from services import book_service, job_service
 
 router = APIRouter(prefix="/books", tags=["Books"])
 
 
-@router.get("", response_model=list[BookResponse])
-def list_books(current_user: TokenData = Depends(get_current_user)):
-    """Retourne tous les livres de l'utilisateur connecté."""
-    return book_service.get_user_books(current_user.user_id)
+@router.get("", response_model=Page[BookResponse])
+async def list_books(
+    limit: int = Query(config.PAGE_SIZE_DEFAULT, ge=1, le=config.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Retourne une page des livres de l'utilisateur connecté (suivre `next_cursor`)."""
+    return await book_service.get_user_books(current_user.user_id, limit=limit, cursor=cursor)
 
 
 @router.get("/{book_id}", response_model=BookResponse)
-def get_book(
+async def get_book(
     book_id: int,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Retourne un livre par son id (vérifie l'ownership)."""
-    return book_service.get_book(book_id=book_id, user_id=current_user.user_id)
+    return await book_service.get_book(book_id=book_id, user_id=current_user.user_id)
 
 
 @router.post("", response_model=BookResponse, status_code=201)
-def add_book(
+async def add_book(
     body: BookCreate,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Crée un nouveau livre pour l'utilisateur connecté."""
-    return book_service.create_book(user_id=current_user.user_id, data=body)
+    return await book_service.create_book(user_id=current_user.user_id, data=body)
 
 
 @router.post("/batch-import", response_model=BookResponse, status_code=201)
-def batch_import_book(
+async def batch_import_book(
     body: BatchImportRequest,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Importe un livre avec tous ses chapitres pré-découpés."""
-    return book_service.import_book_with_chapters(user_id=current_user.user_id, data=body)
+    return await book_service.import_book_with_chapters(user_id=current_user.user_id, data=body)
+
+
+@router.post("/{book_id}/extract", response_model=BookExtractionProgressResponse, status_code=202)
+async def extract_book(
+    book_id: int,
+    response: Response,
+    body: BookExtractRequest = BookExtractRequest(),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """
+    Met en file l'extraction de tous les chapitres 'pending' du livre (après un batch-import).
+    Relancer reprend après un échec sans refaire les chapitres déjà extraits.
+    Retourne 202 : la progression à suivre (GET /books/{book_id}/extraction).
+    """
+    book = await book_service.get_book(book_id=book_id, user_id=current_user.user_id)
+    progress = await job_service.enqueue_book_extraction(
+        user_id=current_user.user_id,
+        book_id=book_id,
+        target_language=book.language,
+        words_to_extract=body.words_to_extract,
+        engine=body.engine,
+    )
+    response.headers["Location"] = f"/books/{book_id}/extraction"
+    return progress
+
+
+@router.get("/{book_id}/extraction", response_model=BookExtractionProgressResponse)
+async def get_book_extraction(
+    book_id: int,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Progression de l'extraction du livre (vérifie l'ownership)."""
+    await book_service.get_book(book_id=book_id, user_id=current_user.user_id)
+    return await job_service.get_book_extraction_progress(book_id=book_id, user_id=current_user.user_id)
 
 
 @router.delete("/{book_id}", status_code=204)
-def remove_book(
+async def remove_book(
     book_id: int,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Supprime un livre. Vérifie que le livre appartient à l'utilisateur connecté."""
-    book_service.delete_book(book_id=book_id, user_id=current_user.user_id)
+    await book_service.delete_book(book_id=book_id, user_id=current_user.user_id)
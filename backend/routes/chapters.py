@@ -1,7 +1,7 @@
 """
 Routes vocabulaire :
-    GET    /books/{book_id}/chapters                                  → liste les chapitres d'un livre
-    POST   /books/{book_id}/chapters                                  → soumet un chapitre, appelle Gemini
+    GET    /books/{book_id}/chapters                                  → liste les chapitres d'un livre (sans texte)
+    POST   /books/{book_id}/chapters                                  → soumet un chapitre, extraction en tâche (202)
     GET    /books/{book_id}/chapters/{chapter_id}                     → récupère un chapitre
     DELETE /books/{book_id}/chapters/{chapter_id}                     → supprime un chapitre
     POST   /books/{book_id}/chapters/{chapter_id}/words               → confirme la sélection
@@ -9,53 +9,65 @@ Routes vocabulaire :
     POST   /books/{book_id}/chapters/{chapter_id}/words/single        → ajoute un mot unique
     DELETE /books/{book_id}/chapters/{chapter_id}/words/{word_id}     → supprime un mot
 """
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
 
+from fastapi import APIRouter, Depends, Query, Response
+
+import config
 from dependencies import get_current_user
 from models import (
     ChapterCreateRequest,
     ChapterExtractRequest,
     ChapterResponse,
+    ChapterSummaryResponse,
     ChapterTitleUpdateRequest,
-    ExtractionResponse,
+    ExtractionJobAcceptedResponse,
+    Page,
     SingleWordAddRequest,
     TokenData,
     WordResponse,
     WordsConfirmRequest,
 )
-from services import book_service, chapter_service, vocabulary_service, word_service
+from services import book_service, chapter_service, job_service, word_service
 
 router = APIRouter(prefix="/books/{book_id}/chapters", tags=["Chapters"])
 
 
-@router.get("", response_model=list[ChapterResponse])
-def list_chapters(
+@router.get("", response_model=Page[ChapterSummaryResponse])
+async def list_chapters(
     book_id: int,
+    limit: int = Query(config.PAGE_SIZE_DEFAULT, ge=1, le=config.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
     current_user: TokenData = Depends(get_current_user),
 ):
-    """Retourne les chapitres du livre demandé (ownership vérifié)."""
-    return chapter_service.get_chapters(book_id=book_id, user_id=current_user.user_id)
+    """Retourne une page de résumés des chapitres du livre, sans le texte (ownership vérifié)."""
+    return await chapter_service.get_chapters(
+        book_id=book_id,
+        user_id=current_user.user_id,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
 @router.get("/{chapter_id}", response_model=ChapterResponse)
-def get_chapter(
+async def get_chapter(
     book_id: int,
     chapter_id: int,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Retourne un chapitre en vérifiant l'ownership."""
-    return chapter_service.get_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
+    return await chapter_service.get_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
 
 
 @router.patch("/{chapter_id}", response_model=ChapterResponse)
-def update_chapter_title(
+async def update_chapter_title(
     book_id: int,
     chapter_id: int,
     body: ChapterTitleUpdateRequest,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Met à jour le titre libre d'un chapitre (ownership vérifié)."""
-    return chapter_service.update_chapter_title(
+    return await chapter_service.update_chapter_title(
         chapter_id=chapter_id,
         book_id=book_id,
         user_id=current_user.user_id,
@@ -63,116 +75,115 @@ def update_chapter_title(
     )
 
 
-@router.post("", response_model=ExtractionResponse, status_code=201)
-def create_chapter_and_extract(
+@router.post("", response_model=ExtractionJobAcceptedResponse, status_code=202)
+async def create_chapter_and_extract(
     book_id: int,
     body: ChapterCreateRequest,
+    response: Response,
     current_user: TokenData = Depends(get_current_user),
 ):
     """
     1. Persiste le chapitre en DB.
-    2. Appelle Gemini pour extraire le vocabulaire.
-    3. Retourne le chapitre + les mots suggérés (non stockés à ce stade).
+    2. Met en file l'extraction Gemini (le chapitre est supprimé si elle échoue).
+    3. Retourne 202 : le chapitre + la tâche à suivre (GET /jobs/{job_id}).
     """
-    book = book_service.get_book(book_id=book_id, user_id=current_user.user_id)
-    chapter = chapter_service.create_chapter(
+    book = await book_service.get_book(book_id=book_id, user_id=current_user.user_id)
+    chapter = await chapter_service.create_chapter(
         user_id=current_user.user_id,
         book_id=book_id,
         data=body,
     )
+    job = await job_service.enqueue_extraction(
+        user_id=current_user.user_id,
+        book_id=book_id,
+        chapter_id=chapter.id,
+        target_language=book.language,
+        level=body.level,
+        translation_mode=body.translation_mode,
+        words_to_extract=body.words_to_extract,
+        engine=body.engine,
+        delete_chapter_on_failure=True,
+    )
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return ExtractionJobAcceptedResponse(chapter=chapter, job=job)
+
 
-    try:
-        words = vocabulary_service.extract_vocabulary(
-            text=body.text,
-            level=body.level,
-            target_language=book.language,
-            word_count=body.words_to_extract,
-            translation_mode=body.translation_mode,
-        )
-    except HTTPException:
-        chapter_service.delete_chapter(
-            chapter_id=chapter.id,
-            book_id=book_id,
-            user_id=current_user.user_id,
-        )
-        raise
-
-    return ExtractionResponse(chapter=chapter, words=words)
-
-
-@router.post("/{chapter_id}/extract", response_model=ExtractionResponse)
-def extract_existing_chapter(
+@router.post("/{chapter_id}/extract", response_model=ExtractionJobAcceptedResponse, status_code=202)
+async def extract_existing_chapter(
     book_id: int,
     chapter_id: int,
     body: ChapterExtractRequest,
+    response: Response,
     current_user: TokenData = Depends(get_current_user),
 ):
-    """Extrait le vocabulaire d'un chapitre existant (status pending), sans recréer le chapitre."""
-    book = book_service.get_book(book_id=book_id, user_id=current_user.user_id)
-    chapter = chapter_service.update_learning_settings(
+    """Met en file l'extraction d'un chapitre existant (status pending), sans recréer le chapitre."""
+    book = await book_service.get_book(book_id=book_id, user_id=current_user.user_id)
+    chapter = await chapter_service.update_learning_settings(
         chapter_id=chapter_id,
         book_id=book_id,
         user_id=current_user.user_id,
         level=body.level,
         translation_mode=body.translation_mode,
     )
-
-    words = vocabulary_service.extract_vocabulary(
-        text=chapter.text,
-        level=body.level,
+    job = await job_service.enqueue_extraction(
+        user_id=current_user.user_id,
+        book_id=book_id,
+        chapter_id=chapter.id,
         target_language=book.language,
-        word_count=body.words_to_extract,
+        level=body.level,
         translation_mode=body.translation_mode,
+        words_to_extract=body.words_to_extract,
+        engine=body.engine,
     )
-    return ExtractionResponse(chapter=chapter, words=words)
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return ExtractionJobAcceptedResponse(chapter=chapter, job=job)
 
 
 @router.delete("/{chapter_id}", status_code=204)
-def delete_chapter(
+async def delete_chapter(
     book_id: int,
     chapter_id: int,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Supprime un chapitre et tous ses mots (CASCADE en DB)."""
-    chapter_service.delete_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
+    await chapter_service.delete_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
 
 
 @router.post("/{chapter_id}/words", response_model=list[WordResponse], status_code=201)
-def confirm_words(
+async def confirm_words(
     book_id: int,
     chapter_id: int,
     body: WordsConfirmRequest,
     current_user: TokenData = Depends(get_current_user),
 ):
     """
-    Stocke les mots que le user a conservés après sa sélection.
+    Stocke les mots que le user a conservés après sa sélection et passe le chapitre en 'done'.
     Vérifie que le chapitre appartient bien à l'utilisateur connecté.
     """
-    chapter_service.get_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
-
-    result = word_service.confirm_words(
+    return await word_service.confirm_words(
         chapter_id=chapter_id,
+        book_id=book_id,
         user_id=current_user.user_id,
         words=[w.model_dump() for w in body.words],
     )
-    chapter_service.mark_chapter_done(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
-    return result
 
 
-@router.get("/{chapter_id}/words", response_model=list[WordResponse])
-def get_words(
+@router.get("/{chapter_id}/words", response_model=Page[WordResponse])
+async def get_words(
     book_id: int,
     chapter_id: int,
+    limit: int = Query(config.PAGE_SIZE_DEFAULT, ge=1, le=config.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
     current_user: TokenData = Depends(get_current_user),
 ):
-    """Retourne les mots stockés pour un chapitre (vérifie l'ownership)."""
-    chapter_service.get_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
+    """Retourne une page des mots stockés pour un chapitre (vérifie l'ownership)."""
+    await chapter_service.check_chapter_access(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
 
-    return word_service.get_words(chapter_id, current_user.user_id)
+    return await word_service.get_words(chapter_id, current_user.user_id, limit=limit, cursor=cursor)
 
 
 @router.post("/{chapter_id}/words/single", response_model=WordResponse, status_code=201)
-def add_single_word(
+async def add_single_word(
     book_id: int,
     chapter_id: int,
     body: SingleWordAddRequest,
@@ -182,9 +193,9 @@ def add_single_word(
     Ajoute un mot unique découvert pendant la lecture avec le statut `to_learn`.
     Vérifie l'ownership. Retourne 409 si le mot est déjà présent.
     """
-    chapter_service.get_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
+    await chapter_service.check_chapter_access(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
 
-    return word_service.add_single_word(
+    return await word_service.add_single_word(
         chapter_id=chapter_id,
         user_id=current_user.user_id,
         word_data=body.model_dump(),
@@ -192,12 +203,12 @@ def add_single_word(
 
 
 @router.delete("/{chapter_id}/words/{word_id}", status_code=204)
-def delete_word(
+async def delete_word(
     book_id: int,
     chapter_id: int,
     word_id: int,
     current_user: TokenData = Depends(get_current_user),
 ):
     """Supprime un mot de la liste du chapitre (vérifie l'ownership du chapitre)."""
-    chapter_service.get_chapter(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
-    word_service.delete_word(word_id=word_id, user_id=current_user.user_id)
+    await chapter_service.check_chapter_access(chapter_id=chapter_id, book_id=book_id, user_id=current_user.user_id)
+    await word_service.delete_word(word_id=word_id, chapter_id=chapter_id, user_id=current_user.user_id)
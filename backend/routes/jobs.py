@@ -0,0 +1,38 @@
+"""
+Routes tâches d'extraction :
+    GET /jobs/{job_id}         → état de la tâche (polling), avec les mots une fois terminée
+    GET /jobs/{job_id}/events  → même état en Server-Sent Events, jusqu'à done / failed
+Protégées par le token JWT (Depends(get_current_user)).
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from dependencies import get_current_user
+from models import JobResponse, TokenData
+from services import job_service
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Retourne l'état d'une tâche de l'utilisateur connecté."""
+    return await job_service.get_job(job_id=job_id, user_id=current_user.user_id)
+
+
+@router.get("/{job_id}/events")
+async def stream_job(
+    job_id: int,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Flux SSE : un événement `job` à chaque changement d'état de la tâche."""
+    # Vérifie l'accès avant d'ouvrir le flux (403 en réponse HTTP normale).
+    await job_service.get_job(job_id=job_id, user_id=current_user.user_id)
+    return StreamingResponse(
+        job_service.stream_job_events(job_id=job_id, user_id=current_user.user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
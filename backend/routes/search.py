@@ -0,0 +1,33 @@
+"""
+Route recherche : GET /search.
+Protégée par le token JWT (Depends(get_current_user)).
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+import config
+from dependencies import get_current_user
+from models import SearchHitResponse, TokenData
+from services import search_service
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("", response_model=list[SearchHitResponse])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    book_id: Optional[int] = None,
+    limit: int = Query(config.PAGE_SIZE_DEFAULT, ge=1, le=config.PAGE_SIZE_MAX),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """
+    Recherche plein texte dans les chapitres de l'utilisateur connecté (optionnellement
+    d'un seul livre). Résultats classés par pertinence, avec un extrait surligné.
+    """
+    return await search_service.search_chapters(
+        user_id=current_user.user_id,
+        query=q,
+        limit=limit,
+        book_id=book_id,
+    )
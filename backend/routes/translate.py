@@ -1,6 +1,6 @@
 """
 Route traduction à la volée :
-  POST /translate  → traduit un mot via RapidAPI (sans stockage en DB)
+  POST /translate  → traduit un mot (lexique partagé ou RapidAPI, sans stockage en DB)
 """
 from fastapi import APIRouter, Depends
 
@@ -17,13 +17,12 @@ async def translate(
     current_user: TokenData = Depends(get_current_user),
 ):
     """
-    Traduit un mot du chapitre en français via RapidAPI.
+    Traduit un mot du chapitre en français (lexique partagé, sinon RapidAPI).
     La langue source est celle du livre associé au chapitre.
     Ne stocke rien en base.
     """
-    translation = await translation_service.translate_word(
+    return await translation_service.translate_word(
         chapter_id=body.chapter_id,
         user_id=current_user.user_id,
         word=body.word,
     )
-    return TranslateResponse(word=body.word, translation=translation)
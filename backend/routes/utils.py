@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
-from dependencies import get_current_user
+from dependencies import get_admin_user, get_current_user
 from models import TokenData
+from services import extraction_cache_service, vocabulary_service
 from services.pdf_service import extract_chapters_from_pdf
 
 router = APIRouter(prefix="/utils", tags=["Utils"])
@@ -29,4 +30,14 @@ async def preview_pdf(
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Erreur lors du traitement du PDF.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Erreur lors du traitement du PDF.")
+
+@router.get("/extraction-cache")
+async def extraction_cache_stats(current_user: TokenData = Depends(get_admin_user)):
+    """Compteurs du cache des extractions Gemini (hits, misses, evictions, taille). Réservé aux admins."""
+    return await extraction_cache_service.get_stats()
+
+@router.get("/gemini")
+async def gemini_stats(current_user: TokenData = Depends(get_admin_user)):
+    """État du disjoncteur Gemini et compteurs (tentatives, nouvelles tentatives, hedging) de ce processus. Réservé aux admins."""
+    return vocabulary_service.get_gemini_stats()
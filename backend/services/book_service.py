@@ -2,14 +2,17 @@
 Logique métier des livres.
 Orchestre les validations et délègue le SQL au repository.
 """
+import sqlite3
+
 from fastapi import HTTPException, status
 
-from models import BatchImportRequest, BookCreate, BookResponse
-from repositories import book_repository, chapter_repository
+from models import BatchImportRequest, BookCreate, BookResponse, Page
+from repositories.aio import book_repository
+from services import chapter_service, pagination_service
 
 
-def delete_book(book_id: int, user_id: int) -> None:
-    row = book_repository.get_book_by_id(book_id)
+async def delete_book(book_id: int, user_id: int) -> None:
+    row = await book_repository.get_book_by_id(book_id)
     if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -20,11 +23,11 @@ def delete_book(book_id: int, user_id: int) -> None:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Vous n'êtes pas autorisé à supprimer ce livre.",
         )
-    book_repository.delete_book(book_id)
+    await book_repository.delete_book(book_id)
 
 
-def get_book(book_id: int, user_id: int) -> BookResponse:
-    row = book_repository.get_book_by_id(book_id)
+async def get_book(book_id: int, user_id: int) -> BookResponse:
+    row = await book_repository.get_book_by_id(book_id)
     if not row:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Livre introuvable.")
     if row["user_id"] != user_id:
@@ -32,20 +35,27 @@ def get_book(book_id: int, user_id: int) -> BookResponse:
     return BookResponse(**dict(row))
 
 
-def get_user_books(user_id: int) -> list[BookResponse]:
-    rows = book_repository.get_books_by_user(user_id)
-    return [BookResponse(**dict(row)) for row in rows]
+async def get_user_books(user_id: int, limit: int, cursor: str | None = None) -> Page[BookResponse]:
+    """Page de livres, du plus récent au plus ancien (keyset sur created_at, id)."""
+    after = pagination_service.decode_cursor(cursor, (str, int))
+    rows = await book_repository.get_books_by_user(user_id, limit=limit + 1, after=after)
+    return pagination_service.build_page(
+        rows,
+        limit,
+        sort_key=lambda row: (row["created_at"], row["id"]),
+        to_item=lambda row: BookResponse(**dict(row)),
+    )
 
 
-def create_book(user_id: int, data: BookCreate) -> BookResponse:
-    new_id = book_repository.create_book(
+async def create_book(user_id: int, data: BookCreate) -> BookResponse:
+    new_id = await book_repository.create_book(
         user_id=user_id,
         title=data.title,
         author=data.author,
         language=data.language,
     )
 
-    row = book_repository.get_book_by_id(new_id)
+    row = await book_repository.get_book_by_id(new_id)
     if not row:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -54,30 +64,25 @@ def create_book(user_id: int, data: BookCreate) -> BookResponse:
     return BookResponse(**dict(row))
 
 
-def import_book_with_chapters(user_id: int, data: BatchImportRequest) -> BookResponse:
-    new_id = book_repository.create_book(
-        user_id=user_id,
-        title=data.title,
-        author=data.author,
-        language=data.language,
-    )
-
+async def import_book_with_chapters(user_id: int, data: BatchImportRequest) -> BookResponse:
     try:
-        for i, text in enumerate(data.chapters):
-            chapter_repository.create_chapter(
-                user_id=user_id,
-                book_id=new_id,
-                chapter_number=i + 1,
-                text=text,
-                level="B2",
-                translation_mode="translation"
-            )
-    except Exception as e:
-        book_repository.delete_book(new_id)
+        new_id = await book_repository.create_book_with_chapters(
+            user_id=user_id,
+            title=data.title,
+            author=data.author,
+            language=data.language,
+            chapters=[
+                {"text": text, "word_count": chapter_service.count_words(text)}
+                for text in data.chapters
+            ],
+            level="B2",
+            translation_mode="translation",
+        )
+    except sqlite3.Error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erreur lors de la création des chapitres.",
         )
 
-    row = book_repository.get_book_by_id(new_id)
+    row = await book_repository.get_book_by_id(new_id)
     return BookResponse(**dict(row))
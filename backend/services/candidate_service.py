@@ -0,0 +1,177 @@
+"""
+Présélection locale des mots candidats d'un chapitre (EXTRACTION_PROMPT_MODE=candidates,
+moteur d'extraction local, recherche dans le lexique partagé).
+
+Au lieu du texte entier (jusqu'à MAX_CHAPTER_WORDS mots), Gemini reçoit une courte liste
+de candidats avec un extrait de contexte chacun :
+    1. découpage du texte en mots (word_frequency.iter_words) ;
+    2. retrait des mots grammaticaux et des mots supposés connus au niveau demandé
+       (rang dans la table de fréquence sous KNOWN_RANK_BY_LEVEL[level]) ;
+    3. retrait des noms propres probables (toujours en majuscule, hors allemand) et des
+       mots `excluded` (déjà enregistrés par l'utilisateur, known_words_service) ;
+    4. les CANDIDATES_PER_WORD × word_count candidats les plus fréquents dans la langue
+       (les plus utiles à apprendre), les mots hors table (rares) en dernier.
+"""
+from word_frequency import KNOWN_RANK_BY_LEVEL, frequency_rank, has_table, iter_words
+
+CANDIDATES_PER_WORD = 4
+MIN_CANDIDATES = 20
+_MIN_WORD_LENGTH = 3
+_CONTEXT_WORDS = 5          # mots de contexte de chaque côté
+_MAX_CONTEXT_CHARS = 90
+# Langues où la majuscule ne signale pas un nom propre (tous les noms en prennent une).
+_CAPITALIZED_NOUN_LANGUAGES = {"de"}
+_SENTENCE_END = ".!?…«»\"“”—:;\n"
+
+
+def _is_sentence_start(text: str, start: int) -> bool:
+    i = start - 1
+    while i >= 0 and text[i].isspace():
+        i -= 1
+    return i < 0 or text[i] in _SENTENCE_END
+
+
+def _context(text: str, matches: list, index: int) -> str:
+    first = matches[max(index - _CONTEXT_WORDS, 0)]
+    last = matches[min(index + _CONTEXT_WORDS, len(matches) - 1)]
+    snippet = " ".join(text[first.start():last.end()].split())
+    if len(snippet) > _MAX_CONTEXT_CHARS:
+        snippet = snippet[:_MAX_CONTEXT_CHARS].rsplit(" ", 1)[0]
+    return snippet
+
+
+def _ranked_candidates(
+    text: str,
+    level: str,
+    language: str,
+    excluded: frozenset[str] = frozenset(),
+) -> tuple[list, list[list]] | None:
+    """
+    (mots du texte, candidats du plus fréquent au moins fréquent), None sans table pour
+    la langue. Candidat = [index de la 1re occurrence, rang, vu en minuscule, vu en
+    majuscule hors début de phrase]. `excluded` : formes en minuscules à écarter.
+    """
+    if not has_table(language):
+        return None
+
+    known_rank = KNOWN_RANK_BY_LEVEL[level]
+    check_proper_nouns = language not in _CAPITALIZED_NOUN_LANGUAGES
+    matches = list(iter_words(text))
+
+    # minuscules → [index de la 1re occurrence, rang, vu en minuscule, vu en majuscule
+    # hors début de phrase] ; None = mot connu au niveau demandé.
+    seen: dict[str, list | None] = {}
+    for index, match in enumerate(matches):
+        form = match.group()
+        key = form.lower()
+        # Trop court, ou tout en majuscules (sigle, chiffre romain).
+        if len(key) < _MIN_WORD_LENGTH or form.isupper():
+            continue
+        if key not in seen:
+            rank = frequency_rank(language, key)
+            known = key in excluded or (rank is not None and rank < known_rank)
+            seen[key] = None if known else [index, rank, False, False]
+        entry = seen[key]
+        if entry is None:
+            continue
+        if form[0].islower():
+            entry[2] = True
+        elif not _is_sentence_start(text, match.start()):
+            entry[3] = True
+
+    candidates = [
+        entry for entry in seen.values()
+        if entry is not None
+        # Nom propre probable : jamais en minuscule, en majuscule en milieu de phrase.
+        and not (check_proper_nouns and entry[3] and not entry[2])
+    ]
+    # Les plus fréquents d'abord (rang croissant), hors table en dernier.
+    candidates.sort(key=lambda entry: (entry[1] is None, entry[1] or 0, entry[0]))
+    return matches, candidates
+
+
+def _shortlist(candidates: list[list], word_count: int) -> list[list]:
+    return candidates[:max(word_count * CANDIDATES_PER_WORD, MIN_CANDIDATES)]
+
+
+def select_candidates(
+    text: str,
+    level: str,
+    language: str,
+    word_count: int,
+    excluded: frozenset[str] = frozenset(),
+) -> list[tuple[str, str]] | None:
+    """
+    Candidats (forme telle qu'écrite dans le texte, contexte), dans l'ordre du texte,
+    hors formes `excluded` (minuscules).
+    None si la présélection n'est pas possible (pas de table pour la langue) ou laisse
+    moins de `word_count` candidats : le prompt complet doit alors être utilisé.
+    """
+    ranked = _ranked_candidates(text, level, language, excluded)
+    if ranked is None or len(ranked[1]) < word_count:
+        return None
+    matches, candidates = ranked
+
+    kept = sorted(_shortlist(candidates, word_count), key=lambda entry: entry[0])
+    return [(matches[entry[0]].group(), _context(text, matches, entry[0])) for entry in kept]
+
+
+def ranked_forms(
+    text: str,
+    level: str,
+    language: str,
+    word_count: int,
+    excluded: frozenset[str] = frozenset(),
+) -> list[str]:
+    """
+    Formes (telles qu'écrites) des mêmes candidats que select_candidates, du plus fréquent
+    au moins fréquent. [] si pas de table pour la langue.
+    """
+    ranked = _ranked_candidates(text, level, language, excluded)
+    if ranked is None:
+        return []
+    matches, candidates = ranked
+    return [matches[entry[0]].group() for entry in _shortlist(candidates, word_count)]
+
+
+def top_words(
+    text: str,
+    level: str,
+    language: str,
+    word_count: int,
+    excluded: frozenset[str] = frozenset(),
+) -> list[tuple[str, str, str]] | None:
+    """
+    Les `word_count` candidats les plus fréquents hors `excluded`, du plus fréquent au moins
+    fréquent : (forme telle qu'écrite, forme de base, contexte). Forme de base = forme en
+    minuscules, sauf en allemand pour un mot jamais écrit en minuscule (nom). Pas de
+    lemmatisation. None si pas de table pour la langue ou moins de `word_count` candidats.
+    """
+    ranked = _ranked_candidates(text, level, language, excluded)
+    if ranked is None or len(ranked[1]) < word_count:
+        return None
+    matches, candidates = ranked
+
+    words = []
+    for index, _rank, seen_lower, _seen_capitalized in candidates[:word_count]:
+        form = matches[index].group()
+        base_form = form if language in _CAPITALIZED_NOUN_LANGUAGES and not seen_lower else form.lower()
+        words.append((form, base_form, _context(text, matches, index)))
+    return words
+
+
+def known_forms(text: str, level: str, language: str, excluded: frozenset[str]) -> list[str]:
+    """
+    Formes `excluded` présentes dans le texte parmi celles qui seraient candidates (mots
+    que Gemini pourrait choisir), du plus fréquent au moins fréquent ; tous les mots du
+    texte si pas de table pour la langue.
+    """
+    if not excluded:
+        return []
+    ranked = _ranked_candidates(text, level, language)
+    if ranked is None:
+        forms = (match.group().lower() for match in iter_words(text))
+    else:
+        matches, candidates = ranked
+        forms = (matches[entry[0]].group().lower() for entry in candidates)
+    return list(dict.fromkeys(form for form in forms if form in excluded))
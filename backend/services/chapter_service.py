@@ -4,117 +4,142 @@ L'appel Gemini est dans vocabulary_service.py.
 """
 from fastapi import HTTPException, status
 
-from models import ChapterCreateRequest, ChapterResponse
-from repositories import book_repository, chapter_repository
+from models import ChapterCreateRequest, ChapterResponse, ChapterSummaryResponse, Page
+from repositories.aio import book_repository, chapter_repository
+from services import pagination_service
 
 MAX_CHAPTER_WORDS = 2000
 
 
-def _to_chapter_response(row) -> ChapterResponse:
+def count_words(text: str) -> int:
+    """Nombre de mots séparés par des blancs (même règle que countWords() côté frontend)."""
+    return len(text.split())
+
+
+def recommend_words_to_extract(word_count: int) -> int:
+    """Nombre de mots à extraire conseillé pour un chapitre (même règle que recommendWords() côté frontend)."""
+    # int(x + 0.5) et non round() : arrondit .5 vers le haut comme Math.round().
+    return max(5, min(int(word_count * 0.05 + 0.5), 50))
+
+
+def _with_default_title(row) -> dict:
     data = dict(row)
     if not data.get("title"):
         data["title"] = f"Chapitre {data['chapter_number']}"
-    return ChapterResponse(**data)
+    return data
 
 
-def create_chapter(user_id: int, book_id: int, data: ChapterCreateRequest) -> ChapterResponse:
+def _to_chapter_response(row) -> ChapterResponse:
+    return ChapterResponse(**_with_default_title(row))
+
+
+async def create_chapter(user_id: int, book_id: int, data: ChapterCreateRequest) -> ChapterResponse:
     """Persiste le chapitre en base et retourne le modèle de réponse."""
-    word_count = len(data.text.strip().split()) if data.text.strip() else 0
+    word_count = count_words(data.text)
     if word_count > MAX_CHAPTER_WORDS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Texte trop long : {word_count} mots (limite : {MAX_CHAPTER_WORDS}).",
         )
 
-    new_id = chapter_repository.create_chapter(
+    row = await chapter_repository.create_chapter(
         user_id=user_id,
         book_id=book_id,
         chapter_number=data.chapter_number,
         text=data.text,
+        word_count=word_count,
         level=data.level,
         translation_mode=data.translation_mode,
     )
-    row = chapter_repository.get_chapter_by_id(new_id)
-    if not row:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erreur lors de la création du chapitre.",
-        )
     return _to_chapter_response(row)
 
 
-def get_chapters(book_id: int, user_id: int) -> list[ChapterResponse]:
-    """Retourne les chapitres d'un livre après vérification d'ownership."""
-    book = book_repository.get_book_by_id(book_id)
+async def get_chapters(
+    book_id: int,
+    user_id: int,
+    limit: int,
+    cursor: str | None = None,
+) -> Page[ChapterSummaryResponse]:
+    """
+    Retourne une page de résumés (sans texte) des chapitres d'un livre après vérification
+    d'ownership. Keyset sur (chapter_number, id).
+    """
+    book = await book_repository.get_book_by_id(book_id)
     if not book or book["user_id"] != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
 
-    rows = chapter_repository.get_chapters_by_book_and_user(book_id=book_id, user_id=user_id)
-    return [_to_chapter_response(row) for row in rows]
+    after = pagination_service.decode_cursor(cursor, (int, int))
+    rows = await chapter_repository.get_chapters_by_book_and_user(
+        book_id=book_id,
+        user_id=user_id,
+        limit=limit + 1,
+        after=after,
+    )
+    return pagination_service.build_page(
+        rows,
+        limit,
+        sort_key=lambda row: (row["chapter_number"], row["id"]),
+        to_item=lambda row: ChapterSummaryResponse(**_with_default_title(row)),
+    )
 
 
-def get_chapter(chapter_id: int, book_id: int, user_id: int) -> ChapterResponse:
-    """
-    Retourne un chapitre en vérifiant l'ownership.
-    Retourne toujours 403 — que le chapitre n'existe pas ou qu'il appartienne
-    à un autre user — pour ne pas leaker l'existence des IDs.
-    """
-    row = chapter_repository.get_chapter_by_id(chapter_id)
-    if not row or row["user_id"] != user_id or row["book_id"] != book_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
+def _forbidden() -> HTTPException:
+    # Toujours 403 — que le chapitre n'existe pas ou qu'il appartienne à un autre
+    # user / livre — pour ne pas leaker l'existence des IDs.
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
+
+
+async def get_chapter(chapter_id: int, book_id: int, user_id: int) -> ChapterResponse:
+    """Retourne un chapitre en vérifiant l'ownership (une requête filtrée par id, book_id et user_id)."""
+    row = await chapter_repository.get_chapter_for_user(chapter_id, book_id, user_id)
+    if not row:
+        raise _forbidden()
     return _to_chapter_response(row)
 
 
-def delete_chapter(chapter_id: int, book_id: int, user_id: int) -> None:
-    """Supprime un chapitre. Même réponse 403 que get_chapter si non accessible."""
-    row = chapter_repository.get_chapter_by_id(chapter_id)
-    if not row or row["user_id"] != user_id or row["book_id"] != book_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
-    chapter_repository.delete_chapter(chapter_id)
+async def check_chapter_access(chapter_id: int, book_id: int, user_id: int) -> None:
+    """Vérifie l'ownership sans charger le chapitre. Même réponse 403 que get_chapter."""
+    if not await chapter_repository.chapter_exists_for_user(chapter_id, book_id, user_id):
+        raise _forbidden()
 
 
-def mark_chapter_done(chapter_id: int, book_id: int, user_id: int) -> None:
-    """Passe le statut du chapitre à 'done' après vérification d'ownership."""
-    row = chapter_repository.get_chapter_by_id(chapter_id)
-    if not row or row["user_id"] != user_id or row["book_id"] != book_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
-    chapter_repository.update_chapter_status(chapter_id, "done")
+async def delete_chapter(chapter_id: int, book_id: int, user_id: int) -> None:
+    """Supprime un chapitre. Même réponse 403 que get_chapter si non accessible."""
+    if not await chapter_repository.delete_chapter(chapter_id, book_id, user_id):
+        raise _forbidden()
 
 
-def update_learning_settings(
+async def update_learning_settings(
     chapter_id: int,
     book_id: int,
     user_id: int,
     level: str,
     translation_mode: str,
 ) -> ChapterResponse:
-    row = chapter_repository.get_chapter_by_id(chapter_id)
-    if not row or row["user_id"] != user_id or row["book_id"] != book_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
-
-    chapter_repository.update_chapter_learning_settings(
+    updated = await chapter_repository.update_chapter_learning_settings(
         chapter_id=chapter_id,
+        book_id=book_id,
+        user_id=user_id,
         level=level,
         translation_mode=translation_mode,
     )
-    updated = chapter_repository.get_chapter_by_id(chapter_id)
     if not updated:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chapitre introuvable.")
+        raise _forbidden()
     return _to_chapter_response(updated)
 
 
-def update_chapter_title(
+async def update_chapter_title(
     chapter_id: int,
     book_id: int,
     user_id: int,
     title: str,
 ) -> ChapterResponse:
-    row = chapter_repository.get_chapter_by_id(chapter_id)
-    if not row or row["user_id"] != user_id or row["book_id"] != book_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
-
-    chapter_repository.update_chapter_title(chapter_id=chapter_id, title=title)
-    updated = chapter_repository.get_chapter_by_id(chapter_id)
+    updated = await chapter_repository.update_chapter_title(
+        chapter_id=chapter_id,
+        book_id=book_id,
+        user_id=user_id,
+        title=title,
+    )
     if not updated:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chapitre introuvable.")
+        raise _forbidden()
     return _to_chapter_response(updated)
@@ -1,10 +1,7 @@
 """Service dedie a l'envoi d'emails transactionnels via Resend."""
 
-import httpx
-
 import config
-
-RESEND_API_URL = "https://api.resend.com/emails"
+from http_clients import get_sync_client
 
 
 def send_verification_email(to_email: str, username: str, verify_url: str) -> None:
@@ -38,6 +35,6 @@ def send_verification_email(to_email: str, username: str, verify_url: str) -> No
         "Content-Type": "application/json",
     }
 
-    with httpx.Client(timeout=10.0) as client:
-        response = client.post(RESEND_API_URL, json=payload, headers=headers)
-        response.raise_for_status()
+    # Client partage (keep-alive) ; timeout : RESEND_TIMEOUT_SECONDS.
+    response = get_sync_client("resend").post(config.RESEND_API_URL, json=payload, headers=headers)
+    response.raise_for_status()
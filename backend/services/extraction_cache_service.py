@@ -0,0 +1,113 @@
+"""
+Cache persistant des extractions de vocabulaire (table extraction_cache).
+
+Clé = SHA-256 de (texte normalisé, niveau, langue, nombre de mots, mode, version du prompt,
+modèle) : un même chapitre ré-extrait avec les mêmes réglages — ou le même livre du domaine
+public importé par un autre utilisateur — ne rappelle pas Gemini.
+La clé ne dépend pas des mots de l'utilisateur : le cache garde l'extraction non filtrée,
+dont vocabulary_service écarte à la lecture les mots déjà connus du lecteur.
+Taille bornée (EXTRACTION_CACHE_MAX_MB), éviction LRU dans le repository.
+
+Un lookup est une lecture seule : last_used_at n'est réécrit que s'il date de plus de
+EXTRACTION_CACHE_TOUCH_MINUTES (LRU à cette précision près) ; hits et misses sont comptés
+dans ce processus et ajoutés à extraction_cache_stats par lots (flush_stats), au plus
+toutes les EXTRACTION_CACHE_STATS_FLUSH_SECONDS, à l'arrêt et avant chaque lecture des compteurs.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import Counter
+
+import config
+from models import WordItem
+from repositories.aio import extraction_cache_repository
+
+logger = logging.getLogger("chapterprep.extraction_cache")
+
+# Compteurs de ce processus pas encore ajoutés à la base.
+_pending_hits: Counter[str] = Counter()
+_pending_misses = 0
+_last_flush = time.monotonic()
+
+
+def cache_key(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    translation_mode: str,
+    prompt_version: int | str,
+    model: str,
+) -> str:
+    # prompt_version : PROMPT_VERSION (texte complet) ou "candidates-N" (EXTRACTION_PROMPT_MODE).
+    # Texte normalisé : les différences de blancs (copier-coller, retours ligne) ne changent pas la clé.
+    normalized_text = " ".join(text.split())
+    parts = [normalized_text, level, target_language, word_count, translation_mode, prompt_version, model]
+    material = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+async def get_cached_words(key: str) -> list[WordItem] | None:
+    """Mots en cache pour cette clé, ou None. Une erreur SQLite est traitée comme un miss."""
+    global _pending_misses
+    if not config.EXTRACTION_CACHE_ENABLED:
+        return None
+    try:
+        row = await extraction_cache_repository.get_cached_extraction(key, config.EXTRACTION_CACHE_TOUCH_MINUTES)
+    except sqlite3.Error:
+        logger.exception("Lecture du cache d'extraction impossible")
+        return None
+    if row is None:
+        _pending_misses += 1
+    else:
+        _pending_hits[key] += 1
+        if row["stale"]:
+            try:
+                await extraction_cache_repository.touch_extraction(key)
+            except sqlite3.Error:
+                # LRU moins précis, le hit reste servi.
+                logger.exception("Mise à jour de last_used_at impossible")
+    if time.monotonic() - _last_flush >= config.EXTRACTION_CACHE_STATS_FLUSH_SECONDS:
+        await flush_stats()
+    if row is None:
+        return None
+    return [WordItem(**item) for item in json.loads(row["words"])]
+
+
+async def store_words(key: str, words: list[WordItem]) -> None:
+    """Met les mots en cache. Une erreur SQLite est loggée sans faire échouer l'extraction."""
+    if not config.EXTRACTION_CACHE_ENABLED:
+        return
+    payload = json.dumps([w.model_dump() for w in words], ensure_ascii=False)
+    try:
+        await extraction_cache_repository.store_extraction(
+            key,
+            payload,
+            max_bytes=int(config.EXTRACTION_CACHE_MAX_MB * 1024 * 1024),
+        )
+    except sqlite3.Error:
+        logger.exception("Écriture du cache d'extraction impossible")
+
+
+async def flush_stats() -> None:
+    """Ajoute à extraction_cache_stats les hits / misses comptés depuis le dernier lot."""
+    global _pending_hits, _pending_misses, _last_flush
+    hits, misses = _pending_hits, _pending_misses
+    _pending_hits, _pending_misses, _last_flush = Counter(), 0, time.monotonic()
+    if not hits and not misses:
+        return
+    try:
+        await extraction_cache_repository.add_extraction_cache_counts(dict(hits), misses)
+    except sqlite3.Error:
+        logger.exception("Écriture des compteurs du cache d'extraction impossible")
+        # Gardés pour le lot suivant.
+        _pending_hits.update(hits)
+        _pending_misses += misses
+
+
+async def get_stats() -> dict:
+    """hits, misses, evictions, total_bytes, entries (lots en attente des autres processus non compris)."""
+    await flush_stats()
+    return dict(await extraction_cache_repository.get_extraction_cache_stats())
@@ -0,0 +1,409 @@
+"""
+Tâches d'extraction de vocabulaire en arrière-plan.
+
+Les routes d'extraction enregistrent une tâche (table extraction_jobs) et répondent 202.
+EXTRACTION_WORKERS tâches asyncio, démarrées par le lifespan de main.py, prennent les
+tâches en file une par une (job_repository.claim_next_job) et appellent Gemini : la
+requête HTTP ne reste plus ouverte pendant l'appel. Avec EXTRACTION_PACK_MAX_CHAPTERS > 1,
+un worker qui prend une tâche d'un livre entier prend aussi les suivantes du même livre
+(chapitres courts) et les extrait en un seul appel (vocabulary_service.extract_pack).
+
+Les tâches survivent à un redémarrage : 'queued' est repris au démarrage, 'running'
+d'un worker arrêté brutalement est repris à l'expiration de son bail (JOB_LEASE_SECONDS),
+prolongé tant que le worker la traite. Un worker dont la tâche a été reprise n'y écrit
+plus (écritures gardées par la tentative prise, job_repository).
+Le client suit la tâche par GET /jobs/{id} (polling) ou GET /jobs/{id}/events (SSE).
+Les mots sont enregistrés au fil de la réponse Gemini (streaming) : `words` d'une tâche
+'running' contient ceux déjà reçus, et le flux SSE envoie un événement `word` par mot.
+"""
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import HTTPException, status
+
+import config
+from instrumentation import untracked_queries
+from models import BookExtractionProgressResponse, JobResponse, WordItem
+from repositories.aio import chapter_repository, job_repository
+from services import chapter_service, known_words_service, usage_service, vocabulary_service
+
+logger = logging.getLogger("chapterprep.jobs")
+
+_TERMINAL_STATUSES = ("done", "failed")
+# Les tâches d'un livre entier passent après les extractions demandées chapitre par
+# chapitre (priorité 0, valeur par défaut de la colonne).
+_PRIORITY_BOOK = 1
+_SSE_KEEPALIVE_SECONDS = 15
+
+_workers: list[asyncio.Task] = []
+# Réveille les workers dès qu'une tâche est créée (sinon : JOB_POLL_INTERVAL_SECONDS).
+_job_queued: asyncio.Event | None = None
+# Réveille les flux SSE à chaque changement d'état d'une tâche de ce processus.
+_job_changed: asyncio.Condition | None = None
+
+
+def _to_job_response(row) -> JobResponse:
+    words = None
+    if row["result"] is not None:
+        words = [WordItem(**item) for item in json.loads(row["result"])]
+    return JobResponse(
+        id=row["id"],
+        status=row["status"],
+        engine=row["engine"],
+        book_id=row["book_id"],
+        chapter_id=row["chapter_id"],
+        words=words,
+        error=row["error"],
+        created_at=row["created_at"],
+        finished_at=row["finished_at"],
+    )
+
+
+def _words_json(words: list[WordItem]) -> str:
+    return json.dumps([w.model_dump() for w in words], ensure_ascii=False)
+
+
+def _forbidden() -> HTTPException:
+    # Même réponse que la tâche n'existe pas ou appartienne à un autre user.
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
+
+
+async def _notify_job_changed() -> None:
+    if _job_changed is not None:
+        async with _job_changed:
+            _job_changed.notify_all()
+
+
+async def _wait_job_changed(timeout: float) -> bool:
+    """Attend un changement d'état de tâche dans ce processus. False si `timeout` écoulé."""
+    if _job_changed is None:
+        await asyncio.sleep(timeout)
+        return False
+    try:
+        async with _job_changed:
+            await asyncio.wait_for(_job_changed.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+# ─── Création / lecture ──────────────────────────────────────
+
+async def enqueue_extraction(
+    user_id: int,
+    book_id: int,
+    chapter_id: int,
+    target_language: str,
+    level: str,
+    translation_mode: str,
+    words_to_extract: int,
+    engine: str | None = None,
+    delete_chapter_on_failure: bool = False,
+) -> JobResponse:
+    """
+    Enregistre une tâche d'extraction pour un chapitre déjà vérifié (ownership).
+    `engine` None : EXTRACTION_ENGINE.
+    `delete_chapter_on_failure` : le chapitre vient d'être créé pour cette extraction
+    et est supprimé si elle échoue (comportement de POST /books/{book_id}/chapters).
+    """
+    row = await job_repository.create_job(
+        user_id=user_id,
+        book_id=book_id,
+        chapter_id=chapter_id,
+        target_language=target_language,
+        level=level,
+        translation_mode=translation_mode,
+        words_to_extract=words_to_extract,
+        engine=engine or config.EXTRACTION_ENGINE,
+        delete_chapter_on_failure=delete_chapter_on_failure,
+    )
+    if _job_queued is not None:
+        _job_queued.set()
+    return _to_job_response(row)
+
+
+async def enqueue_book_extraction(
+    user_id: int,
+    book_id: int,
+    target_language: str,
+    words_to_extract: int | None = None,
+    engine: str | None = None,
+) -> BookExtractionProgressResponse:
+    """
+    Met en file l'extraction de tous les chapitres 'pending' d'un livre déjà vérifié
+    (ownership), chacun avec son niveau et son mode. `words_to_extract` None : nombre
+    conseillé selon la longueur de chaque chapitre ; `engine` None : EXTRACTION_ENGINE.
+    Reprise : les chapitres déjà en file ou déjà extraits avec les mêmes réglages sont
+    ignorés, seuls ceux sans tâche ou en échec sont (re)mis en file.
+    Le débit vers Gemini est borné par le limiteur de vocabulary_service, la concurrence
+    par EXTRACTION_WORKERS.
+    """
+    chapters = await chapter_repository.get_pending_chapters_for_extraction(book_id, user_id)
+    created = await job_repository.create_book_jobs(
+        user_id=user_id,
+        book_id=book_id,
+        target_language=target_language,
+        chapters=[
+            (
+                chapter["id"],
+                chapter["level"],
+                chapter["translation_mode"],
+                words_to_extract or chapter_service.recommend_words_to_extract(chapter["word_count"]),
+            )
+            for chapter in chapters
+        ],
+        engine=engine or config.EXTRACTION_ENGINE,
+        priority=_PRIORITY_BOOK,
+    )
+    if created and _job_queued is not None:
+        _job_queued.set()
+    progress = await get_book_extraction_progress(book_id, user_id)
+    progress.jobs_created = created
+    return progress
+
+
+async def get_book_extraction_progress(book_id: int, user_id: int) -> BookExtractionProgressResponse:
+    """Compteurs d'extraction d'un livre déjà vérifié (ownership)."""
+    row = await job_repository.get_book_extraction_progress(book_id, user_id)
+    return BookExtractionProgressResponse(book_id=book_id, **dict(row))
+
+
+async def get_job(job_id: int, user_id: int) -> JobResponse:
+    row = await job_repository.get_job_for_user(job_id, user_id)
+    if not row:
+        raise _forbidden()
+    return _to_job_response(row)
+
+
+async def stream_job_events(job_id: int, user_id: int) -> AsyncIterator[str]:
+    """
+    Flux SSE : un événement `word` (WordItem en JSON) par mot reçu pendant l'extraction,
+    un événement `job` (JobResponse en JSON) à chaque changement d'état, jusqu'à 'done'
+    ou 'failed'. Vérifier l'accès (get_job) avant d'ouvrir le flux.
+    Relectures hors des compteurs SQL de la requête : une par réveil, pas un N+1.
+    """
+    last_status = None
+    sent_words = 0
+    idle_seconds = 0.0
+    while True:
+        with untracked_queries():
+            job = await get_job(job_id, user_id)
+        if job.words and len(job.words) > sent_words:
+            idle_seconds = 0.0
+            for word in job.words[sent_words:]:
+                yield f"event: word\ndata: {word.model_dump_json()}\n\n"
+            sent_words = len(job.words)
+        if job.status != last_status:
+            last_status = job.status
+            idle_seconds = 0.0
+            yield f"event: job\ndata: {job.model_dump_json()}\n\n"
+            if job.status in _TERMINAL_STATUSES:
+                return
+        elif idle_seconds >= _SSE_KEEPALIVE_SECONDS:
+            idle_seconds = 0.0
+            yield ": keep-alive\n\n"
+
+        # Réveil immédiat si la tâche est traitée par ce processus ; sinon relecture
+        # chaque seconde (tâche prise par un autre worker uvicorn).
+        if not await _wait_job_changed(timeout=1.0):
+            idle_seconds += 1.0
+
+
+# ─── Workers ─────────────────────────────────────────────────
+
+async def _run_job(job) -> None:
+    chapter = None
+    if job["chapter_id"] is not None:
+        chapter = await chapter_repository.get_chapter_for_user(
+            job["chapter_id"], job["book_id"], job["user_id"]
+        )
+    if chapter is None:
+        await job_repository.fail_job(job["id"], job["attempts"], "Le chapitre a été supprimé.")
+        return
+
+    words: list[WordItem] = []
+    usage = vocabulary_service.ExtractionUsage()
+    known_words = await known_words_service.get_known_words(job["user_id"], job["target_language"])
+    try:
+        async for word in vocabulary_service.stream_vocabulary(
+            text=chapter["text"],
+            level=job["level"],
+            target_language=job["target_language"],
+            word_count=job["words_to_extract"],
+            translation_mode=job["translation_mode"],
+            engine=job["engine"],
+            usage=usage,
+            known_words=known_words,
+        ):
+            words.append(word)
+            if not await job_repository.save_partial_result(job["id"], job["attempts"], _words_json(words)):
+                # Bail perdu : la tâche a été reprise par un autre worker, qui la termine.
+                logger.warning("Tâche d'extraction %d reprise par un autre worker", job["id"])
+                break
+            await _notify_job_changed()
+    except HTTPException as exc:
+        await usage_service.record_extraction(
+            job["user_id"], job["book_id"], job["level"], job["translation_mode"], usage
+        )
+        failed = await job_repository.fail_job(job["id"], job["attempts"], str(exc.detail))
+        if failed and job["delete_chapter_on_failure"]:
+            await chapter_repository.delete_chapter(job["chapter_id"], job["book_id"], job["user_id"])
+        return
+
+    await usage_service.record_extraction(
+        job["user_id"], job["book_id"], job["level"], job["translation_mode"], usage
+    )
+    await job_repository.complete_job(job["id"], job["attempts"], _words_json(words))
+
+
+async def _run_pack(jobs: list) -> None:
+    """
+    Extraction groupée (EXTRACTION_PACK_MAX_CHAPTERS) : tâches d'un même livre et mêmes
+    réglages (job_repository.claim_pack_jobs) en un seul appel Gemini. Une tâche que la
+    réponse groupée ne sert pas est ensuite extraite seule (_run_job), bail prolongé
+    d'abord : les extractions seules qui la précèdent ont pu durer plus que lui.
+    """
+    first = jobs[0]
+    chapters = {}
+    for job in jobs:
+        chapter = await chapter_repository.get_chapter_for_user(job["chapter_id"], job["book_id"], job["user_id"])
+        if chapter is None:
+            await job_repository.fail_job(job["id"], job["attempts"], "Le chapitre a été supprimé.")
+        else:
+            chapters[job["id"]] = chapter
+
+    usage = vocabulary_service.ExtractionUsage()
+    known_words = await known_words_service.get_known_words(first["user_id"], first["target_language"])
+    results = await vocabulary_service.extract_pack(
+        chapters=[
+            (chapters[job["id"]]["id"], chapters[job["id"]]["text"], job["words_to_extract"])
+            for job in jobs if job["id"] in chapters
+        ],
+        level=first["level"],
+        target_language=first["target_language"],
+        translation_mode=first["translation_mode"],
+        known_words=known_words,
+        usage=usage,
+    )
+    await usage_service.record_extraction(
+        first["user_id"], first["book_id"], first["level"], first["translation_mode"], usage
+    )
+
+    for job in jobs:
+        if job["id"] not in chapters:
+            continue
+        words = results.get(job["chapter_id"])
+        if words is None:
+            if await job_repository.renew_lease(job["id"], job["attempts"], config.JOB_LEASE_SECONDS):
+                await _run_job(job)
+            else:
+                logger.warning("Tâche d'extraction %d reprise par un autre worker", job["id"])
+        else:
+            await job_repository.complete_job(job["id"], job["attempts"], _words_json(words))
+        await _notify_job_changed()
+
+
+async def _claim_pack(job) -> list:
+    """
+    Tâches prises pour être extraites avec `job` en un seul appel ([] : extraction seule).
+    Seulement les tâches Gemini d'un livre entier : les extractions demandées chapitre par
+    chapitre gardent leur flux de mots.
+    """
+    if (
+        config.EXTRACTION_PACK_MAX_CHAPTERS <= 1
+        or job["engine"] != "gemini"
+        or job["priority"] != _PRIORITY_BOOK
+        or job["chapter_id"] is None
+    ):
+        return []
+    return await job_repository.claim_pack_jobs(
+        job,
+        max_jobs=config.EXTRACTION_PACK_MAX_CHAPTERS - 1,
+        max_words=config.EXTRACTION_PACK_MAX_WORDS,
+        lease_seconds=config.JOB_LEASE_SECONDS,
+    )
+
+
+async def _keep_leases(jobs: list) -> None:
+    """
+    Prolonge le bail des tâches prises tous les tiers de JOB_LEASE_SECONDS, tant que le
+    worker les traite : une extraction plus longue que le bail n'est pas reprise par un
+    autre worker. Une tâche terminée ou perdue (renew_lease False) n'est plus prolongée.
+    """
+    owned = list(jobs)
+    while owned:
+        await asyncio.sleep(config.JOB_LEASE_SECONDS / 3)
+        for job in list(owned):
+            try:
+                if not await job_repository.renew_lease(job["id"], job["attempts"], config.JOB_LEASE_SECONDS):
+                    owned.remove(job)
+            except Exception:
+                logger.exception("Tâche d'extraction %d : bail non prolongé", job["id"])
+
+
+async def _worker_loop(worker_number: int) -> None:
+    while True:
+        # Remis à zéro avant la prise : une tâche créée pendant claim_next_job réveille le wait.
+        _job_queued.clear()
+        try:
+            job = await job_repository.claim_next_job(config.JOB_LEASE_SECONDS, config.JOB_MAX_ATTEMPTS)
+        except Exception:
+            logger.exception("Worker %d : prise de tâche impossible", worker_number)
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(_job_queued.wait(), timeout=config.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            jobs = [job, *await _claim_pack(job)]
+        except Exception:
+            logger.exception("Worker %d : extraction groupée impossible", worker_number)
+            jobs = [job]
+
+        await _notify_job_changed()
+        heartbeat = asyncio.create_task(_keep_leases(jobs), name=f"extraction-lease-{job['id']}")
+        try:
+            if len(jobs) > 1:
+                await _run_pack(jobs)
+            else:
+                await _run_job(job)
+        except asyncio.CancelledError:
+            # Arrêt propre de l'app : les tâches sont rendues à la file, sans attendre leur bail
+            # (sans effet sur celles déjà terminées).
+            for pending_job in jobs:
+                await job_repository.requeue_job(pending_job["id"], pending_job["attempts"])
+            raise
+        except Exception:
+            logger.exception("Tâche d'extraction %d en échec", job["id"])
+            for pending_job in jobs:
+                await job_repository.fail_job(
+                    pending_job["id"], pending_job["attempts"], "Erreur interne pendant l'extraction."
+                )
+        finally:
+            heartbeat.cancel()
+        await _notify_job_changed()
+
+
+async def start_workers() -> None:
+    """Démarre EXTRACTION_WORKERS workers (appelé au démarrage)."""
+    global _job_queued, _job_changed
+    _job_queued = asyncio.Event()
+    _job_changed = asyncio.Condition()
+    _workers.extend(
+        asyncio.create_task(_worker_loop(n), name=f"extraction-worker-{n}")
+        for n in range(config.EXTRACTION_WORKERS)
+    )
+
+
+async def stop_workers() -> None:
+    """Arrête les workers ; les tâches en cours retournent dans la file (appelé à l'arrêt)."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
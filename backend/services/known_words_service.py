@@ -0,0 +1,57 @@
+"""
+Mots déjà enregistrés par un utilisateur (table words, tous livres, statut indifférent),
+exclus de ses extractions suivantes : Gemini ne repropose pas un mot gardé deux
+chapitres plus tôt.
+
+Ensemble en mémoire par utilisateur et par langue : formes et formes de base en
+minuscules. Gardé pour KNOWN_WORDS_CACHE_USERS utilisateurs au plus (les moins
+récemment servis sont oubliés) et invalidé à chaque écriture de mots : l'empreinte
+(nombre de mots, plus grand id) est relue à chaque extraction, une requête sur
+idx_words_user, et l'ensemble n'est reconstruit que si elle a changé — y compris
+après une écriture servie par un autre worker uvicorn.
+"""
+import logging
+import sqlite3
+from collections import OrderedDict
+
+import config
+from repositories.aio import word_repository
+
+logger = logging.getLogger("chapterprep.known_words")
+
+# user_id → (empreinte, langue → formes et formes de base en minuscules).
+_known: OrderedDict[int, tuple[tuple[int, int], dict[str, frozenset[str]]]] = OrderedDict()
+
+
+def _by_language(rows) -> dict[str, frozenset[str]]:
+    forms: dict[str, set[str]] = {}
+    for row in rows:
+        # lower() de SQLite ne gère que l'ASCII : minuscules faites en Python.
+        forms.setdefault(row["language"], set()).update((row["word"].lower(), row["base_form"].lower()))
+    return {language: frozenset(words) for language, words in forms.items()}
+
+
+async def get_known_words(user_id: int, language: str) -> frozenset[str]:
+    """
+    Formes et formes de base (minuscules) des mots de l'utilisateur dans cette langue.
+    Vide si KNOWN_WORDS_ENABLED=false ; une erreur SQLite vaut « aucun mot connu ».
+    """
+    if not config.KNOWN_WORDS_ENABLED:
+        return frozenset()
+    try:
+        stamp = await word_repository.get_user_words_stamp(user_id)
+        cached = _known.get(user_id)
+        if cached is not None and cached[0] == stamp:
+            _known.move_to_end(user_id)
+            return cached[1].get(language, frozenset())
+
+        by_language = _by_language(await word_repository.get_user_known_words(user_id))
+    except sqlite3.Error:
+        logger.exception("Lecture des mots connus de l'utilisateur %d impossible", user_id)
+        return frozenset()
+
+    _known[user_id] = (stamp, by_language)
+    _known.move_to_end(user_id)
+    while len(_known) > config.KNOWN_WORDS_CACHE_USERS:
+        _known.popitem(last=False)
+    return by_language.get(language, frozenset())
@@ -0,0 +1,112 @@
+"""
+Lexique partagé entre utilisateurs : (langue, forme de base, mode) → traduction ou définition.
+
+Alimenté par les mots produits par Gemini et par les mots confirmés par les utilisateurs.
+Sert avant Gemini ou RapidAPI :
+    - extraction : les candidats du chapitre (candidate_service) déjà dans le lexique
+      remplissent autant de places, Gemini n'est appelé que pour les places restantes ;
+    - traduction à la volée (mode "translation") et ajout d'un mot : forme de base et
+      traduction connues, sans appel RapidAPI.
+Une forme est rattachée à la première forme de base vue (homographes non distingués).
+Désactivable avec LEXICON_ENABLED ; LEXICON_MIN_CONFIRMATIONS=1 ne sert que des entrées
+gardées par au moins un utilisateur.
+"""
+import logging
+import sqlite3
+
+import config
+from models import WordItem
+from repositories.aio import lexicon_repository
+from services import candidate_service
+
+logger = logging.getLogger("chapterprep.lexicon")
+
+
+async def _entries_by_form(language: str, translation_mode: str, forms: list[str]) -> dict[str, dict]:
+    """forme en minuscules → {base_form, output}. Une erreur SQLite vaut « inconnu »."""
+    if not config.LEXICON_ENABLED or not forms:
+        return {}
+    try:
+        rows = await lexicon_repository.get_entries_by_forms(
+            language=language,
+            translation_mode=translation_mode,
+            forms=sorted({form.lower() for form in forms}),
+            min_confirmations=config.LEXICON_MIN_CONFIRMATIONS,
+        )
+    except sqlite3.Error:
+        logger.exception("Lecture du lexique partagé impossible")
+        return {}
+    return {row["form"]: {"base_form": row["base_form"], "output": row["output"]} for row in rows}
+
+
+async def resolve_words(
+    text: str,
+    level: str,
+    language: str,
+    translation_mode: str,
+    word_count: int,
+    excluded: frozenset[str] = frozenset(),
+) -> list[WordItem]:
+    """
+    Mots du chapitre déjà dans le lexique, pris parmi les candidats du plus fréquent
+    au moins fréquent, au plus `word_count` (une forme de base au plus une fois).
+    `excluded` : formes et formes de base (minuscules) à ne pas proposer.
+    """
+    forms = candidate_service.ranked_forms(text, level, language, word_count, excluded)
+    entries = await _entries_by_form(language, translation_mode, forms)
+
+    resolved: list[WordItem] = []
+    base_forms: set[str] = set()
+    for form in forms:
+        entry = entries.get(form.lower())
+        if entry is None or entry["base_form"].lower() in base_forms or entry["base_form"].lower() in excluded:
+            continue
+        base_forms.add(entry["base_form"].lower())
+        resolved.append(WordItem(word=form, base_form=entry["base_form"], output=entry["output"]))
+        if len(resolved) == word_count:
+            break
+    return resolved
+
+
+async def lookup_word(language: str, translation_mode: str, word: str) -> dict | None:
+    """{base_form, output} connus pour ce mot tel qu'écrit dans un texte, ou None."""
+    entries = await _entries_by_form(language, translation_mode, [word])
+    return entries.get(word.lower())
+
+
+async def base_form_of(language: str, word: str) -> str | None:
+    """Forme de base connue pour ce mot tel qu'écrit dans un texte (tous modes), ou None."""
+    if not config.LEXICON_ENABLED:
+        return None
+    try:
+        return await lexicon_repository.get_base_form(language, word.lower())
+    except sqlite3.Error:
+        logger.exception("Lecture du lexique partagé impossible")
+        return None
+
+
+# ─── Alimentation ────────────────────────────────────────────
+# Une erreur SQLite est loggée sans faire échouer l'extraction ou la confirmation.
+
+async def record_extracted(language: str, translation_mode: str, words: list[WordItem]) -> None:
+    """Mots validés d'une réponse Gemini."""
+    if not config.LEXICON_ENABLED or not words:
+        return
+    try:
+        await lexicon_repository.add_extracted_words(
+            language=language,
+            translation_mode=translation_mode,
+            words=[w.model_dump() for w in words],
+        )
+    except sqlite3.Error:
+        logger.exception("Écriture dans le lexique partagé impossible")
+
+
+async def record_confirmed(chapter_id: int, words: list[dict]) -> None:
+    """Mots gardés par un utilisateur pour ce chapitre (dicts word, base_form, output)."""
+    if not config.LEXICON_ENABLED or not words:
+        return
+    try:
+        await lexicon_repository.add_confirmed_words(chapter_id=chapter_id, words=words)
+    except sqlite3.Error:
+        logger.exception("Écriture dans le lexique partagé impossible")
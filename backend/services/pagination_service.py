@@ -0,0 +1,59 @@
+"""
+Pagination par curseur (keyset).
+Le curseur encode la clé de tri de la dernière ligne renvoyée : la page suivante
+repart de cette clé via l'index, quelle que soit sa profondeur (pas d'OFFSET).
+"""
+import base64
+import binascii
+import json
+from typing import Callable
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from models import Page
+
+
+def encode_cursor(key: tuple) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None, key_types: tuple[type, ...]) -> tuple | None:
+    """
+    Retourne la clé de tri contenue dans le curseur (None si pas de curseur).
+    Lève 400 si le curseur est illisible ou ne correspond pas à la clé attendue.
+    """
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, ValueError):
+        key = None
+    if (
+        not isinstance(key, list)
+        or len(key) != len(key_types)
+        or not all(type(value) is expected for value, expected in zip(key, key_types))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide.",
+        )
+    return tuple(key)
+
+
+def build_page(
+    rows: list,
+    limit: int,
+    sort_key: Callable[[dict], tuple],
+    to_item: Callable[[dict], BaseModel],
+) -> Page:
+    """
+    Construit une page à partir de `limit + 1` lignes au plus :
+    la ligne en trop signale seulement qu'une page suivante existe.
+    """
+    has_more = len(rows) > limit
+    items = [to_item(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(sort_key(rows[limit - 1])) if has_more else None
+    return Page(items=items, next_cursor=next_cursor)
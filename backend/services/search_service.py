@@ -0,0 +1,74 @@
+"""
+Recherche plein texte dans les chapitres de l'utilisateur (index FTS5 chapters_fts).
+Le SQL est dans chapter_repository.search_chapters.
+"""
+import html
+import re
+
+from fastapi import HTTPException, status
+
+from models import SearchHitResponse
+from repositories.aio import chapter_repository
+
+# Marqueurs posés par snippet() : caractères de contrôle absents du texte des chapitres,
+# remplacés par <mark> après échappement HTML de l'extrait.
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+_TERM_RE = re.compile(r"\w+\*?")
+
+
+def _to_match_expression(query: str) -> str:
+    """
+    Texte libre → expression FTS5 : chaque mot entre guillemets (pas d'opérateur
+    injecté par l'utilisateur), tous requis. Un `*` final garde la recherche par préfixe,
+    à partir de 2 caractères (taille minimale de l'index de préfixes de chapters_fts).
+    """
+    terms = []
+    for term in _TERM_RE.findall(query):
+        word = term.rstrip("*")
+        prefix = term.endswith("*") and len(word) >= 2
+        terms.append(f'"{word}"' + ("*" if prefix else ""))
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La recherche doit contenir au moins un mot.",
+        )
+    return " ".join(terms)
+
+
+def _to_snippet_html(snippet: str) -> str:
+    return (
+        html.escape(snippet)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_END, "</mark>")
+    )
+
+
+async def search_chapters(
+    user_id: int,
+    query: str,
+    limit: int,
+    book_id: int | None = None,
+) -> list[SearchHitResponse]:
+    """Chapitres de l'utilisateur (éventuellement d'un seul livre) classés par pertinence."""
+    rows = await chapter_repository.search_chapters(
+        user_id=user_id,
+        match=_to_match_expression(query),
+        limit=limit,
+        book_id=book_id,
+        highlight=(_MARK_START, _MARK_END),
+    )
+    return [
+        SearchHitResponse(
+            book_id=row["book_id"],
+            book_title=row["book_title"],
+            chapter_id=row["chapter_id"],
+            chapter_number=row["chapter_number"],
+            chapter_title=row["chapter_title"] or f"Chapitre {row['chapter_number']}",
+            snippet=_to_snippet_html(row["snippet"]),
+            # bm25 est négatif (plus petit = plus pertinent) : exposé en positif.
+            score=-row["score"],
+        )
+        for row in rows
+    ]
@@ -1,44 +1,46 @@
 """
-Logique métier de traduction à la volée via RapidAPI Deep Translate.
+Logique métier de traduction à la volée : lexique partagé, sinon RapidAPI Deep Translate.
 Ne stocke rien en base.
 """
 import httpx
 from fastapi import HTTPException, status
 
 import config
-from repositories import chapter_repository
+from http_clients import get_async_client
+from models import TranslateResponse
+from repositories.aio import chapter_repository
+from services import lexicon_service
 
 
-async def translate_word(chapter_id: int, user_id: int, word: str) -> str:
+async def translate_word(chapter_id: int, user_id: int, word: str) -> TranslateResponse:
     """
-    Vérifie l'ownership du chapitre, puis appelle RapidAPI pour traduire `word`
-    depuis la langue du livre vers le français.
+    Vérifie l'ownership du chapitre, puis traduit `word` depuis la langue du livre vers
+    le français : traduction du lexique partagé si le mot y est, sinon appel RapidAPI.
 
     Lève 403 si le chapitre n'existe pas ou n'appartient pas à l'utilisateur.
     Lève 502 si RapidAPI échoue (erreur HTTP ou réseau).
     """
-    row = chapter_repository.get_chapter_with_language(chapter_id)
-    if not row or row["user_id"] != user_id:
+    source_language = await chapter_repository.get_chapter_language(chapter_id, user_id)
+    if not source_language:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
 
-    source_language = row["language"]
+    known = await lexicon_service.lookup_word(source_language, "translation", word)
+    if known is not None:
+        return TranslateResponse(word=word, base_form=known["base_form"], translation=known["output"])
 
     try:
-        async with httpx.AsyncClient() as client:
-            res = await client.post(
-                "https://deep-translate1.p.rapidapi.com/language/translate/v2",
-                json={"q": word, "source": source_language, "target": "fr"},
-                headers={
-                    "x-rapidapi-key": config.RAPIDAPI_KEY,
-                    "x-rapidapi-host": "deep-translate1.p.rapidapi.com",
-                },
-                timeout=10.0,
-            )
-            res.raise_for_status()
-            print(res.json())
-            print(type(res.json()))
-            # return l'élément 0 car la route n'attend pas une liste mais un élément
-            return res.json()["data"]["translations"]["translatedText"][0]
+        # Client partagé (keep-alive) ; timeout : RAPIDAPI_TIMEOUT_SECONDS.
+        res = await get_async_client("rapidapi").post(
+            config.RAPIDAPI_TRANSLATE_URL,
+            json={"q": word, "source": source_language, "target": "fr"},
+            headers={
+                "x-rapidapi-key": config.RAPIDAPI_KEY,
+                "x-rapidapi-host": "deep-translate1.p.rapidapi.com",
+            },
+        )
+        res.raise_for_status()
+        # l'élément 0 car la route n'attend pas une liste mais un élément
+        translation = res.json()["data"]["translations"]["translatedText"][0]
     except httpx.HTTPStatusError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -49,3 +51,4 @@ async def translate_word(chapter_id: int, user_id: int, word: str) -> str:
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Impossible de joindre le service de traduction.",
         )
+    return TranslateResponse(word=word, base_form=word, translation=translation)
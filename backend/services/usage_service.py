@@ -0,0 +1,148 @@
+"""
+Comptabilité des appels Gemini : jetons, latence, nouvelles tentatives, issue et coût.
+
+Chaque extraction qui appelle Gemini est ajoutée à sa ligne du jour dans llm_usage_daily
+(jour, utilisateur, livre, modèle, niveau, mode, issue) ; les latences y sont gardées
+sous forme d'histogramme pour estimer des centiles sans conserver chaque appel.
+Rapport : GET /admin/llm-usage, regroupé selon `group_by`.
+"""
+import json
+import logging
+import sqlite3
+from bisect import bisect_left
+
+import config
+from models import LlmUsageReportRow
+from repositories.aio import usage_repository
+from services.vocabulary_service import ExtractionUsage
+
+logger = logging.getLogger("chapterprep.usage")
+
+# Bornes supérieures (ms) des cases de l'histogramme, pas de ×1,4 ; dernière case : au-delà.
+_LATENCY_BUCKETS_MS = (
+    250, 350, 500, 700, 1000, 1400, 2000, 2800, 4000,
+    5600, 8000, 11000, 16000, 22000, 32000, 45000, 64000,
+)
+_EMPTY_HISTOGRAM = json.dumps([0] * (len(_LATENCY_BUCKETS_MS) + 1))
+
+# group_by → colonnes de llm_usage_daily reprises dans `group`.
+GROUP_BY_COLUMNS = {
+    "day":     ("day",),
+    "user":    ("user_id", "username"),
+    "book":    ("book_id",),
+    "model":   ("model",),
+    "level":   ("level",),
+    "mode":    ("translation_mode",),
+    "outcome": ("outcome",),
+}
+
+
+def _latency_bucket(latency_ms: float) -> int:
+    return bisect_left(_LATENCY_BUCKETS_MS, latency_ms)
+
+
+def _percentile(histogram: list[int], p: float) -> int:
+    """Centile `p` (0–100), interpolé linéairement dans la case qui le contient."""
+    total = sum(histogram)
+    if not total:
+        return 0
+    rank = total * p / 100
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            lower = _LATENCY_BUCKETS_MS[index - 1] if index else 0
+            if index == len(_LATENCY_BUCKETS_MS):
+                return lower   # au-delà de la dernière borne : valeur plancher
+            upper = _LATENCY_BUCKETS_MS[index]
+            return int(lower + (upper - lower) * (rank - seen) / count)
+        seen += count
+    return _LATENCY_BUCKETS_MS[-1]
+
+
+def _cost_usd(model: str, prompt_tokens: int, total_tokens: int) -> float:
+    """Coût au tarif du modèle : GEMINI_FAST_MODEL (routage) ou, sinon, GEMINI_MODEL."""
+    if config.GEMINI_FAST_MODEL and model == config.GEMINI_FAST_MODEL:
+        input_price, output_price = config.GEMINI_FAST_INPUT_PRICE_PER_MTOK, config.GEMINI_FAST_OUTPUT_PRICE_PER_MTOK
+    else:
+        input_price, output_price = config.GEMINI_INPUT_PRICE_PER_MTOK, config.GEMINI_OUTPUT_PRICE_PER_MTOK
+    return (prompt_tokens * input_price + (total_tokens - prompt_tokens) * output_price) / 1_000_000
+
+
+async def record_extraction(
+    user_id: int,
+    book_id: int,
+    level: str,
+    translation_mode: str,
+    usage: ExtractionUsage,
+) -> None:
+    """Enregistre l'appel Gemini d'une extraction (rien si Gemini n'a pas été appelé)."""
+    if usage.outcome is None:
+        return
+    try:
+        await usage_repository.record_llm_call(
+            user_id=user_id,
+            book_id=book_id,
+            model=usage.model,
+            level=level,
+            translation_mode=translation_mode,
+            outcome=usage.outcome,
+            attempts=usage.attempts,
+            prompt_tokens=usage.prompt_tokens,
+            candidate_tokens=usage.candidate_tokens,
+            total_tokens=usage.total_tokens,
+            latency_ms=int(usage.latency_ms),
+            latency_bucket=_latency_bucket(usage.latency_ms),
+            empty_histogram=_EMPTY_HISTOGRAM,
+        )
+    except sqlite3.Error:
+        # La comptabilité ne doit pas faire échouer une extraction réussie.
+        logger.exception("Enregistrement de la consommation Gemini impossible")
+
+
+async def get_usage_report(date_from: str, date_to: str, group_by: list[str]) -> list[LlmUsageReportRow]:
+    """
+    Consommation entre deux jours inclus, une ligne par groupe (clés de GROUP_BY_COLUMNS),
+    triée par coût décroissant.
+    """
+    columns = [column for key in group_by for column in GROUP_BY_COLUMNS[key]]
+    groups: dict[tuple, dict] = {}
+    for row in await usage_repository.get_llm_usage(date_from, date_to):
+        key = tuple(row[column] for column in columns)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "group": dict(zip(columns, key)),
+                "calls": 0, "ok": 0, "errors": 0, "fallbacks": 0, "attempts": 0,
+                "prompt_tokens": 0, "candidate_tokens": 0, "total_tokens": 0,
+                "latency_ms_total": 0, "cost_usd": 0.0, "histogram": [0] * (len(_LATENCY_BUCKETS_MS) + 1),
+            }
+        group["calls"] += row["calls"]
+        group[{"ok": "ok", "error": "errors", "fallback": "fallbacks"}[row["outcome"]]] += row["calls"]
+        for field in ("attempts", "prompt_tokens", "candidate_tokens", "total_tokens", "latency_ms_total"):
+            group[field] += row[field]
+        # Ligne par ligne : un groupe peut mêler plusieurs modèles (tarifs différents).
+        group["cost_usd"] += _cost_usd(row["model"], row["prompt_tokens"], row["total_tokens"])
+        for index, count in enumerate(json.loads(row["latency_histogram"])):
+            group["histogram"][index] += count
+
+    report = [
+        LlmUsageReportRow(
+            group=group["group"],
+            calls=group["calls"],
+            ok=group["ok"],
+            errors=group["errors"],
+            fallbacks=group["fallbacks"],
+            retries=max(group["attempts"] - group["calls"], 0),
+            prompt_tokens=group["prompt_tokens"],
+            candidate_tokens=group["candidate_tokens"],
+            total_tokens=group["total_tokens"],
+            cost_usd=round(group["cost_usd"], 6),
+            latency_avg_ms=group["latency_ms_total"] // group["calls"],
+            latency_p50_ms=_percentile(group["histogram"], 50),
+            latency_p95_ms=_percentile(group["histogram"], 95),
+            latency_p99_ms=_percentile(group["histogram"], 99),
+        )
+        for group in groups.values()
+    ]
+    report.sort(key=lambda row: row.cost_usd, reverse=True)
+    return report
@@ -1,127 +1,948 @@
 """
-Logique d'extraction de vocabulaire via l'API Gemini.
-Responsabilités : construction du prompt, appel HTTP, parsing JSON.
+Logique d'extraction de vocabulaire.
+Responsabilités : choix du moteur, cache, construction du prompt, limitation du débit,
+appel HTTP, parsing JSON.
+
+Deux moteurs (`engine`, EXTRACTION_ENGINE par défaut) :
+    - "gemini" : mots choisis et traduits / définis par l'API Gemini ;
+    - "local"  : mots classés hors ligne par rang de fréquence au-delà du niveau
+      (candidate_service.top_words), en quelques millisecondes. Sans traduction :
+      `output` contient un extrait du texte autour du mot.
+Le moteur local sert aussi de secours (EXTRACTION_LOCAL_FALLBACK) quand Gemini échoue
+ou ne produit pas de premier mot en GEMINI_FALLBACK_SECONDS.
+
+Les erreurs transitoires de Gemini (timeout, connexion, 429, 5xx) sont retentées avant
+le premier mot, derrière un disjoncteur (resilience.py).
+
+Par défaut (GEMINI_STREAMING_ENABLED), l'appel passe par streamGenerateContent : chaque
+objet {word, base_form, output} est produit dès qu'il est complet (json_stream), au lieu
+d'attendre la fin de la génération du tableau entier. Avec GEMINI_STRUCTURED_OUTPUT, la
+réponse est contrainte par un schéma JSON (responseSchema) ; une réponse tronquée garde
+ses mots complets au lieu d'échouer.
+
+Avec EXTRACTION_PROMPT_MODE=candidates, le prompt contient une liste de mots candidats
+présélectionnés localement (candidate_service) au lieu du texte entier ; retour au texte
+complet si la présélection est impossible (langue sans table de fréquence, texte trop court).
+
+Avant Gemini, les candidats déjà présents dans le lexique partagé (lexicon_service)
+remplissent autant de places : Gemini ne choisit que les mots restants.
+
+Les mots déjà enregistrés par l'utilisateur (`known_words`, known_words_service) sont
+retirés des candidats ou listés dans le prompt (KNOWN_WORDS_PROMPT_MAX au plus), puis
+écartés de la réponse : chaque mot retourné est nouveau pour lui. Une extraction servie
+par le cache en est filtrée à la lecture ; les places libérées sont complétées par le
+lexique puis le moteur local, sans appel Gemini.
+
+extract_pack regroupe plusieurs chapitres courts d'un livre en un seul appel Gemini
+(réponse : objet JSON par chapitre), pour les workers de job_service.
 """
+import asyncio
 import json
-import re
+import logging
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from typing import Any
 
 import httpx
 from fastapi import HTTPException, status
 
-from config import GEMINI_API_KEY
+from config import (
+    EXTRACTION_LOCAL_FALLBACK,
+    EXTRACTION_PROMPT_MODE,
+    GEMINI_API_BASE_URL,
+    GEMINI_API_KEY,
+    GEMINI_FALLBACK_SECONDS,
+    GEMINI_MODEL,
+    GEMINI_STREAMING_ENABLED,
+    GEMINI_STRUCTURED_OUTPUT,
+    KNOWN_WORDS_PROMPT_MAX,
+)
+from http_clients import get_async_client
+from json_stream import JsonArrayStreamParser, salvage_json
+from model_routing import Route, choose_route, get_routing_stats
 from models import WordItem
-from prompts.extract_vocabulary import build_prompt
-
-_GEMINI_ENDPOINT = (
-    "https://generativelanguage.googleapis.com/v1beta/models/"
-    "gemini-2.5-flash:generateContent"
+from prompts.extract_vocabulary import (
+    CANDIDATES_PROMPT_VERSION,
+    PROMPT_VERSION,
+    WORDS_RESPONSE_SCHEMA,
+    build_candidates_prompt,
+    build_pack_prompt,
+    build_prompt,
+    pack_response_schema,
+)
+from rate_limiter import GeminiRateLimiter, get_gemini_limiter
+from resilience import (
+    RETRYABLE_STATUS_CODES,
+    CircuitOpenError,
+    RetryableError,
+    get_gemini_upstream,
+    get_gemini_upstreams,
 )
-_TIMEOUT_SECONDS = 30
+from services import candidate_service, extraction_cache_service, lexicon_service
+
+logger = logging.getLogger("chapterprep.vocabulary")
+
+# Estimation des jetons avant l'appel (GEMINI_TOKENS_PER_MINUTE) : ~4 caractères par jeton
+# pour le prompt, ~40 jetons de JSON par mot extrait. Corrigée avec usageMetadata.
+_CHARS_PER_TOKEN = 4
+_OUTPUT_TOKENS_PER_WORD = 40
+
+
+class ExtractionUsage:
+    """
+    Mesures de l'appel Gemini d'une extraction, remplies par stream_vocabulary
+    (enregistrées par job_service dans llm_usage_daily).
+    """
+
+    def __init__(self) -> None:
+        self.outcome: str | None = None   # None : Gemini non appelé (cache, moteur local) ; ok | error | fallback
+        self.model = GEMINI_MODEL         # modèle choisi par model_routing
+        self.attempts = 0                 # nouvelles tentatives et requêtes doublées comprises
+        self.prompt_tokens = 0
+        self.candidate_tokens = 0
+        self.total_tokens = 0             # + jetons de réflexion du modèle
+        self.latency_ms = 0.0             # premier envoi → fin de la réponse (attente du quota exclue)
+        self.truncated = False            # réponse coupée : éléments complets gardés, pas de mise en cache
+
+    def finish(self, outcome: str, started_at: float) -> None:
+        self.outcome = outcome
+        self.latency_ms = (time.monotonic() - started_at) * 1000
+
+
+def _estimate_tokens(prompt: str, word_count: int) -> int:
+    return len(prompt) // _CHARS_PER_TOKEN + word_count * _OUTPUT_TOKENS_PER_WORD
+
+
+def _prompt_source(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    known_words: frozenset[str] = frozenset(),
+    known_in_text: list[str] | None = None,
+    resolved: list[WordItem] | None = None,
+) -> tuple[list[tuple[str, str]] | None, list[str], int | str]:
+    """
+    Où Gemini choisit les mots, selon EXTRACTION_PROMPT_MODE : (candidats, ou None pour le
+    texte complet ; mots à exclure du texte complet ; version du prompt pour la clé de cache).
+    `known_words` : mots de l'utilisateur, retirés des candidats ; `known_in_text` : ceux
+    présents dans le texte (candidate_service.known_forms), exclus du texte complet.
+    `resolved` : mots déjà fournis par le lexique partagé, Gemini choisit les autres.
+    """
+    resolved = resolved or []
+    if EXTRACTION_PROMPT_MODE == "candidates":
+        candidates = candidate_service.select_candidates(text, level, target_language, word_count, known_words)
+        if candidates is not None:
+            resolved_forms = {word.word.lower() for word in resolved}
+            candidates = [c for c in candidates if c[0].lower() not in resolved_forms]
+            return candidates, [], f"candidates-{CANDIDATES_PROMPT_VERSION}"
+
+    excluded_words = [word.word for word in resolved] + (known_in_text or [])[:KNOWN_WORDS_PROMPT_MAX]
+    return None, excluded_words, PROMPT_VERSION
+
+
+def _build_prompt(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    translation_mode: str,
+    known_words: frozenset[str] = frozenset(),
+    known_in_text: list[str] | None = None,
+    resolved: list[WordItem] | None = None,
+) -> tuple[str, int | str]:
+    """(prompt, version du prompt pour la clé de cache) : voir _prompt_source."""
+    resolved = resolved or []
+    candidates, excluded_words, prompt_version = _prompt_source(
+        text, level, target_language, word_count, known_words, known_in_text, resolved
+    )
+    if candidates is not None:
+        prompt = build_candidates_prompt(
+            candidates=candidates,
+            level=level,
+            target_language=target_language,
+            word_count=word_count - len(resolved),
+            translation_mode=translation_mode,
+        )
+    else:
+        prompt = build_prompt(
+            text=text,
+            level=level,
+            target_language=target_language,
+            word_count=word_count - len(resolved),
+            translation_mode=translation_mode,
+            excluded_words=excluded_words,
+        )
+    return prompt, prompt_version
+
+
+def _cache_key(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    translation_mode: str,
+    prompt_version: int | str,
+) -> str:
+    # Sans les mots de l'utilisateur : voir _cacheable.
+    return extraction_cache_service.cache_key(
+        text=text,
+        level=level,
+        target_language=target_language,
+        word_count=word_count,
+        translation_mode=translation_mode,
+        prompt_version=prompt_version,
+        # Modèle principal même si l'appel est routé ailleurs : le routage ne change pas la clé.
+        model=GEMINI_MODEL,
+    )
+
+
+def _cacheable(known_in_text: list[str]) -> bool:
+    """
+    Le cache garde l'extraction non filtrée, partagée par tous les lecteurs : une
+    extraction n'y est écrite que si aucun mot de l'utilisateur n'est candidat dans le
+    texte (prompt, candidats et lexique identiques sans lui). À la lecture, chacun en
+    écarte ses propres mots : confirmer des mots ne change pas la clé.
+    """
+    return not known_in_text
+
+
+def _bad_gateway(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=detail)
+
 
+class _GeminiUnavailableError(HTTPException, RetryableError):
+    """502 transitoire (timeout, connexion, 429, 5xx) : retenté par resilience."""
 
-def extract_vocabulary(
+    def __init__(self, detail: str, retry_after: float | None = None):
+        super().__init__(status_code=status.HTTP_502_BAD_GATEWAY, detail=detail)
+        self.retry_after = retry_after
+
+
+def _local_words(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    resolved: list[WordItem] | None = None,
+    known_words: frozenset[str] = frozenset(),
+) -> list[WordItem] | None:
+    """
+    Moteur local, hors mots `resolved` (lexique) et `known_words` (mots de l'utilisateur) :
+    word_count - len(resolved) mots.
+    None si la langue n'a pas de table ou si le texte a trop peu de candidats.
+    """
+    words = candidate_service.top_words(text, level, target_language, word_count, known_words)
+    if words is None:
+        return None
+    # Les mots du lexique sont des candidats : il en reste assez parmi les word_count premiers.
+    resolved_forms = {word.word.lower() for word in resolved or []}
+    return [
+        WordItem(word=form, base_form=base_form, output=f"« {context} »")
+        for form, base_form, context in words
+        if form.lower() not in resolved_forms
+    ][:word_count - len(resolved_forms)]
+
+
+def _is_known(word: WordItem, known_words: frozenset[str] | set[str]) -> bool:
+    return word.word.lower() in known_words or word.base_form.lower() in known_words
+
+
+def _novelty_check(known_words: frozenset[str], seen: set[str]) -> Callable[[WordItem], bool]:
+    """
+    Prédicat : le mot ne double ni un mot de l'utilisateur ni un mot de `seen` (formes et
+    formes de base en minuscules, déjà fournies) ; un mot nouveau est ajouté à `seen`.
+    """
+    def is_new(word: WordItem) -> bool:
+        if _is_known(word, known_words) or _is_known(word, seen):
+            return False
+        seen.update((word.word.lower(), word.base_form.lower()))
+        return True
+    return is_new
+
+
+def _forms(words: list[WordItem]) -> set[str]:
+    return {form.lower() for word in words for form in (word.word, word.base_form)}
+
+
+async def _new_words(
+    words: AsyncIterator[WordItem],
+    known_words: frozenset[str],
+    resolved: list[WordItem],
+    limit: int,
+) -> AsyncIterator[WordItem]:
+    """
+    Au plus `limit` mots de `words` qui ne doublent ni un mot de l'utilisateur, ni un mot
+    déjà fourni par le lexique, ni un mot précédent. Mots en trop : lus sans être transmis
+    (jetons comptés dans usage).
+    """
+    is_new = _novelty_check(known_words, _forms(resolved))
+    produced = 0
+    try:
+        async for word in words:
+            if produced == limit or not is_new(word):
+                continue
+            produced += 1
+            yield word
+    finally:
+        await words.aclose()
+    if not produced:
+        raise _bad_gateway("Gemini n'a retourné que des mots déjà retenus.")
+
+
+async def _from_cache(
+    cached: list[WordItem],
     text: str,
     level: str,
     target_language: str,
     word_count: int,
     translation_mode: str,
+    known_words: frozenset[str],
 ) -> list[WordItem]:
     """
-    Appelle Gemini et retourne la liste de mots extraits.
+    Extraction en cache (non filtrée) sans les mots de l'utilisateur. Places libérées par
+    ce filtre complétées sans Gemini : lexique partagé, puis moteur local ; peut rester
+    courte (texte sans assez de candidats, langue sans table de fréquence).
+    """
+    words = [word for word in cached if not _is_known(word, known_words)]
+    if len(words) == len(cached) or len(words) >= word_count:
+        return words
+    words += await lexicon_service.resolve_words(
+        text=text,
+        level=level,
+        language=target_language,
+        translation_mode=translation_mode,
+        word_count=word_count - len(words),
+        excluded=known_words | _forms(words),
+    )
+    if len(words) < word_count:
+        is_new = _novelty_check(known_words, _forms(words))
+        local_words = _local_words(text, level, target_language, word_count, known_words=known_words | _forms(words))
+        words += [word for word in local_words or [] if is_new(word)][:word_count - len(words)]
+    return words
+
+
+async def stream_vocabulary(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    translation_mode: str,
+    engine: str = "gemini",
+    usage: ExtractionUsage | None = None,
+    known_words: frozenset[str] = frozenset(),
+) -> AsyncIterator[WordItem]:
+    """
+    Produit les mots extraits un par un. `usage` : rempli avec les mesures de l'appel
+    Gemini s'il a lieu. `known_words` : formes et formes de base (minuscules) des mots
+    déjà enregistrés par l'utilisateur, jamais retournés.
+    Moteur "local" : classement hors ligne, sans cache (quelques millisecondes).
+    Moteur "gemini" : depuis le cache si ce texte a déjà été extrait avec les mêmes
+    réglages ; sinon les mots connus du lexique partagé, puis les autres au fil de la
+    réponse Gemini (liste complète mise en cache à la fin) ; moteur local en secours
+    si Gemini échoue ou tarde avant son premier mot.
 
     Raises:
+        HTTPException 400 — moteur local : langue sans table de fréquence ou texte trop court.
         HTTPException 502 — si l'API Gemini est injoignable ou renvoie une erreur.
-        HTTPException 502 — si la réponse ne contient pas de JSON valide.
+        HTTPException 502 — si la réponse ne contient pas de JSON valide
+                            (éventuellement après des mots déjà produits).
     """
-    if not GEMINI_API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Clé API Gemini non configurée (GEMINI_API_KEY manquante).",
-        )
+    if engine == "local":
+        local_words = _local_words(text, level, target_language, word_count, known_words=known_words)
+        if local_words is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Extraction locale impossible : pas assez de mots à apprendre dans ce texte.",
+            )
+        for word in local_words:
+            yield word
+        return
 
-    prompt = build_prompt(
+    known_in_text = candidate_service.known_forms(text, level, target_language, known_words)
+    prompt, prompt_version = _build_prompt(
         text=text,
         level=level,
         target_language=target_language,
         word_count=word_count,
         translation_mode=translation_mode,
+        known_words=known_words,
+        known_in_text=known_in_text,
     )
+    key = _cache_key(text, level, target_language, word_count, translation_mode, prompt_version)
+    cached = await extraction_cache_service.get_cached_words(key)
+    if cached is not None:
+        # Extraction non filtrée : les mots déjà connus de l'utilisateur sont écartés ici.
+        for word in await _from_cache(
+            cached, text, level, target_language, word_count, translation_mode, known_words
+        ):
+            yield word
+        return
 
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {"temperature": 0.2},
-    }
+    # ── Lexique partagé : places remplies sans Gemini ────────
+    resolved = await lexicon_service.resolve_words(
+        text=text,
+        level=level,
+        language=target_language,
+        translation_mode=translation_mode,
+        word_count=word_count,
+        excluded=known_words,
+    )
+    for word in resolved:
+        yield word
+    if len(resolved) == word_count:
+        if _cacheable(known_in_text):
+            await extraction_cache_service.store_words(key, resolved)
+        return
+    if resolved:
+        prompt, _ = _build_prompt(
+            text=text,
+            level=level,
+            target_language=target_language,
+            word_count=word_count,
+            translation_mode=translation_mode,
+            known_words=known_words,
+            known_in_text=known_in_text,
+            resolved=resolved,
+        )
 
-    # ── Appel HTTP ───────────────────────────────────────────
+    # ── Quota Gemini (requêtes et jetons par minute) ─────────
+    # Avant le délai de secours : attendre le limiteur (livre entier) n'est pas une panne.
+    limiter = get_gemini_limiter()
+    estimated_tokens = _estimate_tokens(prompt, word_count - len(resolved))
+    await limiter.reserve(estimated_tokens)
+
+    # ── Premier mot Gemini, ou secours local ─────────────────
+    if usage is None:
+        usage = ExtractionUsage()
+    route = choose_route(len(prompt) // _CHARS_PER_TOKEN, word_count - len(resolved), level)
+    usage.model = route.model
+    started_at = time.monotonic()
+    gemini_words = _gemini_words(prompt, route, limiter, estimated_tokens, usage)
+    if resolved or known_words:
+        gemini_words = _new_words(gemini_words, known_words, resolved, limit=word_count - len(resolved))
+    # Calculé d'avance (quelques ms) : sans secours possible, pas de délai imposé à Gemini.
+    local_words = (
+        _local_words(text, level, target_language, word_count, resolved, known_words)
+        if EXTRACTION_LOCAL_FALLBACK else None
+    )
     try:
-        response = httpx.post(
-            _GEMINI_ENDPOINT,
-            headers={"x-goog-api-key": GEMINI_API_KEY},
-            json=payload,
-            timeout=_TIMEOUT_SECONDS,
+        first_word = await asyncio.wait_for(
+            anext(gemini_words),
+            timeout=GEMINI_FALLBACK_SECONDS if local_words is not None else None,
         )
-    except httpx.TimeoutException:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="L'API Gemini n'a pas répondu dans les délais.",
+    except (HTTPException, asyncio.TimeoutError) as exc:
+        await gemini_words.aclose()
+        if local_words is None:
+            usage.finish("error", started_at)
+            raise
+        usage.finish("fallback", started_at)
+        reason = "délai dépassé" if isinstance(exc, asyncio.TimeoutError) else exc.detail
+        logger.warning("Gemini indisponible (%s) : extraction locale", reason)
+        # Pas de mise en cache : la prochaine extraction de ce texte réessaie Gemini.
+        for word in local_words:
+            yield word
+        return
+
+    # Un échec après le premier mot fait échouer l'extraction (mots déjà transmis).
+    words = [first_word]
+    yield first_word
+    try:
+        async for word in gemini_words:
+            words.append(word)
+            yield word
+    except HTTPException:
+        usage.finish("error", started_at)
+        raise
+    usage.finish("ok", started_at)
+    await lexicon_service.record_extracted(target_language, translation_mode, words)
+    # Réponse tronquée : liste incomplète, la prochaine extraction de ce texte rappelle Gemini.
+    if not usage.truncated and _cacheable(known_in_text):
+        await extraction_cache_service.store_words(key, resolved + words)
+
+
+async def extract_vocabulary(
+    text: str,
+    level: str,
+    target_language: str,
+    word_count: int,
+    translation_mode: str,
+    engine: str = "gemini",
+    known_words: frozenset[str] = frozenset(),
+) -> list[WordItem]:
+    """Liste complète des mots extraits (voir stream_vocabulary)."""
+    return [
+        word
+        async for word in stream_vocabulary(
+            text=text,
+            level=level,
+            target_language=target_language,
+            word_count=word_count,
+            translation_mode=translation_mode,
+            engine=engine,
+            known_words=known_words,
         )
-    except httpx.ConnectError:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Impossible de joindre l'API Gemini.",
+    ]
+
+
+async def extract_pack(
+    chapters: list[tuple[int, str, int]],
+    level: str,
+    target_language: str,
+    translation_mode: str,
+    known_words: frozenset[str] = frozenset(),
+    usage: ExtractionUsage | None = None,
+) -> dict[int, list[WordItem]]:
+    """
+    Extraction groupée (EXTRACTION_PACK_MAX_CHAPTERS) : plusieurs chapitres courts
+    (id du chapitre, texte, nombre de mots), mêmes niveau, langue et mode, en un seul
+    appel Gemini — un prompt d'en-tête et une requête du quota au lieu d'un par chapitre.
+    Cache et lexique partagé chapitre par chapitre, comme stream_vocabulary ; les mots
+    obtenus sont mis en cache sous la clé de l'extraction seule de chaque chapitre
+    (extraction non filtrée seulement, voir _cacheable).
+    Un mot n'est retenu que dans un chapitre du groupe.
+
+    Retourne les mots de chaque chapitre servi. Chapitres absents : à extraire seuls
+    (réponse Gemini sans mot valide pour eux, ou appel groupé en échec — pas d'exception).
+    """
+    results: dict[int, list[WordItem]] = {}
+    sections: list[tuple[int, int, str | list[tuple[str, str]], list[str]]] = []
+    pending: dict[int, tuple[str | None, list[WordItem], int]] = {}
+    for chapter_id, text, word_count in chapters:
+        known_in_text = candidate_service.known_forms(text, level, target_language, known_words)
+        candidates, excluded_words, prompt_version = _prompt_source(
+            text, level, target_language, word_count, known_words, known_in_text, []
         )
+        key = _cache_key(text, level, target_language, word_count, translation_mode, prompt_version)
+        cached = await extraction_cache_service.get_cached_words(key)
+        if cached is not None:
+            results[chapter_id] = await _from_cache(
+                cached, text, level, target_language, word_count, translation_mode, known_words
+            )
+            continue
 
-    if not response.is_success:
-        error_msg = response.json().get("error", {}).get("message", response.text)
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Erreur Gemini ({response.status_code}) : {error_msg}",
+        resolved = await lexicon_service.resolve_words(
+            text=text,
+            level=level,
+            language=target_language,
+            translation_mode=translation_mode,
+            word_count=word_count,
+            excluded=known_words,
         )
+        if len(resolved) == word_count:
+            if _cacheable(known_in_text):
+                await extraction_cache_service.store_words(key, resolved)
+            results[chapter_id] = resolved
+            continue
+        if resolved:
+            candidates, excluded_words, _ = _prompt_source(
+                text, level, target_language, word_count, known_words, known_in_text, resolved
+            )
+        remaining = word_count - len(resolved)
+        sections.append((chapter_id, remaining, text if candidates is None else candidates, excluded_words))
+        # Clé None : extraction filtrée pour cet utilisateur, pas mise en cache.
+        pending[chapter_id] = (key if _cacheable(known_in_text) else None, resolved, remaining)
 
-    # ── Extraction du texte brut ─────────────────────────────
+    if not sections:
+        return results
+
+    # ── Un seul appel Gemini pour le reste du groupe ─────────
+    prompt = build_pack_prompt(sections, level, target_language, translation_mode)
+    limiter = get_gemini_limiter()
+    pack_words = sum(remaining for _, remaining, _, _ in sections)
+    estimated_tokens = _estimate_tokens(prompt, pack_words)
+    await limiter.reserve(estimated_tokens)
+
+    if usage is None:
+        usage = ExtractionUsage()
+    route = choose_route(len(prompt) // _CHARS_PER_TOKEN, pack_words, level)
+    usage.model = route.model
+    started_at = time.monotonic()
     try:
-        raw_text: str = response.json()["candidates"][0]["content"]["parts"][0]["text"]
-    except (KeyError, IndexError):
+        answer = await _gemini_pack(prompt, list(pending), route, limiter, estimated_tokens, usage)
+    except HTTPException as exc:
+        usage.finish("error", started_at)
+        logger.warning("Extraction groupée impossible (%s) : chapitres extraits un par un", exc.detail)
+        return results
+    usage.finish("ok", started_at)
+
+    # ── Répartition par chapitre ─────────────────────────────
+    is_new = _novelty_check(known_words, {form for _, resolved, _ in pending.values() for form in _forms(resolved)})
+    for chapter_id, (key, resolved, remaining) in pending.items():
+        items = answer.get(str(chapter_id))
+        words: list[WordItem] = []
+        for word in map(_word_item, items if isinstance(items, list) else []):
+            if len(words) == remaining:
+                break
+            if word is not None and is_new(word):
+                words.append(word)
+        if not words:
+            continue
+        await lexicon_service.record_extracted(target_language, translation_mode, words)
+        if key is not None and not usage.truncated:
+            await extraction_cache_service.store_words(key, resolved + words)
+        results[chapter_id] = resolved + words
+    return results
+
+
+def get_gemini_stats() -> dict:
+    """
+    État du disjoncteur, compteurs et latences des appels Gemini de ce processus
+    (GEMINI_MODEL ; `models` : chaque modèle appelé), décisions de routage.
+    """
+    return {
+        **get_gemini_upstream().stats(),
+        "models": {model: upstream.stats() for model, upstream in get_gemini_upstreams().items()},
+        "routing": get_routing_stats(),
+    }
+
+
+def _endpoint(model: str, stream: bool) -> str:
+    if stream:
+        return f"{GEMINI_API_BASE_URL}/models/{model}:streamGenerateContent?alt=sse"
+    return f"{GEMINI_API_BASE_URL}/models/{model}:generateContent"
+
+
+async def _open_gemini(
+    model: str,
+    start_attempt: Callable[[bool], AsyncIterator[Any]],
+) -> tuple[Any, AsyncIterator[Any]]:
+    """
+    Ouvre une réponse Gemini (premier élément, suite) avec nouvelles tentatives, disjoncteur
+    et hedging (resilience). `start_attempt(retry)` : voir ResilientUpstream.open.
+    """
+    if not GEMINI_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Clé API Gemini non configurée (GEMINI_API_KEY manquante).",
+        )
+    try:
+        return await get_gemini_upstream(model).open(start_attempt)
+    except CircuitOpenError as exc:
         raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Réponse Gemini dans un format inattendu.",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"API Gemini indisponible (échecs répétés), nouvel essai dans {exc.retry_in:.0f} s.",
         )
 
-    # ── Nettoyage : supprime les blocs ```json ... ``` éventuels ──
-    raw_text = raw_text.strip()
-    raw_text = re.sub(r"^```(?:json)?\s*", "", raw_text)
-    raw_text = re.sub(r"\s*```$", "", raw_text)
 
-    # ── Parsing JSON ─────────────────────────────────────────
+def _payload(prompt: str, response_schema: dict, route: Route) -> dict:
+    """
+    Corps de la requête ; GEMINI_STRUCTURED_OUTPUT : réponse JSON contrainte par
+    `response_schema` ; réglages propres au modèle choisi (`route`).
+    """
+    generation_config: dict[str, Any] = {"temperature": 0.2, **route.generation_config}
+    if GEMINI_STRUCTURED_OUTPUT:
+        generation_config["responseMimeType"] = "application/json"
+        generation_config["responseSchema"] = response_schema
+    return {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": generation_config,
+    }
+
+
+async def _gemini_words(
+    prompt: str,
+    route: Route,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+) -> AsyncIterator[WordItem]:
+    """
+    Appel Gemini (quota de la première tentative déjà réservé) + validation des mots
+    (sans cache), avec nouvelles tentatives, disjoncteur et hedging (resilience).
+    """
+    payload = _payload(prompt, WORDS_RESPONSE_SCHEMA, route)
+    first_word, words = await _open_gemini(
+        route.model,
+        lambda retry: _gemini_attempt(payload, route.model, limiter, estimated_tokens, usage, reserve=retry),
+    )
+    yield first_word
+    async for word in words:
+        yield word
+
+
+async def _gemini_pack(
+    prompt: str,
+    chapter_ids: list[int],
+    route: Route,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+) -> dict:
+    """Appel Gemini d'une extraction groupée : objet JSON {id du chapitre: [mots]}."""
+    payload = _payload(prompt, pack_response_schema(chapter_ids), route)
+    answer, rest = await _open_gemini(
+        route.model,
+        lambda retry: _gemini_pack_attempt(payload, route.model, limiter, estimated_tokens, usage, reserve=retry),
+    )
+    await rest.aclose()
+    return answer
+
+
+async def _gemini_pack_attempt(
+    payload: dict,
+    model: str,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+    reserve: bool,
+) -> AsyncIterator[dict]:
+    """Une tentative d'extraction groupée (voir _gemini_attempt) : un seul élément, l'objet entier."""
+    if reserve:
+        await limiter.reserve(estimated_tokens)
+    usage.attempts += 1
+    yield _parse_pack(await _generate_text(payload, model, limiter, estimated_tokens, usage), usage)
+
+
+def _parse_pack(raw_text: str, usage: ExtractionUsage) -> dict:
+    """
+    Objet JSON de la réponse (blocs ```json ... ``` éventuels ignorés). Objet coupé :
+    chapitres et mots complets gardés (json_stream.salvage_json), `usage.truncated`.
+    """
+    start, end = raw_text.find("{"), raw_text.rfind("}")
     try:
-        data = json.loads(raw_text)
+        answer = json.loads(raw_text[start:end + 1]) if start != -1 else None
     except json.JSONDecodeError:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Gemini n'a pas retourné un JSON valide.",
-        )
+        try:
+            answer = salvage_json(raw_text[start:])
+        except ValueError:
+            answer = None
+        else:
+            usage.truncated = True
+            logger.warning("Réponse Gemini groupée tronquée : chapitres et mots complets gardés")
+    if not isinstance(answer, dict):
+        raise _bad_gateway("Gemini n'a pas retourné un JSON valide.")
+    return answer
 
-    if not isinstance(data, list):
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="La réponse Gemini doit être un tableau JSON.",
-        )
+
+def _word_item(item: Any) -> WordItem | None:
+    """WordItem d'un élément de la réponse, ou None s'il lui manque un champ."""
+    if not isinstance(item, dict):
+        return None
+    word = str(item.get("word", "")).strip()
+    base_form = str(item.get("base_form", "")).strip()
+    output = str(item.get("output", "")).strip()
+    if word and base_form and output:
+        return WordItem(word=word, base_form=base_form, output=output)
+    return None
+
+
+async def _gemini_attempt(
+    payload: dict,
+    model: str,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+    reserve: bool,
+) -> AsyncIterator[WordItem]:
+    """Une tentative d'appel Gemini. `reserve` : reprendre du quota (nouvelle tentative, hedging)."""
+    if reserve:
+        await limiter.reserve(estimated_tokens)
+    usage.attempts += 1
+
+    if GEMINI_STREAMING_ENABLED:
+        items = _stream_gemini(payload, model, limiter, estimated_tokens, usage)
+    else:
+        items = _call_gemini(payload, model, limiter, estimated_tokens, usage)
 
     # ── Validation et construction des WordItem ───────────────
-    words: list[WordItem] = []
-    for item in data:
-        if not isinstance(item, dict):
-            continue
-        word = str(item.get("word", "")).strip()
-        base_form = str(item.get("base_form", "")).strip()
-        output = str(item.get("output", "")).strip()
-        if word and base_form and output:
-            words.append(WordItem(word=word, base_form=base_form, output=output))
+    produced = 0
+    async for item in items:
+        word = _word_item(item)
+        if word is not None:
+            produced += 1
+            yield word
 
-    if not words:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Gemini n'a retourné aucun mot valide.",
+    if not produced:
+        raise _bad_gateway("Gemini n'a retourné aucun mot valide.")
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _raise_for_gemini_error(response: httpx.Response) -> None:
+    if not response.is_success:
+        try:
+            error_msg = response.json().get("error", {}).get("message", response.text)
+        except ValueError:
+            # Corps non JSON (page d'erreur d'un proxy, 503…).
+            error_msg = response.text[:200]
+        detail = f"Erreur Gemini ({response.status_code}) : {error_msg}"
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            raise _GeminiUnavailableError(detail, retry_after=_retry_after(response))
+        raise _bad_gateway(detail)
+
+
+def _settle_usage(
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    metadata: dict,
+    usage: ExtractionUsage,
+) -> None:
+    """Corrige le quota avec usageMetadata et reporte les jetons consommés dans `usage`."""
+    limiter.settle(estimated_tokens, metadata.get("totalTokenCount", estimated_tokens))
+    usage.prompt_tokens += metadata.get("promptTokenCount", 0)
+    usage.candidate_tokens += metadata.get("candidatesTokenCount", 0)
+    usage.total_tokens += metadata.get("totalTokenCount", 0)
+
+
+def _check_array(parser: JsonArrayStreamParser, usage: ExtractionUsage) -> None:
+    """Tableau coupé (réponse tronquée) : ses éléments complets sont gardés, `usage.truncated`."""
+    if not parser.started:
+        raise _bad_gateway("La réponse Gemini doit être un tableau JSON.")
+    if not parser.done:
+        usage.truncated = True
+        logger.warning("Réponse Gemini tronquée : mots complets gardés")
+
+
+def _candidate_text(body: dict) -> str:
+    """Texte du premier candidat ('' si le morceau n'en contient pas)."""
+    candidates = body.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
+
+async def _sse_chunks(payload: dict, model: str) -> AsyncIterator[tuple[str, dict]]:
+    """streamGenerateContent (SSE) : (texte, usageMetadata éventuel) de chaque morceau."""
+    try:
+        # Client partagé (keep-alive) ; GEMINI_TIMEOUT_SECONDS s'applique entre deux morceaux.
+        async with get_async_client("gemini").stream(
+            "POST",
+            _endpoint(model, stream=True),
+            headers={"x-goog-api-key": GEMINI_API_KEY},
+            json=payload,
+        ) as response:
+            if not response.is_success:
+                await response.aread()
+                _raise_for_gemini_error(response)
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = json.loads(line[len("data:"):])
+                    text = _candidate_text(chunk)
+                except (json.JSONDecodeError, AttributeError, IndexError):
+                    raise _bad_gateway("Réponse Gemini dans un format inattendu.")
+                # usageMetadata arrive avec le dernier morceau, parfois après le ']'.
+                yield text, chunk.get("usageMetadata") or {}
+    except httpx.TimeoutException:
+        raise _GeminiUnavailableError("L'API Gemini n'a pas répondu dans les délais.")
+    except httpx.ConnectError:
+        raise _GeminiUnavailableError("Impossible de joindre l'API Gemini.")
+    except httpx.TransportError:
+        raise _GeminiUnavailableError("Connexion à l'API Gemini interrompue.")
+
+
+async def _stream_gemini(
+    payload: dict,
+    model: str,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+) -> AsyncIterator[Any]:
+    """streamGenerateContent (SSE) : éléments du tableau JSON au fil de la génération."""
+    parser = JsonArrayStreamParser()
+    metadata: dict = {}
+    async with aclosing(_sse_chunks(payload, model)) as chunks:
+        async for text, chunk_metadata in chunks:
+            metadata = chunk_metadata or metadata
+            if parser.done:
+                continue
+            try:
+                items = parser.feed(text)
+            except ValueError:
+                raise _bad_gateway("Gemini n'a pas retourné un JSON valide.")
+            for item in items:
+                yield item
+
+    _settle_usage(limiter, estimated_tokens, metadata, usage)
+    _check_array(parser, usage)
+
+
+async def _generate_content(
+    payload: dict,
+    model: str,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+) -> str:
+    """generateContent : texte brut de la réponse entière."""
+    # ── Appel HTTP ───────────────────────────────────────────
+    try:
+        # Client partagé (keep-alive) ; timeout : GEMINI_TIMEOUT_SECONDS.
+        response = await get_async_client("gemini").post(
+            _endpoint(model, stream=False),
+            headers={"x-goog-api-key": GEMINI_API_KEY},
+            json=payload,
         )
+    except httpx.TimeoutException:
+        raise _GeminiUnavailableError("L'API Gemini n'a pas répondu dans les délais.")
+    except httpx.ConnectError:
+        raise _GeminiUnavailableError("Impossible de joindre l'API Gemini.")
+    except httpx.TransportError:
+        raise _GeminiUnavailableError("Connexion à l'API Gemini interrompue.")
 
-    return words
+    _raise_for_gemini_error(response)
+
+    # ── Extraction du texte brut ─────────────────────────────
+    try:
+        body = response.json()
+        metadata = body.get("usageMetadata", {})
+    except (ValueError, AttributeError):
+        # Corps 200 non JSON (proxy, page d'erreur) : même réponse que le flux.
+        raise _bad_gateway("Réponse Gemini dans un format inattendu.")
+    _settle_usage(limiter, estimated_tokens, metadata, usage)
+    try:
+        return body["candidates"][0]["content"]["parts"][0]["text"]
+    except (KeyError, IndexError):
+        raise _bad_gateway("Réponse Gemini dans un format inattendu.")
+
+
+async def _generate_text(
+    payload: dict,
+    model: str,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+) -> str:
+    """
+    Texte brut de la réponse entière. En streaming si GEMINI_STREAMING_ENABLED :
+    GEMINI_TIMEOUT_SECONDS s'applique alors entre deux morceaux, pas à toute la génération.
+    """
+    if not GEMINI_STREAMING_ENABLED:
+        return await _generate_content(payload, model, limiter, estimated_tokens, usage)
+    parts: list[str] = []
+    metadata: dict = {}
+    async with aclosing(_sse_chunks(payload, model)) as chunks:
+        async for text, chunk_metadata in chunks:
+            metadata = chunk_metadata or metadata
+            parts.append(text)
+    _settle_usage(limiter, estimated_tokens, metadata, usage)
+    return "".join(parts)
+
+
+async def _call_gemini(
+    payload: dict,
+    model: str,
+    limiter: GeminiRateLimiter,
+    estimated_tokens: int,
+    usage: ExtractionUsage,
+) -> AsyncIterator[Any]:
+    """generateContent : éléments du tableau JSON une fois la réponse entière reçue."""
+    raw_text = await _generate_content(payload, model, limiter, estimated_tokens, usage)
+
+    # ── Parsing JSON (blocs ```json ... ``` éventuels ignorés) ──
+    parser = JsonArrayStreamParser()
+    try:
+        items = parser.feed(raw_text)
+    except ValueError:
+        raise _bad_gateway("Gemini n'a pas retourné un JSON valide.")
+    _check_array(parser, usage)
+    for item in items:
+        yield item
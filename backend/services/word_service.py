@@ -3,65 +3,91 @@ Logique métier des mots (confirmation de sélection, ajout unitaire à la lectu
 """
 from fastapi import HTTPException, status
 
-from models import WordResponse
-from repositories import word_repository
+from models import Page, WordResponse
+from repositories.aio import chapter_repository, word_repository
+from services import lexicon_service, pagination_service
 
 
-def confirm_words(
+async def confirm_words(
     chapter_id: int,
+    book_id: int,
     user_id: int,
     words: list[dict],
 ) -> list[WordResponse]:
     """
-    Insère une liste de mots sélectionnés après extraction Gemini.
+    Insère une liste de mots sélectionnés après extraction Gemini et passe le chapitre en 'done'.
     Retourne tous les mots du chapitre pour cet utilisateur.
+    Lève 403 si le chapitre n'appartient pas à ce livre / cet utilisateur.
     """
-    word_repository.create_words(chapter_id=chapter_id, user_id=user_id, words=words)
-    rows = word_repository.get_words_by_chapter_and_user(chapter_id, user_id)
+    rows = await word_repository.confirm_chapter_words(
+        chapter_id=chapter_id,
+        book_id=book_id,
+        user_id=user_id,
+        words=words,
+    )
+    if rows is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès refusé.")
+    await lexicon_service.record_confirmed(chapter_id=chapter_id, words=words)
     return [WordResponse(**dict(r)) for r in rows]
 
 
-def get_words(chapter_id: int, user_id: int) -> list[WordResponse]:
-    """Retourne les mots stockés pour un chapitre et un utilisateur."""
-    rows = word_repository.get_words_by_chapter_and_user(chapter_id, user_id)
-    return [WordResponse(**dict(r)) for r in rows]
+async def get_words(
+    chapter_id: int,
+    user_id: int,
+    limit: int,
+    cursor: str | None = None,
+) -> Page[WordResponse]:
+    """Retourne une page des mots stockés pour un chapitre et un utilisateur (keyset sur created_at, id)."""
+    after = pagination_service.decode_cursor(cursor, (str, int))
+    rows = await word_repository.get_words_by_chapter_and_user(
+        chapter_id, user_id, limit=limit + 1, after=after
+    )
+    return pagination_service.build_page(
+        rows,
+        limit,
+        sort_key=lambda row: (row["created_at"], row["id"]),
+        to_item=lambda row: WordResponse(**dict(row)),
+    )
 
 
-def add_single_word(
+async def add_single_word(
     chapter_id: int,
     user_id: int,
     word_data: dict,
 ) -> WordResponse:
     """
     Ajoute un mot unique découvert pendant la lecture avec le statut `to_learn`.
+    Forme de base = le mot lui-même : remplacée par celle du lexique partagé si connue.
     Lève 409 si le mot existe déjà pour ce chapitre et cet utilisateur.
     """
-    existing = word_repository.get_word_by_chapter_user_and_word(
+    if word_data["base_form"].lower() == word_data["word"].lower():
+        language = await chapter_repository.get_chapter_language(chapter_id, user_id)
+        base_form = await lexicon_service.base_form_of(language, word_data["word"]) if language else None
+        if base_form is not None:
+            word_data = {**word_data, "base_form": base_form}
+    row = await word_repository.create_single_word(
         chapter_id=chapter_id,
         user_id=user_id,
-        word=word_data["word"],
+        word_data=word_data,
     )
-    if existing:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Le mot « {word_data['word']} » est déjà dans ta liste pour ce chapitre.",
         )
-
-    word_id = word_repository.create_single_word(
-        chapter_id=chapter_id,
-        user_id=user_id,
-        word_data=word_data,
-    )
-    row = word_repository.get_word_by_id(word_id)
     return WordResponse(**dict(row))
 
 
-def delete_word(word_id: int, user_id: int) -> None:
+async def delete_word(word_id: int, chapter_id: int, user_id: int) -> None:
     """
-    Supprime un mot si l'utilisateur en est propriétaire.
-    Lève 404 si le mot n'existe pas ou n'appartient pas à l'utilisateur.
+    Supprime un mot du chapitre si l'utilisateur en est propriétaire.
+    Lève 404 si le mot n'existe pas, n'est pas dans ce chapitre ou n'appartient pas à l'utilisateur.
     """
-    deleted = word_repository.delete_word_by_id(word_id=word_id, user_id=user_id)
+    deleted = await word_repository.delete_word_by_id(
+        word_id=word_id,
+        chapter_id=chapter_id,
+        user_id=user_id,
+    )
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,89 @@
+"""
+Configuration commune des tests (depuis backend/ : python -m pytest).
+
+config.py lit l'environnement une seule fois, au premier import : la base SQLite
+temporaire et les réglages des tests sont posés ici, avant tout import de l'application.
+Aucun appel réseau : les clés des API externes sont vides, sauf celle de Gemini dont
+le transport est remplacé par les tests qui l'appellent.
+"""
+import asyncio
+import os
+import tempfile
+import uuid
+
+_TMP_DIR = tempfile.mkdtemp(prefix="chapterprep-tests-")
+os.environ.update({
+    "DATABASE_URL": os.path.join(_TMP_DIR, "test.db"),
+    "GEMINI_API_KEY": "test",
+    "GEMINI_API_BASE_URL": "http://gemini.test/v1beta",
+    "RAPIDAPI_KEY": "",
+    "RESEND_API_KEY": "",
+    "HTTP2_ENABLED": "false",
+    "DEBUG": "true",   # en-têtes X-DB-* (tests du nombre de requêtes SQL)
+    "GEMINI_REQUESTS_PER_MINUTE": "0",
+    "GEMINI_TOKENS_PER_MINUTE": "0",
+    "JOB_POLL_INTERVAL_SECONDS": "0.1",
+})
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import http_clients
+import main
+from repositories import user_repository
+
+
+@pytest.fixture
+def client():
+    """Application démarrée (lifespan : migrations, clients HTTP, workers d'extraction)."""
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(client):
+    """Crée un utilisateur vérifié et retourne les en-têtes de ses requêtes (Authorization)."""
+
+    def _make_user(username: str | None = None) -> dict[str, str]:
+        username = username or f"user_{uuid.uuid4().hex[:12]}"
+        client.post(
+            "/auth/register",
+            json={"username": username, "email": f"{username}@example.com", "password": "password1"},
+        ).raise_for_status()
+        user = user_repository.get_user_by_username(username)
+        user_repository.mark_email_verified(user["id"], "2026-01-01T00:00:00+00:00")
+        response = client.post("/auth/login", data={"username": username, "password": "password1"})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return _make_user
+
+
+@pytest.fixture
+def import_book(client):
+    """Importe un livre (un texte par chapitre) ; retourne le livre créé."""
+
+    def _import_book(headers: dict[str, str], chapters: list[str], language: str = "en") -> dict:
+        response = client.post(
+            "/books/batch-import",
+            json={"title": "Livre de test", "language": language, "chapters": chapters},
+            headers=headers,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    return _import_book
+
+
+@pytest.fixture
+def gemini():
+    """Remplace le transport Gemini par `handler(request) -> httpx.Response` (ou exception)."""
+
+    def _install(handler) -> None:
+        http_clients._async_clients["gemini"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    yield _install
+    client = http_clients._async_clients.pop("gemini", None)
+    if client is not None:
+        asyncio.run(client.aclose())
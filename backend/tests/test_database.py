@@ -0,0 +1,35 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+import database
+import main
+from repositories import user_repository
+
+
+def test_lifespan_can_run_twice_in_one_process():
+    username = f"user_{uuid.uuid4().hex[:12]}"
+    for _ in range(2):
+        # Chaque sortie du lifespan arrête l'executor SQLite : le suivant doit en retrouver un.
+        with TestClient(main.app) as client:
+            if user_repository.get_user_by_username(username) is None:
+                client.post(
+                    "/auth/register",
+                    json={"username": username, "email": f"{username}@example.com", "password": "password1"},
+                ).raise_for_status()
+                user = user_repository.get_user_by_username(username)
+                user_repository.mark_email_verified(user["id"], "2026-01-01T00:00:00+00:00")
+            token = client.post("/auth/login", data={"username": username, "password": "password1"}).json()
+            # Route async : repositories.aio → database.run_in_db_executor.
+            response = client.get("/books", headers={"Authorization": f"Bearer {token['access_token']}"})
+            assert response.status_code == 200
+
+
+def test_pool_reuses_connections():
+    conn = database.get_connection()
+    database.release_connection(conn)
+    again = database.get_connection()
+    try:
+        assert again is conn
+    finally:
+        database.release_connection(again)
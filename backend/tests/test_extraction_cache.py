@@ -0,0 +1,172 @@
+"""
+Cache des extractions : un lookup est une lecture seule (last_used_at réécrit seulement
+au-delà de EXTRACTION_CACHE_TOUCH_MINUTES), hits / misses ajoutés à la base par lots ;
+clé indépendante des mots de l'utilisateur, filtrés à la lecture.
+"""
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import pytest
+
+import config
+import database
+from models import WordItem
+from services import extraction_cache_service
+
+
+@pytest.fixture
+def statements():
+    """SQL exécuté sur la connexion que le pool prête ensuite."""
+    database.init_db()
+    executed: list[str] = []
+    conn = database.get_connection()
+    conn.set_trace_callback(executed.append)
+    database.release_connection(conn)
+    yield executed
+    conn.set_trace_callback(None)
+
+
+def _writes(statements: list[str]) -> list[str]:
+    return [sql for sql in statements if sql.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+
+
+def test_lookup_is_read_only_and_counts_are_batched(statements):
+    key, missing = uuid.uuid4().hex, uuid.uuid4().hex
+    words = [WordItem(word="lantern", base_form="lantern", output="lanterne")]
+
+    async def _scenario() -> tuple[dict, dict]:
+        before = await extraction_cache_service.get_stats()
+        await extraction_cache_service.store_words(key, words)
+        statements.clear()
+        for _ in range(3):
+            assert await extraction_cache_service.get_cached_words(key) == words
+        assert await extraction_cache_service.get_cached_words(missing) is None
+        assert _writes(statements) == []
+        return before, await extraction_cache_service.get_stats()
+
+    before, after = asyncio.run(_scenario())
+    assert after["hits"] - before["hits"] == 3
+    assert after["misses"] - before["misses"] == 1
+    conn = database.get_connection()
+    try:
+        assert conn.execute("SELECT hit_count FROM extraction_cache WHERE cache_key = ?", (key,)).fetchone()[0] == 3
+    finally:
+        database.release_connection(conn)
+
+
+def test_stale_entry_is_touched(statements):
+    key = uuid.uuid4().hex
+    words = [WordItem(word="lantern", base_form="lantern", output="lanterne")]
+    asyncio.run(extraction_cache_service.store_words(key, words))
+    conn = database.get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE extraction_cache SET last_used_at = strftime('%Y-%m-%d %H:%M:%f', 'now', ?) WHERE cache_key = ?",
+                (f"-{config.EXTRACTION_CACHE_TOUCH_MINUTES + 1} minutes", key),
+            )
+    finally:
+        database.release_connection(conn)
+
+    statements.clear()
+    assert asyncio.run(extraction_cache_service.get_cached_words(key)) == words
+    assert len(_writes(statements)) == 1
+    statements.clear()
+    assert asyncio.run(extraction_cache_service.get_cached_words(key)) == words
+    assert _writes(statements) == []
+
+
+def test_cache_stats_route_is_admin_only(client, make_user, monkeypatch):
+    admin = f"admin_{uuid.uuid4().hex[:12]}"
+    monkeypatch.setattr(config, "ADMIN_USERNAMES", {admin})
+    assert client.get("/utils/extraction-cache", headers=make_user()).status_code == 403
+    response = client.get("/utils/extraction-cache", headers=make_user(admin))
+    response.raise_for_status()
+    assert {"hits", "misses", "evictions", "total_bytes", "entries"} <= response.json().keys()
+
+
+_CHAPTER_1 = (
+    "The old harbour was quiet at dawn. Fishermen mended their nets while gulls circled "
+    "above the boats, and a young sailor carried a heavy lantern along the narrow streets."
+)
+_CHAPTER_2 = (
+    "At night the sailor climbed to the lighthouse with his lantern, whistling a song "
+    "his grandmother had taught him during the long winter evenings by the fire."
+)
+_GEMINI_WORDS = {
+    1: [
+        {"word": "harbour", "base_form": "harbour", "output": "port"},
+        {"word": "mended", "base_form": "mend", "output": "réparer"},
+        {"word": "lantern", "base_form": "lantern", "output": "lanterne"},
+    ],
+    2: [
+        {"word": "lantern", "base_form": "lantern", "output": "lanterne"},
+        {"word": "lighthouse", "base_form": "lighthouse", "output": "phare"},
+        {"word": "whistling", "base_form": "whistle", "output": "siffler"},
+    ],
+}
+
+
+def _wait_for(check, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not (result := check()):
+        assert time.monotonic() < deadline, "délai dépassé"
+        time.sleep(0.05)
+    return result
+
+
+def test_confirmed_words_do_not_change_the_cache_key(client, make_user, import_book, gemini, monkeypatch):
+    # Sans lexique partagé : chaque mot vient de Gemini ou du cache.
+    monkeypatch.setattr(config, "LEXICON_ENABLED", False)
+    requests: list[httpx.Request] = []
+
+    def _answer(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        prompt = json.loads(request.content)["contents"][0]["parts"][0]["text"]
+        chunk = {"candidates": [{"content": {"parts": [
+            {"text": json.dumps(_GEMINI_WORDS[2 if "lighthouse" in prompt else 1])},
+        ]}}]}
+        return httpx.Response(200, text=f"data: {json.dumps(chunk)}\r\n\r\n")
+
+    gemini(_answer)
+    headers = make_user()
+    marker = uuid.uuid4().hex   # texte neuf : pas de cache d'un autre test
+    book = import_book(headers, [f"{_CHAPTER_1} {marker}", f"{_CHAPTER_2} {marker}"])
+    book_url = f"/books/{book['id']}"
+
+    # Livre entier : les deux chapitres extraits (et mis en cache) avant toute confirmation.
+    client.post(f"{book_url}/extract", json={"words_to_extract": 3}, headers=headers).raise_for_status()
+    _wait_for(lambda: client.get(f"{book_url}/extraction", headers=headers).json()["extracted"] == 2)
+    assert len(requests) == 2
+
+    chapter_1, chapter_2 = client.get(f"{book_url}/chapters", headers=headers).json()["items"]
+    client.post(
+        f"{book_url}/chapters/{chapter_1['id']}/words",
+        json={"words": _GEMINI_WORDS[1]},
+        headers=headers,
+    ).raise_for_status()
+
+    # « lantern », désormais connu, apparaît dans le chapitre 2 : même clé, servi par le
+    # cache et filtré, place libérée complétée par le moteur local, sans appel Gemini.
+    chapter = client.get(f"{book_url}/chapters/{chapter_2['id']}", headers=headers).json()
+    response = client.post(
+        f"{book_url}/chapters/{chapter_2['id']}/extract",
+        json={"words_to_extract": 3, "level": chapter["level"], "translation_mode": chapter["translation_mode"]},
+        headers=headers,
+    )
+    response.raise_for_status()
+    job_url = f"/jobs/{response.json()['job']['id']}"
+
+    def _finished_job() -> dict | None:
+        job = client.get(job_url, headers=headers).json()
+        return job if job["status"] in ("done", "failed") else None
+
+    job = _wait_for(_finished_job)
+    assert job["status"] == "done"
+    words = [word["word"] for word in job["words"]]
+    assert words[:2] == ["lighthouse", "whistling"] and len(words) == 3
+    assert not {"lantern", "harbour", "mended"} & set(words)
+    assert len(requests) == 2
@@ -0,0 +1,198 @@
+"""
+Appels Gemini : erreurs de l'API et du transport, état et compteurs du processus
+(GET /utils/gemini). Le transport du client partagé est remplacé par un httpx.MockTransport.
+
+Injection de pannes dans stream_vocabulary (429, 503, timeout, flux coupé) : nouvelles
+tentatives, ouverture du disjoncteur et secours local.
+"""
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import config
+import resilience
+from models import WordItem
+from rate_limiter import get_gemini_limiter
+from services import vocabulary_service
+
+# Texte anglais assez long pour le moteur local (secours) ; un mot unique par test évite
+# le cache des extractions.
+_TEXT = (
+    "The old harbour was quiet at dawn. Fishermen mended their nets while gulls circled "
+    "above the boats, and the smell of salt and tar drifted through the narrow streets. "
+    "A young sailor carried a heavy lantern towards the lighthouse, whistling a song "
+    "his grandmother had taught him during the long winter evenings by the fire."
+)
+_WORDS = [
+    {"word": "harbour", "base_form": "harbour", "output": "port"},
+    {"word": "mended", "base_form": "mend", "output": "réparer"},
+    {"word": "lantern", "base_form": "lantern", "output": "lanterne"},
+]
+
+
+@pytest.fixture
+def faults(monkeypatch, gemini):
+    """
+    Politique Gemini neuve (disjoncteur fermé), sans délai entre les tentatives ni lexique
+    partagé. `faults(*responses)` : une réponse par requête, dans l'ordre (la dernière se
+    répète) ; retourne la liste des requêtes reçues.
+    """
+    monkeypatch.setattr(resilience, "_gemini_upstreams", {})
+    monkeypatch.setattr(config, "GEMINI_RETRY_BASE_SECONDS", 0.0)
+    monkeypatch.setattr(config, "GEMINI_RETRY_MAX_SECONDS", 0.0)
+    monkeypatch.setattr(config, "LEXICON_ENABLED", False)
+
+    def _install(*responses) -> list[httpx.Request]:
+        requests: list[httpx.Request] = []
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            response = responses[min(len(requests), len(responses)) - 1]
+            return response(request) if callable(response) else response
+
+        gemini(_handler)
+        return requests
+
+    return _install
+
+
+def _sse(*texts: str, cut: bool = False) -> httpx.Response:
+    """Réponse streamGenerateContent : un morceau SSE par texte ; `cut` : connexion coupée après."""
+
+    class _Stream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            for text in texts:
+                chunk = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+                yield f"data: {json.dumps(chunk)}\r\n\r\n".encode()
+            if cut:
+                raise httpx.ReadError("connection reset")
+
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=_Stream())
+
+
+def _full_answer() -> httpx.Response:
+    return _sse(json.dumps(_WORDS))
+
+
+def _timeout(request: httpx.Request) -> httpx.Response:
+    raise httpx.ReadTimeout("timed out", request=request)
+
+
+def _stream(usage: vocabulary_service.ExtractionUsage, words: list[WordItem] | None = None) -> list[WordItem]:
+    """Mots de stream_vocabulary sur un texte neuf, ajoutés à `words` au fil du flux."""
+    text = f"{_TEXT} {uuid.uuid4().hex}"
+    words = [] if words is None else words
+
+    async def _collect() -> None:
+        async for word in vocabulary_service.stream_vocabulary(
+            text=text, level="B1", target_language="en", word_count=3,
+            translation_mode="translation", usage=usage,
+        ):
+            words.append(word)
+
+    asyncio.run(_collect())
+    return words
+
+
+def _upstream() -> resilience.ResilientUpstream:
+    return resilience.get_gemini_upstream(config.GEMINI_MODEL)
+
+
+def test_429_then_503_are_retried(faults):
+    requests = faults(
+        httpx.Response(429, json={"error": {"message": "quota"}}, headers={"retry-after": "1"}),
+        httpx.Response(503, text="unavailable"),
+        _full_answer(),
+    )
+    usage = vocabulary_service.ExtractionUsage()
+    words = _stream(usage)
+    assert [word.word for word in words] == [item["word"] for item in _WORDS]
+    assert len(requests) == 3
+    assert usage.attempts == 3 and usage.outcome == "ok"
+    assert _upstream().counters["retries"] == 2
+    assert _upstream().breaker.state == "closed"
+
+
+def test_timeouts_fall_back_to_the_local_engine(faults):
+    requests = faults(_timeout)
+    usage = vocabulary_service.ExtractionUsage()
+    words = _stream(usage)
+    assert len(requests) == config.GEMINI_MAX_RETRIES + 1
+    assert usage.outcome == "fallback"
+    assert len(words) == 3 and all(word.output.startswith("«") for word in words)
+
+
+def test_timeouts_without_fallback_fail(faults, monkeypatch):
+    monkeypatch.setattr(vocabulary_service, "EXTRACTION_LOCAL_FALLBACK", False)
+    faults(_timeout)
+    usage = vocabulary_service.ExtractionUsage()
+    with pytest.raises(HTTPException) as error:
+        _stream(usage)
+    assert error.value.status_code == 502
+    assert usage.outcome == "error"
+
+
+def test_repeated_503_open_the_circuit(faults):
+    requests = faults(httpx.Response(503, text="unavailable"))
+    # 3 tentatives par extraction : le 5e échec consécutif (GEMINI_CIRCUIT_FAILURES) ouvre
+    # le circuit pendant la 2e extraction ; la 3e n'appelle plus Gemini.
+    for _ in range(3):
+        usage = vocabulary_service.ExtractionUsage()
+        assert len(_stream(usage)) == 3
+        assert usage.outcome == "fallback"
+    assert len(requests) == config.GEMINI_CIRCUIT_FAILURES
+    assert _upstream().breaker.state == "open"
+    assert _upstream().counters["rejected_open"] == 2
+
+
+def test_stream_cut_before_the_first_word_is_retried(faults):
+    requests = faults(_sse('[{"word": "harb', cut=True), _full_answer())
+    usage = vocabulary_service.ExtractionUsage()
+    assert len(_stream(usage)) == 3
+    assert len(requests) == 2 and usage.outcome == "ok"
+
+
+def test_stream_cut_after_the_first_word_fails_the_extraction(faults):
+    requests = faults(_sse(json.dumps(_WORDS)[:-1].rsplit(", {", 1)[0] + ",", cut=True))
+    usage = vocabulary_service.ExtractionUsage()
+    words: list[WordItem] = []
+    with pytest.raises(HTTPException) as error:
+        _stream(usage, words)
+    # Mots déjà transmis : ni nouvelle tentative ni secours local.
+    assert error.value.status_code == 502
+    assert [word.word for word in words] == ["harbour", "mended"]
+    assert len(requests) == 1 and usage.outcome == "error"
+
+
+def _generate_content() -> str:
+    return asyncio.run(vocabulary_service._generate_content(
+        {"contents": []}, config.GEMINI_MODEL, get_gemini_limiter(), 100, vocabulary_service.ExtractionUsage(),
+    ))
+
+
+def test_generate_content_transport_error_is_retryable(gemini):
+    def _cut(request: httpx.Request) -> httpx.Response:
+        raise httpx.RemoteProtocolError("server disconnected", request=request)
+
+    gemini(_cut)
+    with pytest.raises(vocabulary_service._GeminiUnavailableError):
+        _generate_content()
+
+
+def test_generate_content_non_json_body_is_bad_gateway(gemini):
+    gemini(lambda request: httpx.Response(200, text="<html>proxy</html>"))
+    with pytest.raises(HTTPException) as error:
+        _generate_content()
+    assert error.value.status_code == 502
+    assert not isinstance(error.value, vocabulary_service._GeminiUnavailableError)
+
+
+def test_gemini_stats_route_is_admin_only(client, make_user, monkeypatch):
+    admin = f"admin_{uuid.uuid4().hex[:12]}"
+    monkeypatch.setattr(config, "ADMIN_USERNAMES", {admin})
+    assert client.get("/utils/gemini", headers=make_user()).status_code == 403
+    client.get("/utils/gemini", headers=make_user(admin)).raise_for_status()
@@ -0,0 +1,127 @@
+"""
+Bail des tâches d'extraction : un worker dont la tâche a été reprise (bail expiré, autre
+worker) n'y écrit plus, et le bail est prolongé tant que le worker la traite.
+Sans lifespan : aucun worker de l'application ne prend les tâches de ces tests.
+"""
+import asyncio
+import uuid
+
+import pytest
+
+import config
+import database
+from repositories import book_repository, chapter_repository, job_repository, user_repository
+from services import job_service
+
+
+def _execute(sql: str, params: tuple = ()) -> list:
+    conn = database.get_connection()
+    try:
+        with conn:
+            return conn.execute(sql, params).fetchall()
+    finally:
+        database.release_connection(conn)
+
+
+def _create_jobs(chapters: int) -> list:
+    """Une tâche en file par chapitre d'un nouveau livre, prises avant toute autre (priorité -1)."""
+    database.init_db()
+    username = f"jobs_{uuid.uuid4().hex[:12]}"
+    user_id = user_repository.create_user(username, f"{username}@example.com", "x")
+    book_id = book_repository.create_book_with_chapters(
+        user_id, "Bail", None, "en",
+        [{"text": f"hello world {n}", "word_count": 3} for n in range(chapters)], "B1", "translation",
+    )
+    rows = [
+        job_repository.create_job(user_id, book_id, chapter["id"], "fr", "B1", "translation", 5, "gemini", False)
+        for chapter in chapter_repository.get_chapters_by_book_and_user(book_id, user_id)
+    ]
+    for row in rows:
+        _execute("UPDATE extraction_jobs SET priority = -1 WHERE id = ?", (row["id"],))
+    return rows
+
+
+def _close_jobs(rows: list) -> None:
+    for row in rows:
+        _execute("UPDATE extraction_jobs SET status = 'failed', lease_expires_at = NULL WHERE id = ?", (row["id"],))
+
+
+@pytest.fixture
+def job():
+    (row,) = _create_jobs(1)
+    yield row
+    _close_jobs([row])
+
+
+def _expire_lease(job_id: int) -> None:
+    _execute("UPDATE extraction_jobs SET lease_expires_at = datetime('now', '-1 seconds') WHERE id = ?", (job_id,))
+
+
+def test_stale_worker_cannot_write_reclaimed_job(job):
+    stale = job_repository.claim_next_job(config.JOB_LEASE_SECONDS, config.JOB_MAX_ATTEMPTS)
+    assert stale["id"] == job["id"]
+    _expire_lease(job["id"])
+    owner = job_repository.claim_next_job(config.JOB_LEASE_SECONDS, config.JOB_MAX_ATTEMPTS)
+    assert owner["id"] == job["id"] and owner["attempts"] == stale["attempts"] + 1
+
+    assert not job_repository.save_partial_result(job["id"], stale["attempts"], "[]")
+    assert not job_repository.renew_lease(job["id"], stale["attempts"], config.JOB_LEASE_SECONDS)
+    assert not job_repository.requeue_job(job["id"], stale["attempts"])
+    assert not job_repository.fail_job(job["id"], stale["attempts"], "bail perdu")
+    row = _execute("SELECT * FROM extraction_jobs WHERE id = ?", (job["id"],))[0]
+    assert row["status"] == "running" and row["attempts"] == owner["attempts"] and row["error"] is None
+
+    assert job_repository.complete_job(job["id"], owner["attempts"], "[]")
+    assert _execute("SELECT status FROM extraction_jobs WHERE id = ?", (job["id"],))[0]["status"] == "done"
+
+
+def test_lease_is_renewed_while_worker_runs(job, monkeypatch):
+    monkeypatch.setattr(config, "JOB_LEASE_SECONDS", 3)
+    claimed = job_repository.claim_next_job(config.JOB_LEASE_SECONDS, config.JOB_MAX_ATTEMPTS)
+    _expire_lease(job["id"])
+
+    async def _run() -> None:
+        heartbeat = asyncio.create_task(job_service._keep_leases([claimed]))
+        await asyncio.sleep(config.JOB_LEASE_SECONDS / 3 + 0.5)
+        (still_leased,) = _execute(
+            "SELECT lease_expires_at > datetime('now') FROM extraction_jobs WHERE id = ?", (job["id"],)
+        )[0]
+        assert still_leased
+        # Tâche terminée : plus rien à prolonger, la tâche de prolongation s'arrête seule.
+        job_repository.complete_job(job["id"], claimed["attempts"], "[]")
+        await asyncio.wait_for(heartbeat, timeout=config.JOB_LEASE_SECONDS)
+
+    asyncio.run(_run())
+
+
+@pytest.mark.parametrize("reclaimed", [False, True])
+def test_pack_fallback_renews_lease_or_skips_lost_job(reclaimed, monkeypatch):
+    rows = _create_jobs(2)
+    try:
+        claimed = [job_repository.claim_next_job(config.JOB_LEASE_SECONDS, config.JOB_MAX_ATTEMPTS) for _ in rows]
+        served, unserved = claimed
+        run_alone = []
+
+        async def _extract_pack(**kwargs) -> dict:
+            # Appel groupé plus long que le bail : la tâche non servie l'a perdu, et un
+            # autre worker l'a peut-être reprise.
+            _expire_lease(unserved["id"])
+            if reclaimed:
+                job_repository.claim_next_job(config.JOB_LEASE_SECONDS, config.JOB_MAX_ATTEMPTS)
+            return {served["chapter_id"]: []}
+
+        async def _run_job(job) -> None:
+            (still_leased,) = _execute(
+                "SELECT lease_expires_at > datetime('now') FROM extraction_jobs WHERE id = ?", (job["id"],)
+            )[0]
+            run_alone.append((job["id"], still_leased))
+
+        monkeypatch.setattr(job_service.vocabulary_service, "extract_pack", _extract_pack)
+        monkeypatch.setattr(job_service, "_run_job", _run_job)
+        asyncio.run(job_service._run_pack(claimed))
+
+        assert run_alone == ([] if reclaimed else [(unserved["id"], 1)])
+        status = _execute("SELECT status FROM extraction_jobs WHERE id = ?", (served["id"],))[0]["status"]
+        assert status == "done"
+    finally:
+        _close_jobs(rows)
@@ -0,0 +1,146 @@
+"""
+Nombre de statements SQL par route de liste ou d'écriture (en-tête X-DB-Query-Count, DEBUG=true) :
+fixe, le même pour une ligne et pour _ROWS lignes — pas de requête par ligne (N+1).
+"""
+import asyncio
+import uuid
+
+import pytest
+
+import config
+import database
+import instrumentation
+from instrumentation import QueryStats, untracked_queries
+from repositories import book_repository, chapter_repository, job_repository, user_repository
+from services import job_service
+
+_ROWS = 30
+
+# Route → statements attendus (contrôle d'ownership compris).
+EXPECTED_QUERY_COUNTS = {
+    "books": 1,
+    "chapters": 2,
+    "chapter": 1,
+    "words": 2,
+}
+
+# Route d'écriture (voir _write_request) → statements attendus, contrôle d'ownership compris.
+EXPECTED_WRITE_QUERY_COUNTS = {
+    "confirm_words": 6,
+    "delete_chapter": 1,
+    "update_title": 1,
+    "delete_word": 2,
+    "add_single_word": 4,
+    "extract": 3,
+}
+
+
+@pytest.fixture
+def library(client, make_user, import_book):
+    """Utilisateur avec `rows` livres, `rows` chapitres dans le premier, `rows` mots dans son premier chapitre."""
+
+    def _library(rows: int) -> dict[str, str | dict]:
+        headers = make_user()
+        book = import_book(headers, [f"chapter {n} text" for n in range(rows)])
+        for _ in range(rows - 1):
+            import_book(headers, ["other book"])
+        chapter = client.get(f"/books/{book['id']}/chapters", headers=headers).json()["items"][0]
+        chapter_url = f"/books/{book['id']}/chapters/{chapter['id']}"
+        client.post(
+            f"{chapter_url}/words",
+            json={"words": [{"word": f"w{n}", "base_form": f"w{n}", "output": "o"} for n in range(rows)]},
+            headers=headers,
+        ).raise_for_status()
+        word = client.get(f"{chapter_url}/words", params={"limit": 1}, headers=headers).json()["items"][0]
+        return {
+            "headers": headers,
+            "books": "/books",
+            "chapters": f"/books/{book['id']}/chapters",
+            "chapter": chapter_url,
+            "words": f"{chapter_url}/words",
+            "word_id": word["id"],
+        }
+
+    return _library
+
+
+@pytest.mark.parametrize("route", EXPECTED_QUERY_COUNTS)
+def test_list_route_query_count_does_not_grow_with_rows(client, library, route):
+    for rows in (1, _ROWS):
+        urls = library(rows)
+        response = client.get(urls[route], headers=urls["headers"])
+        response.raise_for_status()
+        if route != "chapter":
+            assert len(response.json()["items"]) == rows
+        assert int(response.headers["X-DB-Query-Count"]) == EXPECTED_QUERY_COUNTS[route], rows
+
+
+def _write_request(urls: dict, route: str, rows: int) -> tuple[str, str, dict | None]:
+    chapter_url = urls["chapter"]
+    return {
+        "confirm_words": (
+            "POST", f"{chapter_url}/words",
+            {"words": [{"word": f"c{n}", "base_form": f"c{n}", "output": "o"} for n in range(rows)]},
+        ),
+        "delete_chapter": ("DELETE", chapter_url, None),
+        "update_title": ("PATCH", chapter_url, {"title": "Nouveau titre"}),
+        "delete_word": ("DELETE", f"{chapter_url}/words/{urls['word_id']}", None),
+        "add_single_word": ("POST", f"{chapter_url}/words/single", {"word": "new", "base_form": "new", "output": "o"}),
+        "extract": (
+            "POST", f"{chapter_url}/extract",
+            {"words_to_extract": 5, "level": "B1", "translation_mode": "translation", "engine": "local"},
+        ),
+    }[route]
+
+
+@pytest.mark.parametrize("route", EXPECTED_WRITE_QUERY_COUNTS)
+def test_write_route_query_count_does_not_grow_with_rows(client, library, route):
+    # `rows` mots envoyés (confirm_words) ou déjà dans le chapitre (suppressions) : executemany
+    # et CASCADE, pas un statement par mot.
+    for rows in (1, _ROWS):
+        urls = library(rows)
+        method, url, body = _write_request(urls, route, rows)
+        response = client.request(method, url, json=body, headers=urls["headers"])
+        response.raise_for_status()
+        assert int(response.headers["X-DB-Query-Count"]) == EXPECTED_WRITE_QUERY_COUNTS[route], rows
+
+
+def test_job_stream_polling_is_not_counted(monkeypatch):
+    # Flux SSE d'une tâche prise par un autre processus : relecture à chaque réveil, hors
+    # compteurs de la requête (pas d'avertissement N+1 pour un flux long).
+    database.init_db()
+    username = f"stream_{uuid.uuid4().hex[:12]}"
+    user_id = user_repository.create_user(username, f"{username}@example.com", "x")
+    book_id = book_repository.create_book_with_chapters(
+        user_id, "Flux", None, "en", [{"text": "hello world", "word_count": 2}], "B1", "translation",
+    )
+    chapter = chapter_repository.get_chapters_by_book_and_user(book_id, user_id)[0]
+    job = job_repository.create_job(user_id, book_id, chapter["id"], "fr", "B1", "translation", 5, "gemini", False)
+    polls = 0
+
+    async def _timed_out(timeout: float) -> bool:
+        nonlocal polls
+        polls += 1
+        assert polls <= config.SQL_N_PLUS_ONE_THRESHOLD * 2, "le flux ne s'est pas terminé"
+        if polls == config.SQL_N_PLUS_ONE_THRESHOLD * 2:
+            with untracked_queries():   # fin de la tâche par « l'autre processus »
+                conn = database.get_connection()
+                try:
+                    with conn:
+                        conn.execute("UPDATE extraction_jobs SET status = 'running' WHERE id = ?", (job["id"],))
+                finally:
+                    database.release_connection(conn)
+                job_repository.fail_job(job["id"], job["attempts"], "arrêt du test")
+        return False
+
+    monkeypatch.setattr(job_service, "_wait_job_changed", _timed_out)
+
+    async def _stream(stats: QueryStats) -> list[str]:
+        instrumentation._current_stats.set(stats)
+        return [event async for event in job_service.stream_job_events(job["id"], user_id)]
+
+    stats = QueryStats(count_statements=True)
+    events = asyncio.run(_stream(stats))
+    assert events[-1].startswith("event: job") and '"failed"' in events[-1]
+    assert polls == config.SQL_N_PLUS_ONE_THRESHOLD * 2
+    assert stats.count == 0 and not stats.repeated_statements()
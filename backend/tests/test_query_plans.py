@@ -0,0 +1,148 @@
+"""
+EXPLAIN QUERY PLAN des requêtes chaudes des repositories : chaque statement exécuté
+par la fonction (capturé avec ses valeurs par set_trace_callback) doit passer par un
+index ou la clé primaire, sans table parcourue en entier ni B-tree temporaire.
+
+Seule exception : le parcours ordonné d'un index partiel (SCAN … USING INDEX), borné
+par les lignes de l'index — idx_extraction_jobs_pending ne contient que les tâches
+en file ou en cours, et la prise d'une tâche s'arrête à la première.
+"""
+import re
+import sqlite3
+import uuid
+
+import pytest
+
+import config
+import database
+from repositories import (
+    book_repository,
+    chapter_repository,
+    job_repository,
+    lexicon_repository,
+    user_repository,
+    word_repository,
+)
+
+_SCAN_RE = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+_SKIPPED_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "--")
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Un utilisateur, un livre de 3 chapitres, des mots et les tâches d'extraction du livre."""
+    database.init_db()
+    username = f"plans_{uuid.uuid4().hex[:12]}"
+    user_id = user_repository.create_user(username, f"{username}@example.com", "x")
+    book_id = book_repository.create_book_with_chapters(
+        user_id, "Plans", None, "en",
+        [{"text": "hello world again", "word_count": 3}] * 3, "B1", "translation",
+    )
+    chapters = chapter_repository.get_chapters_by_book_and_user(book_id, user_id)
+    word_repository.confirm_chapter_words(
+        chapters[0]["id"], book_id, user_id,
+        [{"word": "hello", "base_form": "hello", "output": "bonjour"}],
+    )
+    job_repository.create_book_jobs(
+        user_id, book_id, "fr", [(c["id"], "B1", "translation", 5) for c in chapters], "gemini", 1,
+    )
+    return {
+        "user_id": user_id,
+        "book_id": book_id,
+        "chapter_id": chapters[0]["id"],
+        "last_chapter_id": chapters[-1]["id"],
+    }
+
+
+@pytest.fixture
+def statements():
+    """SQL (valeurs comprises) exécuté sur la connexion que le pool prête ensuite."""
+    executed: list[str] = []
+    conn = database.get_connection()
+    conn.set_trace_callback(executed.append)
+    database.release_connection(conn)
+    yield executed
+    conn.set_trace_callback(None)
+
+
+def _partial_indexes(explain: sqlite3.Connection) -> set[str]:
+    return {
+        name for name, sql in explain.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'")
+        if sql and " WHERE " in sql.upper()
+    }
+
+
+def _tables(explain: sqlite3.Connection) -> set[str]:
+    return {name for (name,) in explain.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _claim_both(data):
+    job = job_repository.claim_next_job(lease_seconds=60, max_attempts=3)
+    assert job is not None
+    job_repository.claim_pack_jobs(job, max_jobs=5, max_words=5000, lease_seconds=60)
+
+
+HOT_QUERIES = {
+    "books_first_page": lambda d: book_repository.get_books_by_user(d["user_id"], 50),
+    "books_keyset_page": lambda d: book_repository.get_books_by_user(d["user_id"], 50, ("2100-01-01", 10**9)),
+    "chapters_first_page": lambda d: chapter_repository.get_chapters_by_book_and_user(d["book_id"], d["user_id"], 50),
+    "chapters_keyset_page": lambda d: chapter_repository.get_chapters_by_book_and_user(
+        d["book_id"], d["user_id"], 50, (1, 0),
+    ),
+    "chapter_for_user": lambda d: chapter_repository.get_chapter_for_user(d["chapter_id"], d["book_id"], d["user_id"]),
+    "pending_chapters": lambda d: chapter_repository.get_pending_chapters_for_extraction(d["book_id"], d["user_id"]),
+    "words_first_page": lambda d: word_repository.get_words_by_chapter_and_user(d["chapter_id"], d["user_id"], 50),
+    "words_keyset_page": lambda d: word_repository.get_words_by_chapter_and_user(
+        d["chapter_id"], d["user_id"], 50, ("2000-01-01", 0),
+    ),
+    "single_word_insert": lambda d: word_repository.create_single_word(
+        d["chapter_id"], d["user_id"], {"word": "hello", "base_form": "hello", "output": "bonjour"},
+    ),
+    "user_words_stamp": lambda d: word_repository.get_user_words_stamp(d["user_id"]),
+    "user_known_words": lambda d: word_repository.get_user_known_words(d["user_id"]),
+    "verification_token": lambda d: user_repository.get_user_by_verification_token_hash("absent"),
+    "lexicon_lookup": lambda d: lexicon_repository.get_entries_by_forms("en", "translation", ["hello", "world"], 0),
+    "book_jobs_creation": lambda d: job_repository.create_book_jobs(
+        d["user_id"], d["book_id"], "fr", [(d["chapter_id"], "B1", "translation", 5)], "gemini", 1,
+    ),
+    "job_claim": _claim_both,
+    "job_for_user": lambda d: job_repository.get_job_for_user(1, d["user_id"]),
+    "book_extraction_progress": lambda d: job_repository.get_book_extraction_progress(d["book_id"], d["user_id"]),
+    "chapter_delete": lambda d: chapter_repository.delete_chapter(d["last_chapter_id"], d["book_id"], d["user_id"]),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_an_index(name, data, statements):
+    HOT_QUERIES[name](data)
+    executed = [sql for sql in dict.fromkeys(statements) if not sql.lstrip().upper().startswith(_SKIPPED_STATEMENTS)]
+    assert executed, "aucun statement capturé"
+
+    explain = sqlite3.connect(config.DATABASE_URL)
+    try:
+        partial_indexes, tables = _partial_indexes(explain), _tables(explain)
+        for sql in executed:
+            plan = [row[3] for row in explain.execute("EXPLAIN QUERY PLAN " + sql)]
+            if not plan and sql.lstrip().upper().startswith("INSERT"):
+                continue   # INSERT … VALUES : rien à lire
+            where = f"{' '.join(sql.split())}\n  plan : {plan}"
+            for detail in plan:
+                assert "USE TEMP B-TREE" not in detail, where
+                scan = _SCAN_RE.match(detail)
+                if scan and scan.group(1) in tables:
+                    assert scan.group(2) in partial_indexes, where
+            assert any("INDEX" in detail or "PRIMARY KEY" in detail for detail in plan), where
+    finally:
+        explain.close()
+
+
+def test_chapter_delete_cascade_uses_an_index(data):
+    # ON DELETE CASCADE chapters → words (SET NULL sur extraction_jobs) : absents de la trace,
+    # SQLite y exécute l'équivalent de ces recherches par chapter_id.
+    explain = sqlite3.connect(config.DATABASE_URL)
+    try:
+        for table in ("words", "extraction_jobs"):
+            plan = [row[3] for row in explain.execute(f"EXPLAIN QUERY PLAN SELECT 1 FROM {table} WHERE chapter_id = 1")]
+            assert any(detail.startswith("SEARCH") for detail in plan), (table, plan)
+    finally:
+        explain.close()
@@ -0,0 +1,30 @@
+"""Recherche plein texte (GET /search) : résultats, classement et LIMIT par utilisateur."""
+from repositories import book_repository
+
+
+
+def test_search_is_scoped_to_the_user(client, make_user, import_book):
+    owner, other = make_user(), make_user()
+    # L'autre utilisateur a beaucoup de chapitres mieux classés (terme répété, texte court).
+    import_book(other, ["lantern lantern lantern"] * 20)
+    book = import_book(owner, ["a lantern in a long chapter about the night and the sea", "no match here"])
+
+    response = client.get("/search", params={"q": "lantern", "limit": 1}, headers=owner)
+    response.raise_for_status()
+    hits = response.json()
+    assert [hit["book_id"] for hit in hits] == [book["id"]]
+    assert "<mark>lantern</mark>" in hits[0]["snippet"]
+
+    response = client.get("/search", params={"q": "lant*", "book_id": book["id"]}, headers=other)
+    response.raise_for_status()
+    assert response.json() == []
+
+
+def test_search_does_not_match_the_owner_column(client, make_user, import_book):
+    # user_id est un terme de l'index : chercher l'identifiant de l'utilisateur ne trouve rien.
+    headers = make_user()
+    book = import_book(headers, ["plain text without digits"])
+    user_id = book_repository.get_book_by_id(book["id"])["user_id"]
+    response = client.get("/search", params={"q": str(user_id)}, headers=headers)
+    response.raise_for_status()
+    assert response.json() == []
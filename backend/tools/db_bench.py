@@ -0,0 +1,100 @@
+"""
+Mesure du débit (requêtes par seconde) des routes de chapitre et de mots, dans le
+processus (TestClient, base SQLite temporaire, requêtes séquentielles) : coût de
+l'accès à la base sans réseau ni upstream.
+
+    GET  /books/{id}/chapters/{id}
+    GET  /books/{id}/chapters/{id}/words
+    POST /books/{id}/chapters/{id}/words/single
+
+`--compare` lance la mesure deux fois dans des processus séparés : DB_POOL_SIZE=0
+(une connexion ouverte et fermée par appel, comme avant le pool) puis DB_POOL_SIZE
+de l'environnement (pool de database.py).
+Depuis backend/ :
+    python -m tools.db_bench --requests 500 --compare
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+_ROUTES = ("GET chapter", "GET words", "POST words/single")
+
+
+def run(requests: int) -> dict[str, float]:
+    """Débit de chaque route de _ROUTES sur une base neuve."""
+    os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["EXTRACTION_WORKERS"] = "0"
+    from fastapi.testclient import TestClient
+
+    import main
+    from repositories import user_repository
+
+    results = {}
+    with TestClient(main.app) as client:
+        client.post("/auth/register", json={"username": "bench", "email": "bench@example.com", "password": "password1"})
+        user = user_repository.get_user_by_username("bench")
+        user_repository.mark_email_verified(user["id"], "2026-01-01T00:00:00+00:00")
+        token = client.post("/auth/login", data={"username": "bench", "password": "password1"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        book = client.post(
+            "/books/batch-import",
+            json={"title": "Bench", "language": "en", "chapters": ["word " * 500] * 50},
+            headers=headers,
+        ).json()
+        chapter = client.get(f"/books/{book['id']}/chapters", headers=headers).json()["items"][0]
+        base = f"/books/{book['id']}/chapters/{chapter['id']}"
+
+        calls = {
+            "GET chapter": lambda i: client.get(base, headers=headers),
+            "GET words": lambda i: client.get(f"{base}/words", headers=headers),
+            "POST words/single": lambda i: client.post(
+                f"{base}/words/single",
+                json={"word": f"w{i}", "base_form": f"w{i}", "output": "o"},
+                headers=headers,
+            ),
+        }
+        for name in _ROUTES:
+            started = time.perf_counter()
+            for i in range(requests):
+                calls[name](i).raise_for_status()
+            results[name] = requests / (time.perf_counter() - started)
+    return results
+
+
+def _run_subprocess(requests: int, pool_size: str | None) -> dict[str, float]:
+    env = dict(os.environ)
+    if pool_size is not None:
+        env["DB_POOL_SIZE"] = pool_size
+    output = subprocess.run(
+        [sys.executable, "-m", "tools.db_bench", "--requests", str(requests)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return {
+        name: float(value)
+        for name, value in (line.rsplit(":", 1) for line in output.splitlines() if ":" in line)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="requêtes par route")
+    parser.add_argument("--compare", action="store_true", help="sans pool puis avec pool")
+    args = parser.parse_args()
+
+    if not args.compare:
+        for name, rate in run(args.requests).items():
+            print(f"{name}: {rate:.1f}")
+        return
+
+    before = _run_subprocess(args.requests, "0")
+    after = _run_subprocess(args.requests, None)
+    print(f"{'route':<20} {'sans pool':>10} {'avec pool':>10}  (req/s)")
+    for name in _ROUTES:
+        print(f"{name:<20} {before[name]:>10.0f} {after[name]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Faux serveur des API externes (Gemini, RapidAPI Deep Translate, Resend) pour le
+développement local et les tests de charge, sans clés ni quota.
+
+Mêmes chemins, corps de requête et formes de réponse que les vraies API :
+    POST /v1beta/models/{modèle}:generateContent
+    POST /v1beta/models/{modèle}:streamGenerateContent?alt=sse
+    POST /language/translate/v2
+    POST /emails
+
+Lancement (depuis backend/), puis backend pointé dessus :
+    python -m uvicorn tools.fake_upstreams:app --port 8900
+    GEMINI_API_BASE_URL=http://localhost:8900/v1beta
+    RAPIDAPI_TRANSLATE_URL=http://localhost:8900/language/translate/v2
+    RESEND_API_URL=http://localhost:8900/emails
+    (+ GEMINI_API_KEY, RAPIDAPI_KEY, RESEND_API_KEY, RESEND_FROM_EMAIL non vides)
+
+Comportement de chaque upstream (`gemini`, `translate`, `resend`) réglable : fichier JSON
+désigné par FAKE_UPSTREAMS_CONFIG au démarrage, ou PUT /_fake/config pendant un test
+(mêmes clés que DEFAULT_PROFILES, seules les clés fournies changent) :
+    latency             — délai avant la réponse (avant le 1er morceau en streaming) :
+                          {"distribution": "fixed", "ms"}, {"distribution": "uniform",
+                          "min_ms", "max_ms"} ou {"distribution": "lognormal",
+                          "median_ms", "sigma"} ; "tail_rate" / "tail_ms" : part des
+                          appels retardés de tail_ms en plus (latence de queue)
+    error_rate          — part des appels en erreur, statut tiré dans error_statuses
+    retry_after_seconds — en-tête Retry-After des 429 (null : absent)
+    gemini seulement :
+    words_ratio         — mots retournés / mots demandés (taille de la réponse)
+    output_chars        — longueur de chaque champ "output" (null : courte traduction)
+    chunk_chars / chunk_ms — taille des morceaux SSE et délai entre deux (vitesse de génération)
+    truncate_rate       — part des réponses coupées au milieu du JSON (finishReason MAX_TOKENS)
+    fenced_rate         — part des réponses entourées d'un bloc ```json (jamais avec
+                          generationConfig.responseMimeType "application/json")
+    thoughts_tokens     — jetons de réflexion ajoutés à usageMetadata (plafonnés par
+                          generationConfig.thinkingConfig.thinkingBudget)
+    model_speed         — {modèle: facteur} appliqué à latency et chunk_ms (ex. 0.5 :
+                          modèle deux fois plus rapide ; absent : 1)
+
+Autres routes : GET /_fake/stats (appels et erreurs par upstream), GET /_fake/emails?to=
+(derniers emails reçus, avec le lien de vérification), POST /_fake/reset.
+"""
+import asyncio
+import copy
+import json
+import os
+import random
+import re
+import uuid
+from collections import deque
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_PROFILES: dict[str, dict] = {
+    "gemini": {
+        "latency": {"distribution": "lognormal", "median_ms": 800, "sigma": 0.5, "tail_rate": 0.0, "tail_ms": 0},
+        "error_rate": 0.0,
+        "error_statuses": [429, 503],
+        "retry_after_seconds": None,
+        "words_ratio": 1.0,
+        "output_chars": None,
+        "chunk_chars": 80,
+        "chunk_ms": 30,
+        "truncate_rate": 0.0,
+        "fenced_rate": 0.0,
+        "thoughts_tokens": 0,
+        "model_speed": {},
+    },
+    "translate": {
+        "latency": {"distribution": "lognormal", "median_ms": 150, "sigma": 0.3, "tail_rate": 0.0, "tail_ms": 0},
+        "error_rate": 0.0,
+        "error_statuses": [429, 503],
+        "retry_after_seconds": None,
+    },
+    "resend": {
+        "latency": {"distribution": "fixed", "ms": 100, "tail_rate": 0.0, "tail_ms": 0},
+        "error_rate": 0.0,
+        "error_statuses": [500],
+        "retry_after_seconds": None,
+    },
+}
+
+_MAX_STORED_EMAILS = 1000
+_WORD_RE = re.compile(r"[^\W\d_]{4,}")
+_WORD_COUNT_RE = re.compile(r"EXACTEMENT (\d+) mots")
+_SOURCE_RE = re.compile(r"\n---\n(.*?)\n---\n", re.DOTALL)
+_EXCLUDED_RE = re.compile(r"Ne sélectionne aucun de ces mots, déjà retenus : (.*)\.\n")
+# Extraction groupée : une section par chapitre (build_pack_prompt).
+_PACK_SECTION_RE = re.compile(
+    r"=== CHAPITRE (\d+) — (\d+) mots à choisir (?:depuis le texte|parmi les candidats) ===\n(.*?)---\n(.*?)\n---\n",
+    re.DOTALL,
+)
+_VERIFY_URL_RE = re.compile(r'href="([^"]*verify-email[^"]*)"')
+
+app = FastAPI(title="ChapterPrep — faux upstreams")
+
+
+def _merge(base: dict, overrides: dict) -> None:
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+
+
+def _load_profiles() -> dict[str, dict]:
+    profiles = copy.deepcopy(DEFAULT_PROFILES)
+    path = os.getenv("FAKE_UPSTREAMS_CONFIG")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            _merge(profiles, json.load(f))
+    return profiles
+
+
+_profiles = _load_profiles()
+_stats = {upstream: {"calls": 0, "errors": 0} for upstream in DEFAULT_PROFILES}
+_emails: deque[dict] = deque(maxlen=_MAX_STORED_EMAILS)
+
+
+# ─── Latence et erreurs ──────────────────────────────────────
+
+def _latency_seconds(latency: dict) -> float:
+    distribution = latency.get("distribution", "fixed")
+    if distribution == "uniform":
+        ms = random.uniform(latency["min_ms"], latency["max_ms"])
+    elif distribution == "lognormal":
+        ms = random.lognormvariate(0, latency.get("sigma", 0.5)) * latency["median_ms"]
+    else:
+        ms = latency.get("ms", 0)
+    if random.random() < latency.get("tail_rate", 0):
+        ms += latency.get("tail_ms", 0)
+    return ms / 1000
+
+
+async def _simulate(upstream: str, speed: float = 1.0) -> JSONResponse | None:
+    """Latence (× `speed`) puis, selon error_rate, réponse d'erreur (None : appel réussi)."""
+    profile = _profiles[upstream]
+    _stats[upstream]["calls"] += 1
+    await asyncio.sleep(_latency_seconds(profile["latency"]) * speed)
+    if random.random() >= profile["error_rate"]:
+        return None
+
+    _stats[upstream]["errors"] += 1
+    status_code = random.choice(profile["error_statuses"])
+    headers = {}
+    if status_code == 429 and profile["retry_after_seconds"] is not None:
+        headers["Retry-After"] = str(profile["retry_after_seconds"])
+    body = {"error": {"code": status_code, "message": "Erreur simulée par fake_upstreams."}}
+    return JSONResponse(body, status_code=status_code, headers=headers)
+
+
+# ─── Gemini ──────────────────────────────────────────────────
+
+def _word_items(
+    source_text: str,
+    exclusion: str,
+    word_count: int,
+    profile: dict,
+    taken: set[str] | None = None,
+) -> list[dict]:
+    """
+    Mots pris dans une source (texte, ou liste de candidats « mot — « contexte » »),
+    hors mots de la consigne d'exclusion trouvée dans `exclusion` et hors `taken`
+    (extraction groupée : mots déjà retenus pour un autre chapitre, complété ici).
+    """
+    if " — « " in source_text:
+        source_text = " ".join(line.split(" — ")[0] for line in source_text.splitlines())
+    excluded = _EXCLUDED_RE.search(exclusion)
+    excluded_forms = {form.lower() for form in excluded.group(1).split(", ")} if excluded else set()
+    if taken is not None:
+        excluded_forms |= taken
+    forms = [form for form in dict.fromkeys(_WORD_RE.findall(source_text)) if form.lower() not in excluded_forms]
+    random.shuffle(forms)
+
+    items = []
+    for form in forms[:max(1, round(word_count * profile["words_ratio"]))]:
+        output = f"traduction de {form.lower()}"
+        if profile["output_chars"]:
+            output = (output + " " + "x" * profile["output_chars"])[:profile["output_chars"]]
+        items.append({"word": form, "base_form": form.lower(), "output": output})
+        if taken is not None:
+            taken.add(form.lower())
+    return items
+
+
+def _gemini_text(prompt: str, profile: dict, json_mime: bool) -> tuple[str, str]:
+    """
+    Tableau JSON de mots pris dans la source du prompt ; extraction groupée : objet JSON
+    {id du chapitre: tableau de mots}, chaque section avec ses propres exclusions.
+    Retourne (texte, finishReason).
+    """
+    sections = _PACK_SECTION_RE.findall(prompt)
+    if sections:
+        taken: set[str] = set()
+        answer = {
+            chapter_id: _word_items(source_text, exclusion + "\n", int(word_count), profile, taken)
+            for chapter_id, word_count, exclusion, source_text in sections
+        }
+    else:
+        match = _WORD_COUNT_RE.search(prompt)
+        source = _SOURCE_RE.search(prompt)
+        answer = _word_items(
+            source.group(1) if source else prompt,
+            prompt,
+            int(match.group(1)) if match else 10,
+            profile,
+        )
+
+    text = json.dumps(answer, ensure_ascii=False, indent=2)
+    finish_reason = "STOP"
+    if random.random() < profile["truncate_rate"]:
+        text = text[:len(text) // 2]
+        finish_reason = "MAX_TOKENS"
+    if not json_mime and random.random() < profile["fenced_rate"]:
+        text = f"```json\n{text}\n```"
+    return text, finish_reason
+
+
+def _usage_metadata(prompt: str, text: str, thoughts_tokens: int) -> dict:
+    prompt_tokens = len(prompt) // 4
+    candidate_tokens = len(text) // 4
+    metadata = {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": candidate_tokens,
+        "totalTokenCount": prompt_tokens + candidate_tokens + thoughts_tokens,
+    }
+    if thoughts_tokens:
+        metadata["thoughtsTokenCount"] = thoughts_tokens
+    return metadata
+
+
+def _candidate(text: str, finish_reason: str | None = None) -> dict:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    return candidate
+
+
+@app.post("/v1beta/models/{model_action}")
+async def gemini(model_action: str, request: Request):
+    model, _, action = model_action.partition(":")
+    if action not in ("generateContent", "streamGenerateContent"):
+        raise HTTPException(status_code=404, detail=f"Méthode inconnue : {action}")
+    body = await request.json()
+    try:
+        prompt = "".join(part.get("text", "") for part in body["contents"][0]["parts"])
+    except (KeyError, IndexError, TypeError):
+        return JSONResponse({"error": {"code": 400, "message": "contents manquant."}}, status_code=400)
+    generation_config = body.get("generationConfig") or {}
+    json_mime = generation_config.get("responseMimeType") == "application/json"
+    if "responseSchema" in generation_config and not json_mime:
+        message = "responseSchema demande responseMimeType application/json."
+        return JSONResponse({"error": {"code": 400, "message": message}}, status_code=400)
+
+    profile = _profiles["gemini"]
+    speed = profile["model_speed"].get(model, 1.0)
+    error = await _simulate("gemini", speed)
+    if error is not None:
+        return error
+
+    chunk_seconds = profile["chunk_ms"] * speed / 1000
+    thoughts_tokens = profile["thoughts_tokens"]
+    thinking_budget = (generation_config.get("thinkingConfig") or {}).get("thinkingBudget", -1)
+    if thinking_budget >= 0:
+        thoughts_tokens = min(thoughts_tokens, thinking_budget)
+    text, finish_reason = _gemini_text(prompt, profile, json_mime)
+    metadata = _usage_metadata(prompt, text, thoughts_tokens)
+    if action == "generateContent":
+        await asyncio.sleep(len(text) / profile["chunk_chars"] * chunk_seconds)
+        return {"candidates": [_candidate(text, finish_reason)], "usageMetadata": metadata}
+
+    async def events():
+        size = profile["chunk_chars"]
+        for start in range(0, len(text), size):
+            if start:
+                await asyncio.sleep(chunk_seconds)
+            yield f"data: {json.dumps({'candidates': [_candidate(text[start:start + size])]})}\r\n\r\n"
+        last = {"candidates": [_candidate("", finish_reason)], "usageMetadata": metadata}
+        yield f"data: {json.dumps(last)}\r\n\r\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ─── RapidAPI Deep Translate ─────────────────────────────────
+
+@app.post("/language/translate/v2")
+async def translate(request: Request):
+    body = await request.json()
+    error = await _simulate("translate")
+    if error is not None:
+        return error
+    return {"data": {"translations": {"translatedText": [f"{body.get('q', '')} ({body.get('target', 'fr')})"]}}}
+
+
+# ─── Resend ──────────────────────────────────────────────────
+
+@app.post("/emails")
+async def send_email(request: Request):
+    body = await request.json()
+    error = await _simulate("resend")
+    if error is not None:
+        return error
+    email_id = str(uuid.uuid4())
+    verify_url = _VERIFY_URL_RE.search(body.get("html", ""))
+    _emails.append({
+        "id": email_id,
+        "to": body.get("to", []),
+        "subject": body.get("subject", ""),
+        "verify_url": verify_url.group(1) if verify_url else None,
+    })
+    return {"id": email_id}
+
+
+# ─── Pilotage ────────────────────────────────────────────────
+
+@app.get("/_fake/config")
+def get_config():
+    return _profiles
+
+
+@app.put("/_fake/config")
+async def update_config(request: Request):
+    overrides = await request.json()
+    unknown = set(overrides) - set(_profiles)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Upstreams inconnus : {sorted(unknown)}")
+    _merge(_profiles, overrides)
+    return _profiles
+
+
+@app.get("/_fake/stats")
+def get_stats():
+    return _stats
+
+
+@app.get("/_fake/emails")
+def get_emails(to: str | None = None):
+    """Emails reçus, du plus récent au plus ancien (filtrés par destinataire)."""
+    return [email for email in reversed(_emails) if to is None or to in email["to"]]
+
+
+@app.post("/_fake/reset")
+def reset():
+    global _profiles
+    _profiles = _load_profiles()
+    for counters in _stats.values():
+        counters.update(calls=0, errors=0)
+    _emails.clear()
+    return _profiles
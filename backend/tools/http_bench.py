@@ -0,0 +1,150 @@
+"""
+Coût par appel d'un client HTTP partagé (http_clients : connexions keep-alive, DNS +
+TCP + TLS faits une fois) comparé à un client ouvert et fermé à chaque appel, comme
+avant http_clients. Appels séquentiels POST /language/translate/v2 vers
+tools/fake_upstreams.py (latence simulée à 0), lancé ici par uvicorn sur la boucle
+locale, en TLS avec un certificat auto-signé (openssl) sauf avec --no-tls.
+
+Mêmes réglages de client que RapidAPI en production (http_clients._settings), contexte
+TLS construit comme httpx par défaut (bundle certifi) pour chaque client. Sur un
+vrai upstream, l'écart grandit avec l'aller-retour réseau : un TCP et un ou deux TLS
+de plus par appel, plus le DNS.
+Depuis backend/ :
+    python -m tools.http_bench --calls 300
+"""
+import argparse
+import asyncio
+import os
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+import config
+import http_clients
+
+_WARMUP_CALLS = 10
+_BODY = {"q": "lantern", "source": "en", "target": "fr"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _self_signed_certificate(directory: str) -> tuple[str, str]:
+    """(clé, certificat) auto-signés pour 127.0.0.1."""
+    key, cert = os.path.join(directory, "key.pem"), os.path.join(directory, "cert.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1",
+            "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True, capture_output=True,
+    )
+    return key, cert
+
+
+def _ssl_context(certificate: str | None) -> ssl.SSLContext:
+    """Contexte TLS d'un client httpx par défaut (bundle certifi, relu à chaque client), + le faux serveur."""
+    context = httpx.create_ssl_context()
+    if certificate is not None:
+        context.load_verify_locations(certificate)
+    return context
+
+
+def _start_server(port: int, tls: tuple[str, str] | None) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "tools.fake_upstreams:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ]
+    if tls is not None:
+        command += ["--ssl-keyfile", tls[0], "--ssl-certfile", tls[1]]
+    return subprocess.Popen(command)
+
+
+async def _wait_ready(base_url: str, certificate: str | None) -> None:
+    """Attend le faux serveur, puis supprime la latence simulée de la traduction."""
+    async with httpx.AsyncClient(verify=_ssl_context(certificate)) as client:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                (await client.get(f"{base_url}/_fake/config")).raise_for_status()
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+        (await client.put(
+            f"{base_url}/_fake/config",
+            json={"translate": {"latency": {"distribution": "fixed", "ms": 0, "tail_rate": 0.0}, "error_rate": 0.0}},
+        )).raise_for_status()
+
+
+async def _per_call(url: str, settings: dict, certificate: str | None, calls: int) -> list[float]:
+    durations = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        async with httpx.AsyncClient(**settings, verify=_ssl_context(certificate)) as client:
+            (await client.post(url, json=_BODY)).raise_for_status()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+async def _shared(url: str, settings: dict, certificate: str | None, calls: int) -> list[float]:
+    durations = []
+    async with httpx.AsyncClient(**settings, verify=_ssl_context(certificate)) as client:
+        for _ in range(_WARMUP_CALLS):
+            (await client.post(url, json=_BODY)).raise_for_status()
+        for _ in range(calls):
+            started = time.perf_counter()
+            (await client.post(url, json=_BODY)).raise_for_status()
+            durations.append(time.perf_counter() - started)
+    return durations
+
+
+async def run(calls: int, tls: bool) -> dict[str, list[float]]:
+    """Durées (s) de `calls` appels pour chaque mode, serveur neuf."""
+    with tempfile.TemporaryDirectory() as directory:
+        certificate = _self_signed_certificate(directory) if tls else None
+        port = _free_port()
+        base_url = f"{'https' if tls else 'http'}://127.0.0.1:{port}"
+        trusted = certificate[1] if certificate else None
+        server = _start_server(port, certificate)
+        try:
+            await _wait_ready(base_url, trusted)
+            settings = http_clients._settings(config.RAPIDAPI_TIMEOUT_SECONDS, config.RAPIDAPI_MAX_CONNECTIONS)
+            url = f"{base_url}/language/translate/v2"
+            await _per_call(url, settings, trusted, _WARMUP_CALLS)
+            return {
+                "client par appel": await _per_call(url, settings, trusted, calls),
+                "client partagé": await _shared(url, settings, trusted, calls),
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300, help="appels séquentiels par mode")
+    parser.add_argument("--no-tls", action="store_true", help="HTTP en clair (sans openssl)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.calls, tls=not args.no_tls))
+    print(f"{'mode':<20} {'moyenne':>8} {'p50':>8} {'p95':>8}  (ms/appel)")
+    for name, durations in results.items():
+        ms = sorted(d * 1000 for d in durations)
+        p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+        print(f"{name:<20} {statistics.fmean(ms):>8.1f} {statistics.median(ms):>8.1f} {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
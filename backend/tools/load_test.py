@@ -0,0 +1,295 @@
+"""
+Test de charge de bout en bout : des utilisateurs virtuels rejouent le parcours réel
+de l'application contre un backend lancé, et le débit et les latences p50 / p95 / p99
+sont mesurés par route.
+
+Parcours de chaque utilisateur virtuel :
+    1. inscription, lien de vérification lu dans le faux Resend (GET /_fake/emails), connexion ;
+    2. puis `--iterations` fois : import d'un livre (POST /books/batch-import) →
+       liste des chapitres → pour chaque chapitre : extraction (202 puis GET /jobs/{id}
+       jusqu'à la fin, relancée `--extract-retries` fois si elle échoue), confirmation
+       des mots, lecture du chapitre et de ses mots, traduction de quelques mots
+       (POST /translate) → suppression du livre.
+Le rapport compte aussi les mots proposés par l'extraction alors que l'utilisateur les a
+déjà enregistrés pour un chapitre précédent du livre (à désélectionner à la main).
+
+Le texte des chapitres est tiré au hasard dans la table de fréquence de la langue
+(data/frequency), selon la loi de Zipf : pas de livre à fournir. Avec `--book-pool N`,
+les utilisateurs importent des livres pris parmi N (mêmes classiques importés par tous).
+
+Prérequis : tools/fake_upstreams.py lancé et backend pointé dessus (voir son en-tête),
+avec des quotas Gemini à la mesure du test (GEMINI_REQUESTS_PER_MINUTE=0 : sans limite).
+Depuis backend/ :
+    python -m tools.load_test --users 20 --iterations 2 --chapters 4
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+_FREQUENCY_DIR = Path(__file__).resolve().parent.parent / "data" / "frequency"
+_JOB_POLL_SECONDS = 0.25
+_TRANSLATIONS_PER_CHAPTER = 3
+
+
+class Recorder:
+    """Latences (s) et erreurs par route (« MÉTHODE /chemin/{param} »)."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.extracted_words = 0
+        self.repeated_words = 0   # déjà enregistrés par l'utilisateur (même livre)
+        self.extraction_retries = 0
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        route: str,
+        method: str,
+        url: str,
+        expected: int,
+        **kwargs,
+    ) -> httpx.Response:
+        started_at = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            raise
+        self.latencies[route].append(time.perf_counter() - started_at)
+        if response.status_code != expected:
+            self.errors[route] += 1
+            raise RuntimeError(f"{route} : {response.status_code} {response.text[:200]}")
+        return response
+
+    def record(self, route: str, seconds: float) -> None:
+        self.latencies[route].append(seconds)
+
+
+# ─── Données ─────────────────────────────────────────────────
+
+def _load_vocabulary(language: str) -> tuple[list[str], list[float]]:
+    with gzip.open(_FREQUENCY_DIR / f"{language}.txt.gz", "rt", encoding="utf-8") as f:
+        words = f.read().split()
+    return words, [1 / (rank + 1) for rank in range(len(words))]
+
+
+def _book_chapters(args, vocabulary: tuple[list[str], list[float]], pool: list[list[str]]) -> list[str]:
+    if pool:
+        return random.choice(pool)
+    return [_chapter_text(vocabulary, args.chapter_words) for _ in range(args.chapters)]
+
+
+def _chapter_text(vocabulary: tuple[list[str], list[float]], word_count: int) -> str:
+    words, weights = vocabulary
+    sentences = []
+    drawn = random.choices(words, weights=weights, k=word_count)
+    for start in range(0, word_count, 12):
+        sentence = drawn[start:start + 12]
+        sentences.append(" ".join([sentence[0].capitalize(), *sentence[1:]]) + ".")
+    return " ".join(sentences)
+
+
+# ─── Parcours d'un utilisateur ───────────────────────────────
+
+async def _sign_up(client: httpx.AsyncClient, fake: httpx.AsyncClient, recorder: Recorder, run_id: str, index: int) -> dict:
+    username = f"load_{run_id}_{index}"
+    email = f"{username}@chapterprep-load.io"
+    password = "load-test-password"
+    await recorder.request(client, "POST /auth/register", "POST", "/auth/register", 201,
+                           json={"username": username, "email": email, "password": password})
+
+    emails = (await fake.get("/_fake/emails", params={"to": email})).json()
+    if not emails or not emails[0]["verify_url"]:
+        raise RuntimeError(f"Aucun email de vérification pour {email} (RESEND_API_URL pointe-t-il sur le faux serveur ?)")
+    token = httpx.URL(emails[0]["verify_url"]).params["token"]
+    await recorder.request(client, "GET /auth/verify-email", "GET", "/auth/verify-email", 303,
+                           params={"token": token})
+
+    response = await recorder.request(client, "POST /auth/login", "POST", "/auth/login", 200,
+                                      data={"username": username, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _wait_for_job(client: httpx.AsyncClient, recorder: Recorder, headers: dict, job_id: int) -> dict:
+    while True:
+        job = (await recorder.request(client, "GET /jobs/{id}", "GET", f"/jobs/{job_id}", 200,
+                                      headers=headers)).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(_JOB_POLL_SECONDS)
+
+
+async def _read_chapter(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    headers: dict,
+    args,
+    book_id: int,
+    chapter_id: int,
+    saved: set[str],
+) -> None:
+    """`saved` : formes de base (minuscules) déjà enregistrées pour ce livre, complété ici."""
+    chapter_url = f"/books/{book_id}/chapters/{chapter_id}"
+
+    # ── Extraction (relancée en cas d'échec, jusqu'à --extract-retries fois) ──
+    for attempt in range(args.extract_retries + 1):
+        if attempt:
+            recorder.extraction_retries += 1
+        started_at = time.perf_counter()
+        accepted = await recorder.request(
+            client, "POST /books/{id}/chapters/{id}/extract", "POST", f"{chapter_url}/extract", 202,
+            headers=headers,
+            json={"words_to_extract": args.words, "level": args.level, "translation_mode": "translation"},
+        )
+        job = await _wait_for_job(client, recorder, headers, accepted.json()["job"]["id"])
+        recorder.record("extraction (202 → fin de tâche)", time.perf_counter() - started_at)
+        if job["status"] != "failed":
+            break
+        recorder.errors["extraction (202 → fin de tâche)"] += 1
+    else:
+        return
+
+    # ── Confirmation, lecture, traduction ───────────────────
+    words = job["words"]
+    recorder.extracted_words += len(words)
+    recorder.repeated_words += sum(word["base_form"].lower() in saved for word in words)
+    saved.update(word["base_form"].lower() for word in words)
+    await recorder.request(client, "POST /books/{id}/chapters/{id}/words", "POST", f"{chapter_url}/words", 201,
+                           headers=headers, json={"words": words})
+    await recorder.request(client, "GET /books/{id}/chapters/{id}", "GET", chapter_url, 200, headers=headers)
+    await recorder.request(client, "GET /books/{id}/chapters/{id}/words", "GET", f"{chapter_url}/words", 200,
+                           headers=headers)
+    for word in random.sample(words, min(_TRANSLATIONS_PER_CHAPTER, len(words))):
+        try:
+            await recorder.request(client, "POST /translate", "POST", "/translate", 200,
+                                   headers=headers, json={"chapter_id": chapter_id, "word": word["word"]})
+        except RuntimeError:
+            pass   # comptée dans les erreurs ; la lecture continue, comme dans read.js
+
+
+async def _virtual_user(args, recorder: Recorder, vocabulary, pool, run_id: str, index: int, failures: list) -> None:
+    # Départs étalés sur --ramp-up secondes.
+    await asyncio.sleep(args.ramp_up * index / max(args.users, 1))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client, \
+            httpx.AsyncClient(base_url=args.fake_url, timeout=args.timeout) as fake:
+        try:
+            headers = await _sign_up(client, fake, recorder, run_id, index)
+            for iteration in range(args.iterations):
+                book = (await recorder.request(
+                    client, "POST /books/batch-import", "POST", "/books/batch-import", 201, headers=headers,
+                    json={
+                        "title": f"Livre {index}-{iteration}",
+                        "language": args.language,
+                        "chapters": _book_chapters(args, vocabulary, pool),
+                    },
+                )).json()
+                chapters = (await recorder.request(
+                    client, "GET /books/{id}/chapters", "GET", f"/books/{book['id']}/chapters", 200,
+                    headers=headers,
+                )).json()["items"]
+                saved: set[str] = set()
+                for chapter in chapters:
+                    await _read_chapter(client, recorder, headers, args, book["id"], chapter["id"], saved)
+                await recorder.request(client, "DELETE /books/{id}", "DELETE", f"/books/{book['id']}", 204,
+                                       headers=headers)
+        except (httpx.HTTPError, RuntimeError) as exc:
+            failures.append(f"utilisateur {index} : {exc}")
+
+
+# ─── Rapport ─────────────────────────────────────────────────
+
+def _percentile(ordered: list[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _report(recorder: Recorder, elapsed: float) -> list[dict]:
+    rows = []
+    for route, latencies in sorted(recorder.latencies.items()):
+        ordered = sorted(latencies)
+        rows.append({
+            "route": route,
+            "count": len(ordered),
+            "errors": recorder.errors.get(route, 0),
+            "throughput_per_s": round(len(ordered) / elapsed, 2),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 1),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 1),
+        })
+    return rows
+
+
+def _print_report(rows: list[dict], recorder: Recorder, elapsed: float, failures: list[str]) -> None:
+    width = max(len(row["route"]) for row in rows) if rows else 10
+    print(f"\n{'route':<{width}}  {'n':>6} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in rows:
+        print(
+            f"{row['route']:<{width}}  {row['count']:>6} {row['errors']:>5} {row['throughput_per_s']:>8} "
+            f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}"
+        )
+    print(f"\nMots extraits : {recorder.extracted_words}, dont déjà enregistrés : {recorder.repeated_words}")
+    print(f"Extractions relancées après un échec : {recorder.extraction_retries}")
+    print(f"Durée : {elapsed:.1f} s — utilisateurs en échec : {len(failures)}")
+    for failure in failures[:10]:
+        print(f"  {failure}")
+
+
+async def main(args) -> None:
+    vocabulary = _load_vocabulary(args.language)
+    pool = [
+        [_chapter_text(vocabulary, args.chapter_words) for _ in range(args.chapters)]
+        for _ in range(args.book_pool)
+    ]
+    recorder = Recorder()
+    failures: list[str] = []
+    run_id = uuid.uuid4().hex[:8]
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(
+        _virtual_user(args, recorder, vocabulary, pool, run_id, index, failures) for index in range(args.users)
+    ))
+    elapsed = time.perf_counter() - started_at
+
+    rows = _report(recorder, elapsed)
+    _print_report(rows, recorder, elapsed, failures)
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "elapsed_s": elapsed,
+            "routes": rows,
+            "extracted_words": recorder.extracted_words,
+            "repeated_words": recorder.repeated_words,
+            "extraction_retries": recorder.extraction_retries,
+            "failures": failures,
+        }, indent=2))
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000", help="backend testé")
+    parser.add_argument("--fake-url", default="http://localhost:8900", help="tools/fake_upstreams.py")
+    parser.add_argument("--users", type=int, default=10, help="utilisateurs virtuels simultanés")
+    parser.add_argument("--iterations", type=int, default=1, help="livres importés par utilisateur")
+    parser.add_argument("--chapters", type=int, default=3, help="chapitres par livre")
+    parser.add_argument("--chapter-words", type=int, default=600, help="mots par chapitre")
+    parser.add_argument("--book-pool", type=int, default=0, help="livres communs à tous (0 : textes uniques)")
+    parser.add_argument("--words", type=int, default=10, help="mots à extraire par chapitre")
+    parser.add_argument("--extract-retries", type=int, default=0,
+                        help="relances d'une extraction en échec, comme l'utilisateur qui reclique")
+    parser.add_argument("--level", default="B1", choices=["A1", "A2", "B1", "B2", "C1", "C2"])
+    parser.add_argument("--language", default="en", choices=["fr", "en", "es", "de", "it"])
+    parser.add_argument("--ramp-up", type=float, default=5, help="secondes pour démarrer tous les utilisateurs")
+    parser.add_argument("--timeout", type=float, default=60, help="timeout HTTP (s)")
+    parser.add_argument("--json", help="écrit aussi le rapport dans ce fichier")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(_parse_args()))
@@ -0,0 +1,55 @@
+"""
+Tables de fréquence des mots (data/frequency/<langue>.txt.gz) et découpage d'un texte en mots.
+
+Une table = les 20 000 formes les plus fréquentes de la langue, de la plus fréquente à la
+moins fréquente (voir data/frequency/README.md). Le rang d'une forme sert à estimer si
+elle est déjà connue à un niveau CECRL ; une forme absente de la table est rare.
+Les premiers rangs sont les mots grammaticaux : le seuil de niveau sert aussi de liste
+de stopwords.
+"""
+import gzip
+import re
+from collections.abc import Iterator
+from functools import lru_cache
+from pathlib import Path
+
+_DATA_DIR = Path(__file__).parent / "data" / "frequency"
+
+# Rang en deçà duquel une forme est supposée connue au niveau donné. Rangs de formes
+# fléchies (« mangeait », « mangé »…), pas de lemmes : environ le double des tailles de
+# vocabulaire usuelles par niveau.
+KNOWN_RANK_BY_LEVEL = {
+    "A1": 1000,
+    "A2": 2000,
+    "B1": 4000,
+    "B2": 7000,
+    "C1": 11000,
+    "C2": 16000,
+}
+
+# Suite de lettres (accents compris) : « l'été » → l, été ; « peut-être » → peut, être,
+# comme les entrées des tables.
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+@lru_cache(maxsize=None)
+def _ranks(language: str) -> dict[str, int]:
+    path = _DATA_DIR / f"{language}.txt.gz"
+    if not path.exists():
+        return {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return {word: rank for rank, word in enumerate(f.read().split())}
+
+
+def frequency_rank(language: str, word: str) -> int | None:
+    """Rang de `word` (en minuscules) dans la table de `language` ; None s'il n'y figure pas."""
+    return _ranks(language).get(word)
+
+
+def has_table(language: str) -> bool:
+    return bool(_ranks(language))
+
+
+def iter_words(text: str) -> Iterator[re.Match]:
+    """Mots du texte, avec leur position (match.start(), match.end())."""
+    return _WORD_RE.finditer(text)
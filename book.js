@@ -34,6 +34,8 @@ const emptyState         = document.getElementById("empty-state");
 const chapterList        = document.getElementById("chapter-list");
 const addChapterBtn      = document.getElementById("add-chapter-btn");
 const addChapterEmptyBtn = document.getElementById("add-chapter-empty-btn");
+const extractBookBtn     = document.getElementById("extract-book-btn");
+const bookExtractionStatus = document.getElementById("book-extraction-status");
 const modalOverlay       = document.getElementById("modal-overlay");
 const modalClose         = document.getElementById("modal-close");
 const modalCancelBtn     = document.getElementById("modal-cancel-btn");
@@ -110,7 +112,7 @@ function enforceWordLimit(text, limit) {
 }
 
 function recommendWords(wordCount) {
-  return Math.max(5, Math.min(Math.round(wordCount * 0.05), 60));
+  return Math.max(5, Math.min(Math.round(wordCount * 0.05), 50));
 }
 
 function escapeHtml(str) {
@@ -130,6 +132,55 @@ function resetBtn(btn, label) {
   btn.textContent = label;
 }
 
+// Suit une tâche d'extraction (réponse 202) jusqu'à "done" ou "failed".
+const JOB_POLL_INTERVAL_MS = 1000;
+
+async function waitForJob(jobId) {
+  while (true) {
+    const res = await authFetch(`${API_URL}/jobs/${jobId}`);
+    const job = await res.json().catch(() => ({}));
+    if (!res.ok) throw new Error(job.detail || "Impossible de suivre l'extraction.");
+    if (job.status === "done" || job.status === "failed") return job;
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
+// Suit la tâche par son flux SSE (GET /jobs/{id}/events) : onWord(word) pour chaque mot
+// dès que Gemini l'a généré, puis retourne la tâche terminée. fetch() et non EventSource,
+// qui ne peut pas envoyer l'en-tête Authorization. Repli sur le polling sans flux.
+async function followJob(jobId, onWord) {
+  const res = await authFetch(`${API_URL}/jobs/${jobId}/events`);
+  if (!res.ok || !res.body) return waitForJob(jobId);
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;   // commentaire keep-alive
+      const payload = JSON.parse(data);
+      if (event === "word") onWord(payload);
+      else if (event === "job" && (payload.status === "done" || payload.status === "failed")) {
+        reader.cancel();
+        return payload;
+      }
+    }
+  }
+  // Flux coupé avant la fin de la tâche : on termine en polling.
+  return waitForJob(jobId);
+}
+
 async function authFetch(url, options = {}) {
   const res = await fetch(url, {
     ...options,
@@ -237,8 +288,7 @@ function openExtractModal(chapter) {
   pendingChapterId = chapter.id;
   pendingWords = [];
 
-  const chapterText = String(chapter.text || "");
-  extractionTargetWords = recommendWords(countWords(chapterText));
+  extractionTargetWords = recommendWords(chapter.word_count || 0);
 
   addChapterForm.reset();
   addChapterError.textContent = "";
@@ -314,7 +364,9 @@ function renderChapter(chapter, index) {
       <div class="chapter-card__meta">
         <span class="chapter-card__stat">Niveau <strong>${escapeHtml(chapter.level)}</strong></span>
         <span class="chapter-card__stat">${modeLabel}</span>
-        ${isPending ? '<span class="chapter-card__status-badge">En attente</span>' : ''}
+        ${isPending
+          ? '<span class="chapter-card__status-badge">En attente</span>'
+          : `<span class="chapter-card__stat"><strong>${chapter.vocabulary_count}</strong> mots à apprendre</span>`}
       </div>
     </div>
     ${isPending ? '<button class="chapter-card__extract" type="button">Extraire le vocabulaire</button>' : ''}
@@ -455,10 +507,19 @@ async function loadBook() {
 
 async function loadChapters() {
   try {
-    const res = await authFetch(`${API_URL}/books/${bookId}/chapters`);
-    if (!res.ok) { renderChapterList([]); return; }
-    const chapters = await res.json();
-    renderChapterList(Array.isArray(chapters) ? chapters : []);
+    // GET /chapters est paginé : on suit next_cursor jusqu'à la dernière page
+    const chapters = [];
+    let cursor = null;
+    do {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await authFetch(`${API_URL}/books/${bookId}/chapters${query}`);
+      if (!res.ok) { renderChapterList([]); return; }
+      const page = await res.json();
+      chapters.push(...(Array.isArray(page.items) ? page.items : []));
+      cursor = page.next_cursor;
+    } while (cursor);
+    renderChapterList(chapters);
+    refreshBookExtraction();
   } catch {
     renderChapterList([]);
   }
@@ -520,11 +581,33 @@ addChapterForm.addEventListener("submit", async (e) => {
     const data = await res.json().catch(() => ({}));
     if (!res.ok) { addChapterError.textContent = data.detail || "Erreur lors de l'enregistrement."; return; }
 
+    // 202 : l'extraction tourne en arrière-plan ; les mots s'affichent au fil de leur
+    // génération. En création, le serveur supprime lui-même le chapitre si elle échoue.
+    let streamedWords = 0;
+    const job = await followJob(data.job.id, (word) => {
+      if (streamedWords === 0) showWordSelection(data.chapter.id);
+      streamedWords += 1;
+      appendWordItem(word);
+    });
+    if (job.status === "failed") {
+      if (modalMode === "create") pendingChapterId = null;
+      wordSelectionView.hidden = true;
+      addChapterForm.hidden    = false;
+      addChapterError.textContent = job.error || "L'extraction a échoué.";
+      return;
+    }
+
     shouldDeletePendingChapter = modalMode === "create";
-    renderWordSelection(data.chapter.id, data.words);
+    if (streamedWords === 0) showWordSelection(data.chapter.id);
+    finishWordSelection(job.words);
   } catch (err) {
     if (err.message !== "Unauthorized") {
-      addChapterError.textContent = "Impossible de contacter le serveur.";
+      // TypeError = échec réseau de fetch ; sinon, erreur levée par waitForJob.
+      wordSelectionView.hidden = true;
+      addChapterForm.hidden    = false;
+      addChapterError.textContent = err instanceof TypeError
+        ? "Impossible de contacter le serveur."
+        : err.message;
     }
   } finally {
     resetBtn(addChapterSubmit, "Enregistrer");
@@ -534,11 +617,49 @@ addChapterForm.addEventListener("submit", async (e) => {
 // ─────────────────────────────────────────────
 //  Sélection des mots extraits
 // ─────────────────────────────────────────────
-function renderWordSelection(chapterId, words) {
+// Ouvre la vue de sélection, vide : les mots y sont ajoutés au fil de l'extraction.
+function showWordSelection(chapterId) {
   pendingChapterId               = chapterId;
-  pendingWords                   = Array.isArray(words) ? words : [];
+  pendingWords                   = [];
   wordSelectionError.textContent = "";
   wordListEl.innerHTML           = "";
+  wordSelectionHint.textContent  = "Extraction en cours…";
+  confirmSelectionBtn.disabled   = true;
+
+  addChapterForm.hidden    = true;
+  wordSelectionView.hidden = false;
+  modalTitleEl.textContent = "Mots extraits";
+}
+
+function appendWordItem(w) {
+  const i = pendingWords.length;
+  pendingWords.push(w);
+  const li   = document.createElement("li");
+  li.className     = "word-item";
+  li.dataset.index = i;
+  const cbId = `word-cb-${i}`;
+  li.innerHTML = `
+    <label class="word-item__label" for="${cbId}">
+      <input type="checkbox" id="${cbId}" class="word-item__checkbox" checked />
+      <span class="word-item__word">${escapeHtml(w.word)}</span>
+      <span class="word-item__base">(${escapeHtml(w.base_form)})</span>
+      <span class="word-item__arrow">→</span>
+      <span class="word-item__output">${escapeHtml(w.output)}</span>
+    </label>
+  `;
+  wordListEl.appendChild(li);
+}
+
+// Liste définitive de la tâche terminée. Les mots déjà affichés (et les cases déjà
+// décochées) sont conservés s'ils correspondent ; sinon la liste est reconstruite.
+function finishWordSelection(words) {
+  const finalWords = Array.isArray(words) ? words : [];
+  if (finalWords.length !== pendingWords.length) {
+    pendingWords         = [];
+    wordListEl.innerHTML = "";
+    finalWords.forEach(appendWordItem);
+  }
+  confirmSelectionBtn.disabled = false;
 
   if (pendingWords.length === 0) {
     wordSelectionHint.textContent = "";
@@ -550,28 +671,7 @@ function renderWordSelection(chapterId, words) {
     const n = pendingWords.length;
     wordSelectionHint.textContent =
       `${n} mot${n > 1 ? "s" : ""} suggéré${n > 1 ? "s" : ""} — décochez ceux que vous ne souhaitez pas retenir.`;
-    pendingWords.forEach((w, i) => {
-      const li   = document.createElement("li");
-      li.className     = "word-item";
-      li.dataset.index = i;
-      const cbId = `word-cb-${i}`;
-      li.innerHTML = `
-        <label class="word-item__label" for="${cbId}">
-          <input type="checkbox" id="${cbId}" class="word-item__checkbox" checked />
-          <span class="word-item__word">${escapeHtml(w.word)}</span>
-          <span class="word-item__base">(${escapeHtml(w.base_form)})</span>
-          <span class="word-item__arrow">→</span>
-          <span class="word-item__output">${escapeHtml(w.output)}</span>
-        </label>
-      `;
-      wordListEl.appendChild(li);
-    });
   }
-
-  addChapterForm.hidden    = true;
-  wordSelectionView.hidden = false;
-  modalTitleEl.textContent = "Mots extraits";
-
 }
 
 backToFormBtn.addEventListener("click", async () => {
@@ -667,6 +767,69 @@ async function deleteChapter(chapterId, chapterNumber, cardEl) {
   }
 }
 
+// ─────────────────────────────────────────────
+//  Extraction du livre entier
+// ─────────────────────────────────────────────
+// POST /books/{id}/extract met en file tous les chapitres "pending" ; la progression
+// est relue jusqu'à ce qu'aucune tâche ne soit en file ou en cours. Les mots extraits
+// sont en cache côté serveur : "Extraire le vocabulaire" sur un chapitre les retrouve
+// aussitôt (mêmes niveau, mode et nombre de mots recommandé).
+const BOOK_EXTRACTION_POLL_INTERVAL_MS = 2000;
+const EXTRACT_BOOK_LABEL = "Extraire tout le livre";
+let bookExtractionTimer = null;
+
+function renderBookExtraction(progress) {
+  const inProgress = progress.queued + progress.running > 0;
+  extractBookBtn.hidden   = progress.pending_chapters === 0;
+  extractBookBtn.disabled = inProgress;
+
+  const started = progress.pending_chapters - progress.not_started;
+  if (progress.pending_chapters === 0 || started === 0) {
+    bookExtractionStatus.hidden = true;
+    return inProgress;
+  }
+  const parts = [`${progress.extracted}/${progress.pending_chapters} chapitres extraits`];
+  if (inProgress) parts.push("en cours…");
+  if (progress.failed > 0) parts.push(`${progress.failed} en échec`);
+  bookExtractionStatus.textContent = parts.join(" • ");
+  bookExtractionStatus.hidden = false;
+  return inProgress;
+}
+
+async function refreshBookExtraction() {
+  clearTimeout(bookExtractionTimer);
+  try {
+    const res = await authFetch(`${API_URL}/books/${bookId}/extraction`);
+    if (!res.ok) return;
+    if (renderBookExtraction(await res.json())) {
+      bookExtractionTimer = setTimeout(refreshBookExtraction, BOOK_EXTRACTION_POLL_INTERVAL_MS);
+    }
+  } catch {
+    // Échec réseau : la progression sera relue au prochain chargement des chapitres.
+  }
+}
+
+extractBookBtn.addEventListener("click", async () => {
+  setLoading(extractBookBtn, "Mise en file…");
+  try {
+    // Relancer après un échec ne remet en file que les chapitres non extraits.
+    const res = await authFetch(`${API_URL}/books/${bookId}/extract`, { method: "POST" });
+    const data = await res.json().catch(() => ({}));
+    resetBtn(extractBookBtn, EXTRACT_BOOK_LABEL);
+    if (!res.ok) {
+      bookExtractionStatus.textContent = data.detail || "Impossible de lancer l'extraction.";
+      bookExtractionStatus.hidden = false;
+      return;
+    }
+    renderBookExtraction(data);
+    bookExtractionTimer = setTimeout(refreshBookExtraction, BOOK_EXTRACTION_POLL_INTERVAL_MS);
+  } catch {
+    resetBtn(extractBookBtn, EXTRACT_BOOK_LABEL);
+    bookExtractionStatus.textContent = "Impossible de contacter le serveur.";
+    bookExtractionStatus.hidden = false;
+  }
+});
+
 // ─────────────────────────────────────────────
 //  Initialisation
 // ─────────────────────────────────────────────
@@ -184,26 +184,35 @@ function renderBookList(books) {
 // ─────────────────────────────────────────────
 async function loadBooks() {
   try {
-    const response = await fetch(`${API_URL}/books`, {
-      headers: { Authorization: `Bearer ${token}` },
-    });
-
-    if (response.status === 401) {
-      localStorage.clear();
-      window.location.href = "index.html";
-      return;
-    }
-
-    if (!response.ok) {
-      booksError.textContent = `Erreur serveur (${response.status}) — impossible de charger les livres.`;
-      booksError.hidden = false;
-      renderBookList([]);
-      return;
-    }
+    // GET /books est paginé : on suit next_cursor jusqu'à la dernière page
+    const books = [];
+    let cursor = null;
+    do {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const response = await fetch(`${API_URL}/books${query}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+
+      if (response.status === 401) {
+        localStorage.clear();
+        window.location.href = "index.html";
+        return;
+      }
+
+      if (!response.ok) {
+        booksError.textContent = `Erreur serveur (${response.status}) — impossible de charger les livres.`;
+        booksError.hidden = false;
+        renderBookList([]);
+        return;
+      }
+
+      const page = await response.json();
+      books.push(...(Array.isArray(page.items) ? page.items : []));
+      cursor = page.next_cursor;
+    } while (cursor);
 
     booksError.hidden = true;
-    const books = await response.json();
-    renderBookList(Array.isArray(books) ? books : []);
+    renderBookList(books);
   } catch (err) {
     console.error("Impossible de charger les livres :", err);
     booksError.textContent = "Impossible de contacter le serveur.";
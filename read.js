@@ -190,17 +190,33 @@ function renderTranslationResult(word, translation, note = "") {
   `;
 }
 
+// GET /words est paginé : on suit next_cursor jusqu'à la dernière page
+async function loadAllWords() {
+  const words = [];
+  let cursor = null;
+  do {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await authFetch(`${API_URL}/books/${bookId}/chapters/${chapterId}/words${query}`);
+    const page = await res.json().catch(() => ({}));
+    if (!res.ok) {
+      return { words: [], error: page.detail || "Impossible de charger les mots du chapitre." };
+    }
+    words.push(...(Array.isArray(page.items) ? page.items : []));
+    cursor = page.next_cursor;
+  } while (cursor);
+  return { words, error: null };
+}
+
 async function loadPage() {
   readErrorEl.textContent = "";
 
   try {
-    const [chapterRes, wordsRes] = await Promise.all([
+    const [chapterRes, wordsResult] = await Promise.all([
       authFetch(`${API_URL}/books/${bookId}/chapters/${chapterId}`),
-      authFetch(`${API_URL}/books/${bookId}/chapters/${chapterId}/words`),
+      loadAllWords(),
     ]);
 
     const chapterData = await chapterRes.json().catch(() => ({}));
-    const wordsData = await wordsRes.json().catch(() => []);
 
     if (!chapterRes.ok) {
       readErrorEl.textContent = chapterData.detail || "Impossible de charger le chapitre.";
@@ -208,11 +224,11 @@ async function loadPage() {
       return;
     }
 
-    if (!wordsRes.ok) {
-      readErrorEl.textContent = wordsData.detail || "Impossible de charger les mots du chapitre.";
+    if (wordsResult.error) {
+      readErrorEl.textContent = wordsResult.error;
       vocabWords = [];
     } else {
-      vocabWords = Array.isArray(wordsData) ? wordsData : [];
+      vocabWords = wordsResult.words;
     }
 
     chapterTitleEl.textContent = `Chapitre ${chapterData.chapter_number}`;
@@ -247,7 +263,7 @@ async function translateWord(word) {
 
     currentTranslation = {
       word: data.word,
-      base_form: data.word,
+      base_form: data.base_form,
       output: data.translation,
     };
 